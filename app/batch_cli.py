@@ -0,0 +1,343 @@
+"""
+Headless batch OCR.
+
+Runs OCRProcessor over directories, glob patterns or single files without
+the Streamlit UI. Documents are processed concurrently by a pool of warm
+worker processes and every page is appended to a per-document JSONL file
+as soon as it is recognized. A manifest in the output directory records
+the state of each document, so an interrupted run started again with the
+same arguments skips finished documents and resumes the others at their
+first unfinished page.
+
+Usage:
+    python app/batch_cli.py scans/ "archive/**/*.pdf" -o ocr_output --languages en,ar --jobs 4
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import hashlib
+import logging
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import settings
+from page_scheduler import _init_worker
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('pdf', 'png', 'jpg', 'jpeg', 'tif', 'tiff', 'bmp')
+MANIFEST_NAME = 'manifest.json'
+
+_processor = None
+
+def _init_batch_worker(options):
+    """Loads the engines once per worker process."""
+    global _processor
+    from ocr_processor import OCRProcessor
+    _processor = OCRProcessor(page_workers=1, **options)
+
+def _write_pages(path, output_path, results, progress):
+    """Appends one JSON line per page result to `output_path`, reporting every page on `progress`."""
+    pages = 0
+    with open(output_path, 'a', encoding='utf-8') as output:
+        for result in results:
+            record = dict(result, file=path)
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            output.flush()
+            pages += 1
+            progress.put((path, result['page']))
+    return pages
+
+def _process_document(path, output_path, languages, start_page, progress):
+    """OCRs one document from `start_page` on in this worker process."""
+    extension = path.rsplit('.', 1)[-1].lower()
+    with open(path, 'rb') as document:
+        results = _processor.iter_pages(document, extension, languages, start_page=start_page)
+        return _write_pages(path, output_path, results, progress)
+
+def _process_document_remote(service_url, path, output_path, languages, start_page, progress):
+    """OCRs one document from `start_page` on through the OCR service."""
+    from service_client import iter_service_pages
+    extension = path.rsplit('.', 1)[-1].lower()
+    with open(path, 'rb') as document:
+        data = document.read()
+    results = iter_service_pages(data, extension, languages, start_page=start_page, service_url=service_url)
+    return _write_pages(path, output_path, results, progress)
+
+def expand_inputs(inputs):
+    """
+    Resolves directories (searched recursively), glob patterns and file paths
+    into a sorted list of unique absolute paths of supported documents.
+    """
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, name) for name in files)
+        elif glob.has_magic(pattern):
+            paths.update(glob.glob(pattern, recursive=True))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            logger.warning(f"No such file or directory: {pattern}")
+    return sorted(
+        os.path.abspath(path) for path in paths
+        if os.path.isfile(path) and path.rsplit('.', 1)[-1].lower() in SUPPORTED_EXTENSIONS
+    )
+
+def page_count(path):
+    """Number of pages of a document, or None if it cannot be determined cheaply."""
+    if not path.lower().endswith('.pdf'):
+        return 1
+    try:
+        from processors.pdf_processor import pdf_page_count
+        return pdf_page_count(path)
+    except Exception as e:
+        logger.warning(f"Could not count pages of {path}: {str(e)}")
+        return None
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _output_name(path):
+    # The path digest keeps documents with the same name in different folders apart
+    digest = hashlib.blake2b(path.encode('utf-8'), digest_size=4).hexdigest()
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest}.jsonl"
+
+def completed_pages(output_path):
+    """
+    Counts the complete page records of a JSONL output and cuts off a
+    record torn by an interrupted write. Pages are written in order, so the
+    count is also the number of the last finished page.
+    """
+    if not os.path.exists(output_path):
+        return 0
+    count = 0
+    valid_bytes = 0
+    with open(output_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            count += 1
+            valid_bytes += len(line)
+    if valid_bytes < os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(valid_bytes)
+    return count
+
+class Manifest:
+    """
+    Job manifest: the state of every document of a batch, keyed by path.
+
+    Each entry holds the document's output file, page count, number of
+    finished pages, status ('pending', 'running', 'done' or 'failed') and the
+    size/mtime it had when processing started. The file is rewritten
+    atomically, so it is always readable after an interruption.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.documents = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.documents = json.load(f).get('documents', {})
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated': time.time(), 'documents': self.documents}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def prepare(self, path, output_dir):
+        """
+        Returns the manifest entry of a document, ready to be (re)started: a
+        changed input starts over, otherwise finished pages are kept.
+        """
+        fingerprint = _fingerprint(path)
+        entry = self.documents.get(path)
+        if entry is None or entry.get('fingerprint') != fingerprint:
+            entry = {
+                'output': os.path.join(output_dir, _output_name(path)),
+                'fingerprint': fingerprint,
+                'pages': page_count(path),
+                'status': 'pending',
+            }
+            if os.path.exists(entry['output']):
+                os.remove(entry['output'])
+            self.documents[path] = entry
+        entry['pages_done'] = completed_pages(entry['output'])
+        if entry['pages'] is not None and entry['pages_done'] >= entry['pages']:
+            entry['status'] = 'done'
+        return entry
+
+class Progress:
+    """Prints pages done, throughput and ETA at most every `interval` seconds."""
+
+    def __init__(self, total_pages, done_pages, stream=sys.stderr, interval=2.0):
+        self.total_pages = total_pages
+        self.done_pages = done_pages
+        self.new_pages = 0
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, pages=1, force=False):
+        self.done_pages += pages
+        self.new_pages += pages
+        now = time.perf_counter()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            print(self.line(now), file=self.stream, flush=True)
+
+    def line(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.new_pages / elapsed if elapsed else 0.0
+        total = self.total_pages if self.total_pages is not None else '?'
+        text = f"[{self.done_pages}/{total} pages] {rate:.2f} pages/s, elapsed {_duration(elapsed)}"
+        if rate and self.total_pages is not None:
+            text += f", ETA {_duration(max(self.total_pages - self.done_pages, 0) / rate)}"
+        return text
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+def run_batch(paths, output_dir, languages=['en'], jobs=None, processor_options=None, service_url=None):
+    """
+    OCRs every document in `paths` into `output_dir`, resuming earlier runs.
+
+    Args:
+        paths (list): Absolute document paths (see `expand_inputs`).
+        output_dir (str): Folder for the JSONL outputs and the manifest.
+        languages (list): Two-letter language codes.
+        jobs (int): Number of documents processed concurrently (defaults to settings.BATCH_JOBS).
+        processor_options (dict): Extra OCRProcessor arguments (mode, execution_mode...).
+        service_url (str): Submit the documents to this OCR service instead of
+            running local worker processes.
+    Returns:
+        dict: Number of documents per final status.
+    """
+    jobs = max(1, jobs or settings.BATCH_JOBS)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(output_dir, MANIFEST_NAME))
+
+    pending = []
+    for path in paths:
+        entry = manifest.prepare(path, output_dir)
+        if entry['status'] != 'done':
+            entry['status'] = 'pending'
+            pending.append(path)
+    manifest.save()
+
+    entries = [manifest.documents[path] for path in paths]
+    known_pages = [entry['pages'] for entry in entries]
+    total_pages = None if None in known_pages else sum(known_pages)
+    progress = Progress(total_pages, sum(entry['pages_done'] for entry in entries))
+    logger.info(f"{len(paths)} documents, {len(paths) - len(pending)} already done, {len(pending)} to process")
+
+    if pending:
+        with contextlib.ExitStack() as stack:
+            if service_url:
+                # The service owns the engines; threads only upload and write results
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=jobs))
+                page_queue = queue.Queue()
+                process = lambda *args: executor.submit(_process_document_remote, service_url, *args)
+            else:
+                context = multiprocessing.get_context(settings.PAGE_WORKER_START_METHOD)
+                threads_per_worker = max(1, (os.cpu_count() or 1) // jobs)
+                page_queue = stack.enter_context(context.Manager()).Queue()
+                executor = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=jobs,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(threads_per_worker, _init_batch_worker, (processor_options or {},))
+                ))
+                process = lambda *args: executor.submit(_process_document, *args)
+
+            futures = {}
+            for path in pending:
+                entry = manifest.documents[path]
+                future = process(path, entry['output'], languages, entry['pages_done'] + 1, page_queue)
+                futures[future] = path
+
+            running = set(futures)
+            while running:
+                finished, running = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+                _drain(page_queue, manifest, progress)
+                for future in finished:
+                    entry = manifest.documents[futures[future]]
+                    try:
+                        future.result()
+                        entry['status'] = 'done'
+                        entry['pages'] = entry['pages_done']
+                    except Exception as e:
+                        entry['status'] = 'failed'
+                        entry['error'] = f"{type(e).__name__}: {e}"
+                        logger.error(f"Failed to process {futures[future]}: {entry['error']}")
+                manifest.save()
+            _drain(page_queue, manifest, progress)
+            manifest.save()
+
+    progress.update(0, force=True)
+    statuses = {}
+    for path in paths:
+        status = manifest.documents[path]['status']
+        statuses[status] = statuses.get(status, 0) + 1
+    return statuses
+
+def _drain(page_queue, manifest, progress):
+    """Applies the page completions reported by the workers to the manifest."""
+    pages = 0
+    while not page_queue.empty():
+        path, page = page_queue.get()
+        entry = manifest.documents[path]
+        if entry['status'] == 'pending':
+            entry['status'] = 'running'
+        entry['pages_done'] = max(entry['pages_done'], page)
+        pages += 1
+    if pages:
+        manifest.save()
+        progress.update(pages)
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR documents in batch, resuming interrupted runs")
+    parser.add_argument('inputs', nargs='+', help="Directories, glob patterns or files")
+    parser.add_argument('-o', '--output-dir', default='ocr_output',
+                        help="Folder for the per-document JSONL results and the manifest")
+    parser.add_argument('--languages', default='en', help="Comma separated language codes")
+    parser.add_argument('--jobs', type=int, default=settings.BATCH_JOBS,
+                        help="Number of documents processed concurrently")
+    parser.add_argument('--mode', choices=('ensemble', 'cascade'), help="OCR mode (default: settings.OCR_MODE)")
+    parser.add_argument('--execution-mode', choices=('sequential', 'thread', 'process'),
+                        help="How the engines of a page run inside a worker")
+    parser.add_argument('--service-url', default=settings.SERVICE_URL,
+                        help="Submit the documents to a running OCR service (service.py) instead")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        parser.error("No supported documents found")
+
+    processor_options = {'mode': args.mode, 'execution_mode': args.execution_mode}
+    statuses = run_batch(paths, args.output_dir, languages=args.languages.split(','),
+                         jobs=args.jobs, processor_options=processor_options,
+                         service_url=args.service_url)
+    print(", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    sys.exit(1 if statuses.get('failed') else 0)
+
+if __name__ == "__main__":
+    main()
@@ -21,4 +21,151 @@ class Settings:
         'high': 90
     }
 
+    # Engines OCRProcessor uses; each is imported and loaded on first use, or right away
+    # on a background thread with WARM_UP
+    OCR_ENGINES = os.getenv('OCR_ENGINES', 'easyocr,paddleocr,tesseract').split(',')
+    WARM_UP = os.getenv('OCR_WARM_UP', '0') == '1'
+
+    # Per-page script detection (Tesseract OSD, one call per horizontal band of the page,
+    # off by default): a page only drops the candidate languages of other scripts when
+    # every band holding text reports the same script with at least SCRIPT_MIN_CONFIDENCE;
+    # mixed-script pages and uncertain detections keep every requested language
+    LANGUAGE_DETECTION = os.getenv('OCR_LANGUAGE_DETECTION', '0') == '1'
+    SCRIPT_MIN_CONFIDENCE = float(os.getenv('OCR_SCRIPT_MIN_CONFIDENCE', 5.0))
+    SCRIPT_DETECTION_BANDS = int(os.getenv('OCR_SCRIPT_DETECTION_BANDS', 3))
+
+    # OCR mode: 'ensemble' runs every engine on every page, 'cascade' runs Tesseract
+    # first and only re-reads words below the CASCADE_CONFIDENCE_LEVEL threshold
+    OCR_MODE = os.getenv('OCR_MODE', 'ensemble')
+    CASCADE_CONFIDENCE_LEVEL = os.getenv('OCR_CASCADE_CONFIDENCE_LEVEL', 'medium')
+
+    # PDF rasterization: resolution, pages rendered per pdftoppm call and
+    # how many rendered pages may wait for OCR
+    PDF_DPI = 300
+    PDF_RENDER_WINDOW = int(os.getenv('OCR_PDF_RENDER_WINDOW', 4))
+    PDF_PREFETCH_PAGES = int(os.getenv('OCR_PDF_PREFETCH_PAGES', 4))
+
+    # Adaptive rasterization: render a PDF_PREVIEW_DPI preview of every page and
+    # render it again at the lowest DPI that makes its median glyph
+    # PDF_TARGET_TEXT_HEIGHT pixels tall, within [PDF_MIN_DPI, PDF_MAX_DPI]
+    PDF_ADAPTIVE_DPI = os.getenv('OCR_PDF_ADAPTIVE_DPI', '0') == '1'
+    PDF_PREVIEW_DPI = int(os.getenv('OCR_PDF_PREVIEW_DPI', 100))
+    PDF_TARGET_TEXT_HEIGHT = float(os.getenv('OCR_PDF_TARGET_TEXT_HEIGHT', 25))
+    PDF_MIN_DPI = int(os.getenv('OCR_PDF_MIN_DPI', 150))
+    PDF_MAX_DPI = int(os.getenv('OCR_PDF_MAX_DPI', 450))
+
+    # Born-digital PDF pages: use the embedded text layer instead of OCR when
+    # it has at least TEXT_LAYER_MIN_WORDS words and this share of ordinary characters,
+    # its word boxes cover at least TEXT_LAYER_MIN_TEXT_COVERAGE of the page and raster
+    # images cover at most TEXT_LAYER_MAX_IMAGE_COVERAGE of it (scans go to OCR). On by
+    # default; set OCR_TEXT_LAYER_ENABLED=0 to OCR every page
+    TEXT_LAYER_ENABLED = os.getenv('OCR_TEXT_LAYER_ENABLED', '1') == '1'
+    TEXT_LAYER_MIN_WORDS = int(os.getenv('OCR_TEXT_LAYER_MIN_WORDS', 5))
+    TEXT_LAYER_MIN_VALID_RATIO = float(os.getenv('OCR_TEXT_LAYER_MIN_VALID_RATIO', 0.9))
+    TEXT_LAYER_MIN_TEXT_COVERAGE = float(os.getenv('OCR_TEXT_LAYER_MIN_TEXT_COVERAGE', 0.01))
+    TEXT_LAYER_MAX_IMAGE_COVERAGE = float(os.getenv('OCR_TEXT_LAYER_MAX_IMAGE_COVERAGE', 0.5))
+
+    # Page triage before OCR: pages with less than TRIAGE_BLANK_COVERAGE of their area
+    # holding ink (darker than TRIAGE_INK_LEVEL) are skipped as blank, and pages matching
+    # one of the last TRIAGE_WINDOW pages of the same document (hash distance, then at most
+    # TRIAGE_MAX_DIFF_PIXELS differing thumbnail pixels, see processors.page_triage) reuse that
+    # page's result. TRIAGE_CROSS_DOCUMENT also matches earlier documents of the same
+    # tenant (e.g. one Streamlit session); pages are never reused across tenants. On by
+    # default and kept in memory only; set OCR_TRIAGE_ENABLED=0 to OCR every page
+    TRIAGE_ENABLED = os.getenv('OCR_TRIAGE_ENABLED', '1') == '1'
+    TRIAGE_BLANK_COVERAGE = float(os.getenv('OCR_TRIAGE_BLANK_COVERAGE', 0.0001))
+    TRIAGE_INK_LEVEL = int(os.getenv('OCR_TRIAGE_INK_LEVEL', 128))
+    TRIAGE_WINDOW = int(os.getenv('OCR_TRIAGE_WINDOW', 64))
+    TRIAGE_MAX_DISTANCE = int(os.getenv('OCR_TRIAGE_MAX_DISTANCE', 8))
+    TRIAGE_MAX_DIFF_PIXELS = int(os.getenv('OCR_TRIAGE_MAX_DIFF_PIXELS', 0))
+    TRIAGE_CROSS_DOCUMENT = os.getenv('OCR_TRIAGE_CROSS_DOCUMENT', '0') == '1'
+    TRIAGE_MAX_TENANTS = int(os.getenv('OCR_TRIAGE_MAX_TENANTS', 16))
+
+    # Oversized pages (drawings, maps): pages above TILE_MAX_PIXELS are preprocessed in
+    # strips and OCR'd in overlapping tiles. Tiles are shrunk below TILE_SIZE and run in
+    # parallel only as far as TILE_MEMORY_BUDGET allows, assuming an engine needs
+    # TILE_BYTES_PER_PIXEL bytes per tile pixel
+    TILE_MAX_PIXELS = int(os.getenv('OCR_TILE_MAX_PIXELS', 40_000_000))
+    TILE_SIZE = int(os.getenv('OCR_TILE_SIZE', 4096))
+    TILE_OVERLAP = int(os.getenv('OCR_TILE_OVERLAP', 256))
+    TILE_MEMORY_BUDGET = int(os.getenv('OCR_TILE_MEMORY_BUDGET', 2 * 1024 ** 3))
+    TILE_BYTES_PER_PIXEL = float(os.getenv('OCR_TILE_BYTES_PER_PIXEL', 64))
+
+    # On-disk OCR result cache (off by default). Entries take up to CACHE_MAX_BYTES in
+    # CACHE_DIR; the least recently used ones are evicted beyond that
+    CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', '0') == '1'
+    CACHE_DIR = os.getenv('OCR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'advanced-ocr'))
+    CACHE_MAX_BYTES = int(os.getenv('OCR_CACHE_MAX_BYTES', 1024 ** 3))
+
+    # Per-page checkpoints of OCRProcessor.process_file, so failed documents resume
+    # at their first unfinished page (off by default; kept apart from the cache, which
+    # evicts entries). A document's checkpoint is removed once it completes
+    CHECKPOINT_ENABLED = os.getenv('OCR_CHECKPOINT_ENABLED', '0') == '1'
+    CHECKPOINT_DIR = os.getenv('OCR_CHECKPOINT_DIR',
+                               os.path.join(os.path.expanduser('~'), '.cache', 'advanced-ocr-checkpoints'))
+    # Checkpoints of documents that are never retried are removed once unchanged for
+    # CHECKPOINT_MAX_AGE seconds, and the oldest ones once all take more than CHECKPOINT_MAX_BYTES
+    CHECKPOINT_MAX_AGE = int(os.getenv('OCR_CHECKPOINT_MAX_AGE', 7 * 24 * 3600))
+    CHECKPOINT_MAX_BYTES = int(os.getenv('OCR_CHECKPOINT_MAX_BYTES', 1024 ** 3))
+
+    # Number of text regions per recognition batch in ocr_engines.batch_engine
+    RECOGNITION_BATCH_SIZE = int(os.getenv('OCR_RECOGNITION_BATCH_SIZE', 32))
+    # Recognize the PaddleOCR text regions of up to RECOGNITION_BATCH_PAGES pages together
+    # (OCRProcessor ensemble mode with one page worker, e.g. batch_cli). EasyOCR is left
+    # out: it only batches recognition on a GPU and reads regions one by one on CPU
+    BATCH_RECOGNITION = os.getenv('OCR_BATCH_RECOGNITION', '0') == '1'
+    RECOGNITION_BATCH_PAGES = int(os.getenv('OCR_RECOGNITION_BATCH_PAGES', 8))
+
+    # Layout-aware OCR in pipeline.py: detect blocks first, skip figures and recognize
+    # text blocks as separate crops on LAYOUT_WORKERS threads (OCRProcessor does not use it).
+    # Columns are read right to left on pages routed to Arabic alone (needs LANGUAGE_DETECTION)
+    LAYOUT_ENABLED = os.getenv('OCR_LAYOUT_ENABLED', '0') == '1'
+    LAYOUT_WORKERS = int(os.getenv('OCR_LAYOUT_WORKERS', 4))
+
+    # JSONL file every OCRProcessor request appends its timing spans to (disabled if unset)
+    TRACE_FILE = os.getenv('OCR_TRACE_FILE')
+
+    # Maximum number of OCR engine instances kept loaded per process
+    ENGINE_POOL_SIZE = int(os.getenv('OCR_ENGINE_POOL_SIZE', 4))
+
+    # How OCRProcessor runs the engines of a page: 'sequential', 'thread' or 'process'
+    # ('process' gives each engine one process of its own; ENGINE_WORKERS sizes the thread pool)
+    ENGINE_EXECUTION_MODE = os.getenv('OCR_ENGINE_EXECUTION_MODE', 'thread')
+    ENGINE_WORKERS = int(os.getenv('OCR_ENGINE_WORKERS', 3))
+
+    # Page-level parallelism: number of worker processes and the bound on pages in flight
+    # (0 means twice the number of workers)
+    PAGE_WORKERS = int(os.getenv('OCR_PAGE_WORKERS', 1))
+    MAX_PAGES_IN_FLIGHT = int(os.getenv('OCR_MAX_PAGES_IN_FLIGHT', 0))
+    PAGE_WORKER_START_METHOD = os.getenv('OCR_PAGE_WORKER_START_METHOD', 'spawn')
+    # Engine execution mode inside a page worker; cores are already used by the page pool
+    PAGE_WORKER_EXECUTION_MODE = os.getenv('OCR_PAGE_WORKER_EXECUTION_MODE', 'sequential')
+
+    # Number of documents the batch CLI (batch_cli.py) processes concurrently
+    BATCH_JOBS = int(os.getenv('OCR_BATCH_JOBS', 2))
+
+    # OCR service (service.py): address, warm worker processes, bounded job queue, the
+    # Retry-After (seconds) sent when the queue is full and how long finished jobs are kept
+    SERVICE_HOST = os.getenv('OCR_SERVICE_HOST', '127.0.0.1')
+    SERVICE_PORT = int(os.getenv('OCR_SERVICE_PORT', 8765))
+    SERVICE_WORKERS = int(os.getenv('OCR_SERVICE_WORKERS', 2))
+    SERVICE_QUEUE_SIZE = int(os.getenv('OCR_SERVICE_QUEUE_SIZE', 16))
+    SERVICE_RETRY_AFTER = int(os.getenv('OCR_SERVICE_RETRY_AFTER', 10))
+    SERVICE_JOB_TTL = int(os.getenv('OCR_SERVICE_JOB_TTL', 3600))
+    SERVICE_MAX_UPLOAD_BYTES = int(os.getenv('OCR_SERVICE_MAX_UPLOAD_BYTES', 200 * 1024 ** 2))
+    # Clients (Streamlit app, batch CLI) submit to this service when set, e.g. http://127.0.0.1:8765
+    SERVICE_URL = os.getenv('OCR_SERVICE_URL')
+
+    # Batched Tesseract (ocr_engines.tesseract_batch): pages OCR'd per Tesseract process
+    # (1 runs one process per page); a batch gets ENGINE_TIMEOUTS['tesseract'] per page
+    TESSERACT_BATCH_PAGES = int(os.getenv('OCR_TESSERACT_BATCH_PAGES', 8))
+
+    # Per-engine timeouts in seconds for parallel execution
+    ENGINE_TIMEOUTS = {
+        'easyocr': 120,
+        'paddleocr': 120,
+        'tesseract': 60,
+        'default': 120
+    }
+
 settings = Settings()
@@ -1,64 +1,177 @@
 import streamlit as st
-import os
-import tempfile
-from processors.image_preprocessing import preprocess_image
-from processors.pdf_processor import pdf_to_images
-from ocr_engines.tesseract_engine import run_tesseract_ocr
-from ocr_engines.easyocr_engine import run_easyocr
-from ocr_engines.paddleocr_engine import run_paddleocr
+import io
+import hashlib
+import itertools
+import collections
+import logging
+from processors.pdf_processor import iter_pdf_arrays, pdf_dpi, pdf_page_count
+from processors.image_preprocessing import decode_image
+from processors.text_layer import classify_pdf, text_layer_result
+from processors.page_triage import PageIndex, merge_triaged, triage_pages
+from page_scheduler import PageScheduler
+from pipeline import process_page, warm_up_engines
 from utils.confidence_highlighter import create_highlighted_document
+from utils.instrumentation import Tracer, use_tracer, stage_metrics
+from utils.word_table import WordTable
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+@st.cache_resource
+def get_page_scheduler():
+    """
+    One page scheduler for every session and rerun. Its workers (or this
+    process, with a single worker) load the engines once and keep them warm.
+    """
+    return PageScheduler(process_page, initializer=warm_up_engines)
+
+def count_pages(file_bytes, file_extension):
+    """Number of pages for the progress bar, or None if it cannot be determined."""
+    if file_extension != 'pdf':
+        return 1
+    try:
+        return pdf_page_count(file_bytes)
+    except Exception as e:
+        logger.warning(f"Could not count PDF pages: {str(e)}")
+        return None
+
+def read_text_layer(file_bytes, tracer):
+    """
+    Splits a PDF into pages whose embedded text can be used as is and pages
+    that need OCR.
+
+    Returns:
+        tuple: ({page number: word results} of the born-digital pages, page
+        numbers to OCR, or None to OCR every page).
+    """
+    with tracer.span('text_layer'):
+        pages = classify_pdf(file_bytes)
+    if pages is None:
+        return {}, None
+    text_pages = {page['page']: text_layer_result(page)['words'] for page in pages if page['trusted']}
+    return text_pages, [page['page'] for page in pages if not page['trusted']]
+
+def merge_pages(ocr_results, text_pages):
+    """
+    Yields (page number, word results) in page order, interleaving the
+    (page number, word results) pairs of the OCR'd pages with the text-layer pages.
+    """
+    pending = sorted(text_pages)
+    for page_number, page_results in ocr_results:
+        while pending and pending[0] < page_number:
+            text_page = pending.pop(0)
+            yield text_page, text_pages[text_page]
+        yield page_number, page_results
+    for text_page in pending:
+        yield text_page, text_pages[text_page]
+
+def run_ocr(file_bytes, file_extension, tracer):
+    """
+    OCRs an uploaded document page by page with a live progress bar.
+
+    Returns:
+        WordTable: Word results of all pages, in page order.
+    """
+    total_pages = count_pages(file_bytes, file_extension)
+    progress = st.progress(0.0, text="Processing files...")
+    page_tables = []
+
+    if settings.SERVICE_URL:
+        # The shared OCR service keeps the models loaded for every session;
+        # interactive uploads go ahead of batch jobs
+        from service_client import iter_service_pages, page_words
+        # The service reads born-digital pages from the text layer itself
+        pages = ((page['page'], page_words(page)) for page in
+                 iter_service_pages(file_bytes, file_extension, ['en', 'ar'], priority=1))
+    else:
+        text_pages, ocr_pages = {}, None
+        # Pages stay in memory as NumPy arrays from rasterization to OCR
+        if file_extension == 'pdf':
+            if settings.TEXT_LAYER_ENABLED:
+                text_pages, ocr_pages = read_text_layer(file_bytes, tracer)
+            # Pages with a usable text layer are never rendered
+            images = iter_pdf_arrays(file_bytes, dpi=pdf_dpi(), pages=ocr_pages)
+        else:
+            images = [decode_image(file_bytes)]
+        # Blank pages are skipped and repeated pages reuse the words of their first copy; the
+        # session is the tenant whose earlier uploads may be matched with TRIAGE_CROSS_DOCUMENT
+        plan = collections.deque()
+        page_index = None
+        if settings.TRIAGE_ENABLED:
+            page_index = (st.session_state.setdefault('page_index', PageIndex())
+                          if settings.TRIAGE_CROSS_DOCUMENT else PageIndex())
+        images = triage_pages(images, ocr_pages if ocr_pages is not None else itertools.count(1),
+                              plan, index=page_index)
+        # Pages are OCR'd in parallel worker processes, results come back in page order
+        results = merge_triaged(get_page_scheduler().map(images), plan,
+                                blank=list, duplicate=lambda entry: entry['result'])
+        pages = merge_pages(results, text_pages)
+
+    # Per-stage spans are only collected for pages processed in this process
+    with use_tracer(tracer), tracer.span('ocr'):
+        for done, (page_number, page_results) in enumerate(pages, start=1):
+            # One compact table per page; the page number lays each page out on its own page of the DOCX
+            page_tables.append(WordTable.from_words(page_results, page=page_number))
+            if total_pages:
+                progress.progress(min(done / total_pages, 1.0),
+                                  text=f"Processed page {done} of {total_pages}")
+            else:
+                progress.progress(0.0, text=f"Processed page {done}")
+
+    progress.progress(1.0, text="OCR completed successfully.")
+    return WordTable.concat(page_tables)
 
 def main():
     st.title("Advanced OCR System with Confidence Highlighting")
 
     uploaded_file = st.file_uploader("Upload an image or PDF", type=['png', 'jpg', 'jpeg', 'pdf'])
+    # Output options only affect the DOCX, never the OCR
+    rtl_mode = st.checkbox("RTL Mode (Arabic)", value=True)
 
     if uploaded_file is not None:
         file_extension = uploaded_file.name.split('.')[-1].lower()
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            input_path = os.path.join(temp_dir, uploaded_file.name)
-
-            with open(input_path, 'wb') as f:
-                f.write(uploaded_file.read())
-
-            images = []
-            if file_extension == 'pdf':
-                images = pdf_to_images(input_path, temp_dir)
-            else:
-                images = [input_path]
-
-            all_results = []
-
-            st.info("Processing files...")
-
-            for img_path in images:
-                preprocessed_img = preprocess_image(img_path)
-
-                tesseract_results = run_tesseract_ocr(preprocessed_img)
-                easyocr_results = run_easyocr(preprocessed_img)
-                paddleocr_results = run_paddleocr(preprocessed_img, languages='en')
-
-                combined_results = tesseract_results + easyocr_results + paddleocr_results
-
-                all_results.extend(combined_results)
-
+        file_bytes = uploaded_file.getvalue()
+        file_key = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+
+        # Widget interactions rerun this script; OCR only runs for a file not seen in this session
+        ocr_results = st.session_state.setdefault('ocr_results', {})
+        if file_key not in ocr_results:
+            tracer = Tracer()
+            ocr_results.clear()
+            ocr_results[file_key] = {
+                'words': run_ocr(file_bytes, file_extension, tracer),
+                'tracer': tracer,
+            }
+            stage_metrics.observe(tracer.spans)
+            st.session_state.pop('docx', None)
+        else:
             st.success("OCR completed successfully.")
-
-            if all_results:
-                output_word_path = os.path.join(temp_dir, "output.docx")
-
-                rtl_mode = st.checkbox("RTL Mode (Arabic)", value=True)
-
-                create_highlighted_document(all_results, output_word_path, rtl=rtl_mode)
-
-                with open(output_word_path, "rb") as file:
-                    st.download_button(
-                        label="Download Result as Word Document",
-                        data=file,
-                        file_name="ocr_output.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
+        document = ocr_results[file_key]
+        all_results = document['words']
+        tracer = document['tracer']
+
+        if all_results:
+            # Only the DOCX is rebuilt when the output options change
+            docx_key = (file_key, rtl_mode)
+            cached_docx = st.session_state.get('docx')
+            if cached_docx is None or cached_docx[0] != docx_key:
+                output_docx = io.BytesIO()
+                # Timed on a tracer of its own, so only the latest rebuild shows up next to the OCR
+                docx_tracer = Tracer()
+                with docx_tracer.span('docx'):
+                    create_highlighted_document(all_results, output_docx, rtl=rtl_mode)
+                cached_docx = st.session_state['docx'] = (docx_key, output_docx.getvalue(), docx_tracer)
+
+            st.download_button(
+                label="Download Result as Word Document",
+                data=cached_docx[1],
+                file_name="ocr_output.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
+
+        with st.expander("Processing times"):
+            docx = st.session_state.get('docx')
+            st.json({**tracer.summary(), **(docx[2].summary() if docx else {})})
 
 if __name__ == "__main__":
     main()
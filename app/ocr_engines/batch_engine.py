@@ -0,0 +1,198 @@
+import logging
+import cv2
+import numpy as np
+from config import settings
+from ocr_engines.engine_pool import get_engine
+from ocr_engines.languages import engine_languages, tesseract_lang
+from ocr_engines.paddleocr_engine import get_paddleocr
+
+logger = logging.getLogger(__name__)
+
+# Vertical gap between crops stacked on an EasyOCR recognition canvas
+CANVAS_GAP = 16
+
+def run_batch(items, engine='easyocr', languages=['en'], batch_size=None):
+    """
+    Runs an engine over many pages and region crops at once.
+
+    Detection runs per page, but the text regions of all items are pooled
+    and recognized in large batches, so the recognizer does a few big
+    forward passes instead of many tiny ones. Results are mapped back to
+    the item they came from. EasyOCR only batches on a GPU: its CPU
+    recognizer reads one region at a time, so on CPU (as the readers of
+    this app run) its regions are recognized one by one.
+
+    Args:
+        items (list): Dicts with
+            - image: NumPy array (grayscale or BGR)
+            - source: Any identifier of the page/document, copied into every result
+            - offset: Optional (x, y) of the image inside its source page, added to the boxes
+            - detect: If False the image is already a text region crop and is recognized
+              as a whole without detection (default True)
+        engine (str): 'easyocr', 'paddleocr' or 'tesseract'.
+        languages (list): Two-letter language codes.
+        batch_size (int): Number of regions per recognition batch
+            (defaults to settings.RECOGNITION_BATCH_SIZE); for Tesseract, the number
+            of images per Tesseract process. PaddleOCR uses the shared instance
+            of paddleocr_engine, which batches by settings.RECOGNITION_BATCH_SIZE.
+
+    Returns:
+        list: One list of word results (text, confidence, box, source) per item,
+        with boxes as corner points in source page coordinates.
+    """
+    batch_size = batch_size or settings.RECOGNITION_BATCH_SIZE
+    if engine == 'easyocr':
+        return _run_easyocr_batch(items, languages, batch_size)
+    if engine == 'paddleocr':
+        return _run_paddleocr_batch(items, languages)
+    if engine == 'tesseract':
+        return _run_tesseract_batch(items, languages, batch_size)
+    raise ValueError(f"Batch recognition is not supported for engine: {engine}")
+
+def _gray(image):
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def _crop_quad(image, points):
+    """Cuts a (possibly rotated) quadrilateral out of the image as an upright rectangle."""
+    pts = np.array(points, dtype=np.float32)
+    width = int(max(np.linalg.norm(pts[0] - pts[1]), np.linalg.norm(pts[2] - pts[3])))
+    height = int(max(np.linalg.norm(pts[0] - pts[3]), np.linalg.norm(pts[1] - pts[2])))
+    width, height = max(width, 1), max(height, 1)
+    target = np.float32([[0, 0], [width, 0], [width, height], [0, height]])
+    matrix = cv2.getPerspectiveTransform(pts, target)
+    crop = cv2.warpPerspective(image, matrix, (width, height),
+                               borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC)
+    # Vertical text lines are read rotated
+    if height / width >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+def _regions(items, detect):
+    """
+    Runs `detect(image)` on every item that needs detection and returns the
+    flat list of (item index, crop, corner points in item coordinates).
+    """
+    regions = []
+    for index, item in enumerate(items):
+        image = item['image']
+        if not item.get('detect', True):
+            h, w = image.shape[:2]
+            regions.append((index, image, [[0, 0], [w, 0], [w, h], [0, h]]))
+            continue
+        for points in detect(image):
+            regions.append((index, _crop_quad(image, points), points))
+    return regions
+
+def _to_result(item, text, confidence, points):
+    dx, dy = item.get('offset', (0, 0))
+    return {
+        'text': text,
+        'confidence': round(float(confidence) * 100, 2),  # Convert to percentage
+        'box': [[float(x) + dx, float(y) + dy] for x, y in points],
+        'source': item.get('source')
+    }
+
+def _run_easyocr_batch(items, languages, batch_size):
+    reader = get_engine('easyocr', engine_languages('easyocr', languages), gpu=False)
+
+    def detect(image):
+        horizontal, free = reader.detect(image)
+        boxes = [[[x0, y0], [x1, y0], [x1, y1], [x0, y1]] for x0, x1, y0, y1 in horizontal[0]]
+        return boxes + [list(points) for points in free[0]]
+
+    regions = _regions(items, detect)
+    results = [[] for _ in items]
+
+    if getattr(reader, 'device', 'cpu') == 'cpu':
+        # On CPU EasyOCR reads regions one at a time whatever the batch size, so
+        # a canvas would only add work; only detection is shared with the GPU path
+        for index, crop, points in regions:
+            gray = _gray(crop)
+            h, w = gray.shape
+            for _, text, confidence in reader.recognize(gray, horizontal_list=[[0, w, 0, h]], free_list=[]):
+                if text.strip():
+                    results[index].append(_to_result(items[index], text, confidence, points))
+        return results
+
+    # EasyOCR recognizes the boxes of one image per call, so on a GPU the crops of
+    # every item are stacked on a shared canvas and recognized together
+    for start in range(0, len(regions), batch_size):
+        chunk = regions[start:start + batch_size]
+        crops = [_gray(crop) for _, crop, _ in chunk]
+        width = max(crop.shape[1] for crop in crops)
+        height = sum(crop.shape[0] for crop in crops) + CANVAS_GAP * (len(crops) + 1)
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+
+        slots = []
+        y = CANVAS_GAP
+        for crop in crops:
+            h, w = crop.shape
+            canvas[y:y + h, :w] = crop
+            slots.append((y, y + h, w))
+            y += h + CANVAS_GAP
+
+        horizontal_list = [[0, w, y0, y1] for y0, y1, w in slots]
+        recognized = reader.recognize(canvas, horizontal_list=horizontal_list, free_list=[],
+                                      batch_size=batch_size)
+
+        for box, text, confidence in recognized:
+            if not text.strip():
+                continue
+            top = min(point[1] for point in box)
+            for (y0, y1, _), (index, _, points) in zip(slots, chunk):
+                if y0 <= top < y1:
+                    results[index].append(_to_result(items[index], text, confidence, points))
+                    break
+
+    return results
+
+def _run_paddleocr_batch(items, languages):
+    ocr = get_paddleocr(engine_languages('paddleocr', languages)[0])
+
+    def detect(image):
+        detections = ocr.ocr(image, det=True, rec=False, cls=False)
+        return detections[0] if detections and detections[0] else []
+
+    regions = _regions(items, detect)
+    results = [[] for _ in items]
+
+    # Paddle's recognizer takes a list of crops and batches them itself
+    crops = [crop if crop.ndim == 3 else cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR) for _, crop, _ in regions]
+    recognizer = getattr(ocr, 'text_recognizer', None)
+    if recognizer is not None:
+        recognized, _ = recognizer(crops)
+    else:
+        logger.info("PaddleOCR has no batched recognizer, recognizing crops one by one")
+        recognized = []
+        for crop in crops:
+            lines = ocr.ocr(crop, det=False, cls=False)
+            recognized.append(lines[0][0] if lines and lines[0] else ('', 0.0))
+
+    for (index, _, points), (text, confidence) in zip(regions, recognized):
+        if text.strip():
+            results[index].append(_to_result(items[index], text, confidence, points))
+
+    return results
+
+def _run_tesseract_batch(items, languages, batch_size):
+    from ocr_engines.tesseract_batch import iter_data_batches, words_from_data
+    lang = tesseract_lang(languages)
+    results = [[] for _ in items]
+
+    # Tesseract finds the lines of whole pages itself; crops are read as a single line
+    for detect, config in ((True, '--oem 3 --psm 6'), (False, '--oem 3 --psm 7')):
+        indices = [index for index, item in enumerate(items) if item.get('detect', True) == detect]
+        data = iter_data_batches([items[index]['image'] for index in indices], lang, config, batch_size)
+        for index, page_data in zip(indices, data):
+            item = items[index]
+            dx, dy = item.get('offset', (0, 0))
+            for word in words_from_data(page_data):
+                x, y, w, h = word['box']
+                results[index].append({
+                    'text': word['text'],
+                    'confidence': float(word['confidence']),
+                    'box': [[x + dx, y + dy], [x + w + dx, y + dy], [x + w + dx, y + h + dy], [x + dx, y + h + dy]],
+                    'source': item.get('source')
+                })
+
+    return results
@@ -1,28 +1,38 @@
-import easyocr
 import cv2
+from utils.result_cache import result_cache
+from ocr_engines.engine_pool import get_engine
 
-def run_easyocr(image, languages=['en', 'ar']):
+def run_easyocr(image, languages=['en', 'ar'], cache=True):
     """
     Runs EasyOCR on the given image and returns results.
     Each result contains:
     - text
     - confidence score
     - bounding box coordinates
+    The result cache is skipped when `cache` is off (see run_tesseract_ocr).
     """
-    # Initialize the EasyOCR reader
-    reader = easyocr.Reader(languages, gpu=False)
-
     # Ensure the input image is in the correct format
     if isinstance(image, str):
         image = cv2.imread(image)
         if image is None:
             raise ValueError(f"Could not load image at {image}")
 
-    # Convert to RGB
-    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    # Return the stored result if this exact image was OCR'd before
+    if cache:
+        cache_key = result_cache.make_key(image, 'easyocr', languages, {'gpu': False})
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Get the shared EasyOCR reader (loaded once per process)
+    reader = get_engine('easyocr', languages, gpu=False)
+
+    # EasyOCR detects on RGB; single-channel images are used as they are
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
     # Run EasyOCR
-    detections = reader.readtext(rgb)
+    detections = reader.readtext(image)
 
     results = []
     for detection in detections:
@@ -35,4 +45,6 @@ def run_easyocr(image, languages=['en', 'ar']):
             }
             results.append(result)
 
+    if cache:
+        result_cache.put(cache_key, results)
     return results
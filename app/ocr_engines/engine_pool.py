@@ -0,0 +1,131 @@
+import threading
+import logging
+from collections import OrderedDict
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _create_easyocr(languages, gpu=False, **options):
+    import easyocr
+    return easyocr.Reader(list(languages), gpu=gpu, **options)
+
+
+def _create_paddleocr(languages, **options):
+    from paddleocr import PaddleOCR
+    # PaddleOCR only takes a single language per instance
+    lang = languages[0] if languages else 'en'
+    return PaddleOCR(lang=lang, **options)
+
+
+def _create_layout_model(languages, model_name, score_threshold=0.8, label_map=()):
+    import layoutparser as lp
+    # Layout models are language independent; `languages` is ignored
+    return lp.Detectron2LayoutModel(
+        model_name,
+        extra_config=["MODEL.ROI_HEADS.SCORE_THRESH_TEST", score_threshold],
+        label_map=dict(label_map)
+    )
+
+
+ENGINE_FACTORIES = {
+    'easyocr': _create_easyocr,
+    'paddleocr': _create_paddleocr,
+    'layout': _create_layout_model,
+}
+
+
+class EnginePool:
+    """
+    Process-wide registry of loaded OCR engines.
+
+    Engines are created lazily on first request and shared by every caller
+    asking for the same (engine, languages, options) combination. At most
+    `max_engines` instances stay resident; the least recently used one is
+    dropped when the limit is exceeded.
+    """
+
+    def __init__(self, max_engines=None, factories=None):
+        self.max_engines = max_engines or settings.ENGINE_POOL_SIZE
+        self.factories = dict(factories or ENGINE_FACTORIES)
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    @staticmethod
+    def _language_list(languages):
+        if isinstance(languages, str):
+            return [languages]
+        return list(languages or [])
+
+    @classmethod
+    def make_key(cls, engine, languages, options):
+        # Sorted only for the key: the same languages in any order share one instance
+        return (engine, tuple(sorted(cls._language_list(languages))), tuple(sorted(options.items())))
+
+    def register(self, engine, factory):
+        """Register a factory `factory(languages, **options)` for an engine name."""
+        self.factories[engine] = factory
+
+    def get(self, engine, languages=None, **options):
+        """
+        Return a shared instance of `engine` for the given languages and options,
+        loading it if it is not resident yet. The factory gets the languages in
+        the order of the caller that loads the instance.
+        """
+        if engine not in self.factories:
+            raise ValueError(f"Unknown OCR engine: {engine}")
+
+        key = self.make_key(engine, languages, options)
+
+        with self._lock:
+            if key in self._engines:
+                self._engines.move_to_end(key)
+                return self._engines[key]
+            # Only one thread loads a given key; the others wait for it
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if key in self._engines:
+                    self._engines.move_to_end(key)
+                    return self._engines[key]
+
+            languages = self._language_list(languages)
+            logger.info(f"Loading {engine} engine for languages {languages}")
+            try:
+                instance = self.factories[engine](languages, **options)
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+
+            with self._lock:
+                self._loading.pop(key, None)
+                self._engines[key] = instance
+                self._engines.move_to_end(key)
+                while len(self._engines) > self.max_engines:
+                    evicted_key, _ = self._engines.popitem(last=False)
+                    logger.info(f"Evicted {evicted_key[0]} engine for languages {list(evicted_key[1])}")
+
+        return instance
+
+    def evict(self, engine=None):
+        """Drop all resident instances, or only those of `engine`."""
+        with self._lock:
+            for key in [k for k in self._engines if engine is None or k[0] == engine]:
+                del self._engines[key]
+
+    def resident(self):
+        """Return the keys of the currently loaded engines, least recently used first."""
+        with self._lock:
+            return list(self._engines)
+
+
+engine_pool = EnginePool()
+
+
+def get_engine(engine, languages=None, **options):
+    """Shortcut for `engine_pool.get(...)` on the process-wide pool."""
+    return engine_pool.get(engine, languages, **options)
@@ -1,35 +1,371 @@
-
 # app/ocr_engines/ensemble_ocr.py
 
 import os
-from app.ocr_engines.tesseract_engine import extract_text_tesseract
-from app.ocr_engines.easyocr_engine import extract_text_easyocr
-from app.ocr_engines.paddleocr_engine import extract_text_paddleocr
+import re
+import time
+import logging
+from collections import defaultdict
+import cv2
+import numpy as np
+from config import settings
+from ocr_engines.languages import engine_languages, tesseract_lang
+from ocr_engines.tesseract_engine import run_tesseract_ocr
+from ocr_engines.easyocr_engine import run_easyocr
+from ocr_engines.paddleocr_engine import run_paddleocr
+from utils.word_table import WordTable
+
+logger = logging.getLogger(__name__)
+
+def _load(image):
+    if isinstance(image, str):
+        if not os.path.exists(image):
+            raise FileNotFoundError(f"Image not found: {image}")
+        loaded = cv2.imread(image)
+        if loaded is None:
+            raise ValueError(f"Could not load image at {image}")
+        return loaded
+    return image
+
+def _run_engine(engine, image, languages, cache=True):
+    """Runs one engine wrapper with its own language codes."""
+    if engine == 'tesseract':
+        return run_tesseract_ocr(image, lang=tesseract_lang(languages), cache=cache)
+    if engine == 'easyocr':
+        return run_easyocr(image, languages=engine_languages('easyocr', languages), cache=cache)
+    if engine == 'paddleocr':
+        return run_paddleocr(image, languages=engine_languages('paddleocr', languages)[0], cache=cache)
+    raise ValueError(f"Unknown OCR engine: {engine}")
 
-def ensemble_ocr(image_path, languages=['en']):
+def ensemble_ocr(image_path, languages=['en'], mode='ensemble'):
     """
     Apply multiple OCR engines on the input image and merge results.
 
     Args:
-        image_path (str): Path to the image file.
+        image_path (str or numpy.ndarray): Path to the image file, or the loaded image.
         languages (list): Languages to recognize. Example: ['en'], ['ar'], ['en', 'ar']
+        mode (str): 'ensemble' runs every engine on the whole image,
+            'cascade' only re-reads low confidence regions (see `cascade_ocr`).
 
     Returns:
         str: Final improved text.
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
+    image = _load(image_path)
+
+    if mode == 'cascade':
+        return " ".join(word['text'] for word in cascade_ocr(image, languages))
+
+    # Extract words from multiple engines
+    results_by_engine = {}
+    for engine in ('tesseract', 'easyocr', 'paddleocr'):
+        results_by_engine[engine] = _run_engine(engine, image, languages)
+
+    # Align the word boxes of the engines and vote on every word
+    merged = merge_word_results(results_by_engine)
+    return words_to_text(merged)
+
+def cascade_ocr(image, languages=['en'], threshold=None, fallback_engines=('easyocr', 'paddleocr'),
+                padding=4, stats=None, failed=None):
+    """
+    Confidence-gated cascade: Tesseract reads the whole image first, and only
+    the regions it is unsure about are cropped and re-read by the heavier
+    engines. Clean pages cost a single Tesseract pass.
+
+    Args:
+        image (str or numpy.ndarray): Path to the image file, or the loaded image.
+        languages (list): Languages to recognize.
+        threshold (str or float): Confidence (0-100) below which a word gets a second opinion,
+            or a level name from settings.CONFIDENCE_THRESHOLDS.
+            Defaults to settings.CASCADE_CONFIDENCE_LEVEL.
+        fallback_engines (tuple): Engines asked for a second opinion, in order.
+        padding (int): Pixels added around each low confidence region before cropping.
+        stats (dict): Optional dict accumulating the wall time spent in each engine.
+        failed (set): Optional set receiving the fallback engines that raised.
+
+    Returns:
+        list: Word results (text, confidence, box, engine) in Tesseract reading order.
+    """
+    image = _load(image)
+    if threshold is None:
+        threshold = settings.CASCADE_CONFIDENCE_LEVEL
+    if isinstance(threshold, str):
+        threshold = settings.CONFIDENCE_THRESHOLDS[threshold]
+
+    def timed(engine, img, cache=True):
+        start = time.perf_counter()
+        try:
+            return _run_engine(engine, img, languages, cache)
+        finally:
+            if stats is not None:
+                stats[engine] = stats.get(engine, 0.0) + time.perf_counter() - start
+
+    words = [dict(word, engine='tesseract') for word in timed('tesseract', image)]
+    low = [i for i, word in enumerate(words) if word['confidence'] < threshold]
+    if not low:
+        return words
+
+    height, width = image.shape[:2]
+    replacements = {}
+    for region in _group_regions(words, low):
+        x0 = min(words[i]['box'][0] for i in region)
+        y0 = min(words[i]['box'][1] for i in region)
+        x1 = max(words[i]['box'][0] + words[i]['box'][2] for i in region)
+        y1 = max(words[i]['box'][1] + words[i]['box'][3] for i in region)
+        x0, y0 = max(x0 - padding, 0), max(y0 - padding, 0)
+        x1, y1 = min(x1 + padding, width), min(y1 + padding, height)
+        crop = image[y0:y1, x0:x1]
+
+        best_words = None
+        best_conf = np.mean([words[i]['confidence'] for i in region])
+        for engine in fallback_engines:
+            try:
+                # Regions are too specific to be looked up again; the whole-page pass is cached
+                candidates = timed(engine, crop, cache=False)
+            except Exception as e:
+                logger.warning(f"{engine} failed on cascade region: {str(e)}")
+                if failed is not None:
+                    failed.add(engine)
+                continue
+            if not candidates:
+                continue
+            conf = np.mean([word['confidence'] for word in candidates])
+            if conf > best_conf:
+                best_words = [_translate(word, x0, y0, engine) for word in candidates]
+                best_conf = conf
+
+        if best_words:
+            replacements[region[0]] = (region, best_words)
+
+    merged = []
+    skip = set()
+    for i, word in enumerate(words):
+        if i in replacements:
+            region, best_words = replacements[i]
+            merged.extend(best_words)
+            skip.update(region)
+        elif i not in skip:
+            merged.append(word)
+    return merged
+
+def _group_regions(words, low):
+    """
+    Groups consecutive low confidence words that sit next to each other on the
+    same line, so each region is cropped and re-read once.
+    """
+    regions = []
+    for i in low:
+        if regions and regions[-1][-1] == i - 1:
+            prev = words[i - 1]['box']
+            box = words[i]['box']
+            overlap = min(prev[1] + prev[3], box[1] + box[3]) - max(prev[1], box[1])
+            gap = box[0] - (prev[0] + prev[2])
+            line_height = max(min(prev[3], box[3]), 1)
+            if overlap > 0.5 * line_height and 0 <= gap < 2 * line_height:
+                regions[-1].append(i)
+                continue
+        regions.append([i])
+    return regions
+
+def _translate(word, dx, dy, engine):
+    """Moves a crop-relative word result back into page coordinates."""
+    box = word['box']
+    if len(box) == 4 and not hasattr(box[0], '__len__'):
+        box = (box[0] + dx, box[1] + dy, box[2], box[3])
+    else:
+        box = [[point[0] + dx, point[1] + dy] for point in box]
+    return dict(word, box=box, engine=engine)
+
+ARABIC_CHARS = re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+def normalize_box(box):
+    """
+    Converts an engine box to (x0, y0, x1, y1).
+    Tesseract boxes are (left, top, width, height), EasyOCR/PaddleOCR boxes are lists of corner points.
+    """
+    if len(box) == 4 and not hasattr(box[0], '__len__'):
+        x, y, w, h = box
+        return float(x), float(y), float(x + w), float(y + h)
+    xs = [float(point[0]) for point in box]
+    ys = [float(point[1]) for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def is_rtl(text):
+    """True if most letters of `text` are Arabic."""
+    letters = [c for c in text if c.isalpha()]
+    return bool(letters) and len(ARABIC_CHARS.findall(text)) * 2 > len(letters)
+
+def split_words(result):
+    """
+    Splits a line-level detection (as returned by EasyOCR and PaddleOCR) into
+    word-level entries, dividing its box proportionally to the word lengths.
+    Arabic lines are laid out from right to left.
+
+    Returns:
+        list: (text, confidence, (x0, y0, x1, y1)) tuples, one per word.
+    """
+    x0, y0, x1, y1 = normalize_box(result['box'])
+    tokens = result['text'].split()
+    if len(tokens) <= 1:
+        return [(result['text'].strip(), result['confidence'], (x0, y0, x1, y1))]
+
+    # A separating space counts as one character
+    total = sum(len(token) for token in tokens) + len(tokens) - 1
+    char_width = (x1 - x0) / max(total, 1)
+    rtl = is_rtl(result['text'])
+
+    words = []
+    offset = 0
+    for token in tokens:
+        width = len(token) * char_width
+        if rtl:
+            box = (x1 - offset - width, y0, x1 - offset, y1)
+        else:
+            box = (x0 + offset, y0, x0 + offset + width, y1)
+        words.append((token, result['confidence'], box))
+        offset += width + char_width
+    return words
+
+def _iou(a, b):
+    ix = min(a[2], b[2]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[1], b[1])
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+def merge_word_results(results_by_engine, iou_threshold=0.3, weights=None):
+    """
+    Merges the word results of several engines into one list by aligning
+    their boxes and voting on each word.
+
+    Line-level detections are first split into words. Words are then visited
+    from the most to the least confident and attached to the best overlapping
+    cluster that has no word of the same engine yet. A uniform grid indexes
+    the clusters, so each word is only compared with its spatial neighbours
+    and the merge stays O(n log n) on dense pages. Every cluster then votes:
+    each distinct text scores the confidence-weighted support of the engines
+    that read it, and the best scoring text wins.
+
+    Args:
+        results_by_engine (dict or WordTable): Engine name -> list (or WordTable) of word
+            results (text, confidence, box), or one WordTable with every engine's words.
+        iou_threshold (float): Minimum box overlap for two words to be the same word.
+        weights (dict): Optional per-engine vote weights (default 1.0).
+
+    Returns:
+        list: Merged words (text, confidence, box as (left, top, width, height),
+        engines, line) in reading order.
+    """
+    weights = weights or {}
+    if isinstance(results_by_engine, WordTable):
+        results_by_engine = results_by_engine.by_engine()
+
+    words = []
+    for engine, results in results_by_engine.items():
+        if isinstance(results, WordTable):
+            # Read the columns once instead of going through a view per word
+            results = ({'text': text, 'confidence': confidence, 'box': box} for text, confidence, box
+                       in zip(results.texts(), results.confidence.tolist(), results.boxes.tolist()))
+        for result in results:
+            if not result['text'].strip():
+                continue
+            for text, confidence, box in split_words(result):
+                if box[2] > box[0] and box[3] > box[1]:
+                    words.append((engine, text, float(confidence), box))
+    if not words:
+        return []
+
+    heights = sorted(box[3] - box[1] for _, _, _, box in words)
+    cell = max(heights[len(heights) // 2], 1.0)
+
+    def cells(box):
+        for gx in range(int(box[0] // cell), int(box[2] // cell) + 1):
+            for gy in range(int(box[1] // cell), int(box[3] // cell) + 1):
+                yield gx, gy
+
+    clusters = []
+    grid = defaultdict(list)
+    for engine, text, confidence, box in sorted(words, key=lambda word: -word[2]):
+        best, best_iou = None, iou_threshold
+        seen = set()
+        for key in cells(box):
+            for index in grid[key]:
+                if index in seen:
+                    continue
+                seen.add(index)
+                cluster = clusters[index]
+                if engine in cluster['engines']:
+                    continue
+                overlap = _iou(box, cluster['box'])
+                if overlap >= best_iou:
+                    best, best_iou = index, overlap
+        if best is None:
+            # The most confident word anchors the cluster's box
+            clusters.append({'box': box, 'engines': {engine}, 'members': [(engine, text, confidence)]})
+            for key in cells(box):
+                grid[key].append(len(clusters) - 1)
+        else:
+            clusters[best]['engines'].add(engine)
+            clusters[best]['members'].append((engine, text, confidence))
+
+    merged = []
+    for cluster in clusters:
+        scores = defaultdict(float)
+        readings = defaultdict(list)
+        for engine, text, confidence in cluster['members']:
+            key = text.strip().casefold()
+            scores[key] += weights.get(engine, 1.0) * confidence
+            readings[key].append((engine, text, confidence))
+        winner = max(scores, key=scores.get)
+        agreeing = readings[winner]
+        x0, y0, x1, y1 = cluster['box']
+        merged.append({
+            'text': max(agreeing, key=lambda reading: reading[2])[1],
+            # Disagreeing engines lower the confidence; engines that saw nothing don't
+            'confidence': round(sum(reading[2] for reading in agreeing) / len(cluster['members']), 2),
+            'box': (int(round(x0)), int(round(y0)), int(round(x1 - x0)), int(round(y1 - y0))),
+            'engines': sorted(reading[0] for reading in agreeing)
+        })
+
+    return order_words(merged)
+
+def order_words(words):
+    """
+    Sorts words with (left, top, width, height) boxes into reading order and
+    numbers their lines. Lines are left to right, or right to left when most
+    of their text is Arabic.
+    """
+    if not words:
+        return []
+    heights = sorted(word['box'][3] for word in words)
+    tolerance = max(heights[len(heights) // 2], 1) / 2
 
-    # Extract text from multiple engines
-    text_tesseract = extract_text_tesseract(image_path, languages)
-    text_easyocr = extract_text_easyocr(image_path, languages)
-    text_paddleocr = extract_text_paddleocr(image_path, languages)
+    lines = []
+    for word in sorted(words, key=lambda word: word['box'][1] + word['box'][3] / 2):
+        center = word['box'][1] + word['box'][3] / 2
+        if lines and center - lines[-1][0] <= tolerance:
+            lines[-1][1].append(word)
+        else:
+            lines.append((center, [word]))
 
-    candidates = [text_tesseract, text_easyocr, text_paddleocr]
+    ordered = []
+    for line_number, (_, line) in enumerate(lines):
+        rtl = is_rtl(" ".join(word['text'] for word in line))
+        for word in sorted(line, key=lambda word: word['box'][0], reverse=rtl):
+            word['line'] = line_number
+            ordered.append(word)
+    return ordered
 
-    # Use majority voting to choose the most consistent text
-    final_text = majority_vote(candidates)
-    return final_text
+def words_to_text(words):
+    """Joins ordered words into text, one line per 'line' number."""
+    lines = []
+    current = None
+    for word in words:
+        if word.get('line') != current or not lines:
+            lines.append([])
+            current = word.get('line')
+        lines[-1].append(word['text'])
+    return "\n".join(" ".join(line) for line in lines)
 
 def majority_vote(text_list):
     """
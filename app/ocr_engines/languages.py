@@ -0,0 +1,50 @@
+# Language codes of each engine for the two-letter codes used throughout the app
+LANGUAGE_CODES = {
+    'en': {'tesseract': 'eng', 'easyocr': 'en', 'paddleocr': 'en'},
+    'ar': {'tesseract': 'ara', 'easyocr': 'ar', 'paddleocr': 'arabic'},
+    'fr': {'tesseract': 'fra', 'easyocr': 'fr', 'paddleocr': 'french'},
+    'de': {'tesseract': 'deu', 'easyocr': 'de', 'paddleocr': 'german'},
+    'zh': {'tesseract': 'chi_sim', 'easyocr': 'ch_sim', 'paddleocr': 'ch'},
+}
+
+# Script of each language, as named by Tesseract's orientation and script detection
+LANGUAGE_SCRIPTS = {
+    'en': 'Latin',
+    'ar': 'Arabic',
+    'fr': 'Latin',
+    'de': 'Latin',
+    'zh': 'Han',
+}
+
+# Languages written right to left
+RTL_LANGUAGES = ('ar',)
+
+def engine_languages(engine, languages):
+    """
+    Maps two-letter language codes to the codes of an engine.
+    Unknown languages fall back to English.
+
+    Args:
+        engine (str): 'tesseract', 'easyocr' or 'paddleocr'.
+        languages (list): Language codes, e.g. ['en', 'ar'].
+    Returns:
+        list: Engine language codes without duplicates, in the given order.
+    """
+    if isinstance(languages, str):
+        languages = [languages]
+    codes = []
+    for lang in languages or ['en']:
+        code = LANGUAGE_CODES.get(lang[:2].lower(), LANGUAGE_CODES['en'])[engine]
+        if code not in codes:
+            codes.append(code)
+    return codes
+
+def tesseract_lang(languages):
+    """Returns the Tesseract `lang` string for the given language codes, e.g. 'eng+ara'."""
+    return '+'.join(engine_languages('tesseract', languages))
+
+def is_rtl_language(languages):
+    """Whether a page in these languages reads right to left, i.e. all of them are RTL languages."""
+    if isinstance(languages, str):
+        languages = [languages]
+    return bool(languages) and all(lang[:2].lower() in RTL_LANGUAGES for lang in languages)
@@ -0,0 +1,113 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import settings
+from ocr_engines.languages import engine_languages, tesseract_lang
+from ocr_engines.tesseract_engine import run_tesseract_ocr
+from ocr_engines.easyocr_engine import run_easyocr
+from ocr_engines.paddleocr_engine import run_paddleocr
+from processors.layout_detection import (detect_layout, order_blocks,
+                                         TEXT_BLOCK_TYPES, TABLE_BLOCK_TYPES)
+from processors.tiling import translate_box
+
+logger = logging.getLogger(__name__)
+
+# The engines of pipeline.process_page, in the same order and with the same languages;
+# crops skip the result cache, as pipeline.process_page caches the whole page
+ENGINE_RUNNERS = {
+    'tesseract': lambda crop, languages: run_tesseract_ocr(crop, lang=tesseract_lang(languages), cache=False),
+    'easyocr': lambda crop, languages: run_easyocr(crop, languages=engine_languages('easyocr', languages),
+                                                   cache=False),
+    'paddleocr': lambda crop, languages: run_paddleocr(crop, languages='en', cache=False),
+}
+
+def _run_engine(engine, crop, languages):
+    """Word results of one engine on a crop, tagged with the engine like those of pipeline.process_page"""
+    return [dict(word, engine=engine) for word in ENGINE_RUNNERS[engine](crop, languages)]
+
+def run_layout_ocr(image, engines=None, workers=None, padding=8, rtl=False, blocks=None, languages=None):
+    """
+    Runs OCR only where the layout model found text.
+
+    Figures and blank areas are never sent to the engines. Text blocks
+    (text, titles, lists) are cut out and recognized as separate crops on
+    a thread pool; tables go to Tesseract alone and their words are grouped
+    into rows. Results come back in reading order.
+
+    Args:
+        image: Preprocessed page as a NumPy array (grayscale or BGR).
+        engines (list): Engines run on every text block (defaults to all of ENGINE_RUNNERS).
+        workers (int): Number of blocks recognized in parallel (defaults to settings.LAYOUT_WORKERS).
+        padding (int): Pixels added around every block before cropping.
+        rtl (bool): Read columns right to left.
+        blocks (list): Layout blocks, if already detected (see `detect_layout`).
+        languages (list): Two-letter codes of the page's languages (defaults to English and Arabic).
+
+    Returns:
+        list: Word results (text, confidence, box in page coordinates, 'engine')
+        with the 'block' index, its 'block_type' and a 'line' key (the block, or
+        (block, row) for tables), in reading order.
+    """
+    engines = list(engines or ENGINE_RUNNERS)
+    languages = languages or ['en', 'ar']
+    workers = workers or settings.LAYOUT_WORKERS
+    if blocks is None:
+        blocks = detect_layout(image)
+
+    if not blocks:
+        # Nothing detected at all is more likely a miss than an empty page
+        logger.info("No layout blocks detected, recognizing the whole page")
+        return [dict(word, block=0, block_type='Page', line=0)
+                for engine in engines for word in _run_engine(engine, image, languages)]
+
+    readable = [block for block in order_blocks(blocks, image.shape[1], rtl=rtl)
+                if block['type'] in TEXT_BLOCK_TYPES + TABLE_BLOCK_TYPES]
+    logger.debug(f"{len(readable)} of {len(blocks)} layout blocks contain text")
+
+    def recognize(indexed_block):
+        index, block = indexed_block
+        crop, offset = _crop(image, block['box'], padding)
+        if block['type'] in TABLE_BLOCK_TYPES:
+            words = [dict(word, line=(index, word['row'])) for word in _recognize_table(crop, languages)]
+        else:
+            words = [dict(word, line=index) for engine in engines for word in _run_engine(engine, crop, languages)]
+        return [dict(word, box=translate_box(word['box'], *offset), block=index, block_type=block['type'])
+                for word in words]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(recognize, enumerate(readable)))
+    return [word for block_words in results for word in block_words]
+
+def _crop(image, box, padding):
+    x1, y1, x2, y2 = box
+    height, width = image.shape[:2]
+    x1, y1 = max(0, x1 - padding), max(0, y1 - padding)
+    x2, y2 = min(width, x2 + padding), min(height, y2 + padding)
+    return image[y1:y2, x1:x2], (x1, y1)
+
+def _recognize_table(crop, languages, row_tolerance=0.6):
+    """
+    Recognizes a table with Tesseract and groups its words into rows, so each
+    table row ends up on its own line instead of being merged with its neighbours.
+    """
+    words = _run_engine('tesseract', crop, languages)
+    if not words:
+        return []
+    heights = [word['box'][3] for word in words]
+    tolerance = row_tolerance * float(np.median(heights))
+
+    rows = []
+    for word in sorted(words, key=lambda w: w['box'][1] + w['box'][3] / 2):
+        center = word['box'][1] + word['box'][3] / 2
+        if rows and center - rows[-1]['center'] <= tolerance:
+            rows[-1]['words'].append(word)
+        else:
+            rows.append({'center': center, 'words': [word]})
+
+    table_words = []
+    for row_index, row in enumerate(rows):
+        for word in sorted(row['words'], key=lambda w: w['box'][0]):
+            table_words.append(dict(word, row=row_index))
+    return table_words
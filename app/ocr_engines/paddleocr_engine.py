@@ -1,28 +1,44 @@
-from paddleocr import PaddleOCR
 import cv2
+from config import settings
+from utils.result_cache import result_cache
+from ocr_engines.engine_pool import get_engine
 
-def run_paddleocr(image, languages='en'):
+# Options of the one PaddleOCR instance per language shared by every caller; the
+# angle classifier is loaded once and only used where a caller asks for `cls=True`,
+# and the recognizer batch size only matters to batched recognition (batch_engine)
+PADDLE_OPTIONS = {'use_angle_cls': True, 'show_log': False, 'rec_batch_num': settings.RECOGNITION_BATCH_SIZE}
+
+def get_paddleocr(lang='en'):
+    """The shared PaddleOCR instance for a PaddleOCR language code (loaded on first use)."""
+    return get_engine('paddleocr', lang, **PADDLE_OPTIONS)
+
+def run_paddleocr(image, languages='en', cache=True):
     """
     Runs PaddleOCR on the given image and returns results.
     Each result contains:
     - text
     - confidence score
     - bounding box coordinates
+    `cache=False` bypasses the result cache, as in run_tesseract_ocr.
     """
-    # Initialize the PaddleOCR reader
-    ocr = PaddleOCR(use_angle_cls=True, lang=languages, show_log=False)
-
     # Ensure the input image is in the correct format
     if isinstance(image, str):
         image = cv2.imread(image)
         if image is None:
             raise ValueError(f"Could not load image at {image}")
 
-    # Convert to RGB
-    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    # Return the stored result if this exact image was OCR'd before
+    if cache:
+        cache_key = result_cache.make_key(image, 'paddleocr', languages, {'use_angle_cls': True})
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Get the shared PaddleOCR reader (loaded once per process)
+    ocr = get_paddleocr(languages)
 
-    # Run PaddleOCR
-    results_raw = ocr.ocr(rgb, cls=True)
+    # PaddleOCR takes BGR or single-channel arrays directly, no conversion needed
+    results_raw = ocr.ocr(image, cls=True)
 
     results = []
     for line in results_raw:
@@ -36,4 +52,6 @@ def run_paddleocr(image, languages='en'):
                 }
                 results.append(result)
 
+    if cache:
+        result_cache.put(cache_key, results)
     return results
@@ -0,0 +1,130 @@
+import io
+import shlex
+import subprocess
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from config import settings
+
+# Columns of Tesseract's TSV output, as returned by pytesseract.image_to_data
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+
+def _to_pil(image):
+    """PIL image of a NumPy page (grayscale or BGR) or of a PIL image, in a mode TIFF can hold."""
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(image)
+    if image.mode not in ('1', 'L', 'RGB'):
+        return image.convert('RGB')
+    return image
+
+def _encode_tiff(images, dpi=None):
+    """Encodes pages as one uncompressed multi-page TIFF in memory."""
+    pages = [_to_pil(image) for image in images]
+    buffer = io.BytesIO()
+    options = {'dpi': dpi} if dpi else {}
+    pages[0].save(buffer, format='TIFF', save_all=True, append_images=pages[1:], **options)
+    return buffer.getvalue()
+
+def _parse_tsv(tsv, page_count):
+    """Splits Tesseract's TSV output into one pytesseract-style data dict per page."""
+    pages = [{column: [] for column in TSV_COLUMNS} for _ in range(page_count)]
+    lines = tsv.splitlines()
+    for line in lines[1:]:
+        fields = line.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1:
+            continue
+        # Rows without text may end before the text column
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        page = pages[int(fields[1]) - 1]
+        for column, value in zip(TSV_COLUMNS[:-2], fields):
+            page[column].append(int(value))
+        page['conf'].append(float(fields[10]))
+        page['text'].append(fields[11])
+    return pages
+
+def image_to_data_batch(images, lang='eng', config='', dpi=None, timeout=None):
+    """
+    Runs one Tesseract process over many pages.
+
+    The pages are piped to `tesseract stdin stdout ... tsv` as a single
+    multi-page TIFF, so the language data is loaded once for the whole
+    batch and nothing is written to disk. Equivalent to calling
+    `pytesseract.image_to_data(image, output_type=Output.DICT)` on each page.
+
+    Args:
+        images (list): Pages as PIL images or NumPy arrays (grayscale or BGR).
+        lang (str): Tesseract languages, e.g. 'eng+ara'.
+        config (str): Extra command line options, e.g. '--oem 3 --psm 6'.
+        dpi (tuple): Resolution of the pages, if known.
+        timeout (float): Seconds before the process is killed (defaults to
+            settings.ENGINE_TIMEOUTS['tesseract'] per page).
+    Returns:
+        list: One data dict (level, page_num, ..., conf, text) per page.
+    """
+    import pytesseract
+
+    if not images:
+        return []
+    command = [pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', lang,
+               *shlex.split(config), 'tsv']
+    timeout = timeout or settings.ENGINE_TIMEOUTS['tesseract'] * len(images)
+    try:
+        process = subprocess.run(command, input=_encode_tiff(images, dpi), capture_output=True, timeout=timeout)
+    except FileNotFoundError:
+        raise pytesseract.TesseractNotFoundError()
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"Tesseract timed out after {timeout} seconds on {len(images)} pages")
+    if process.returncode:
+        raise pytesseract.TesseractError(process.returncode, process.stderr.decode('utf-8', 'replace').strip())
+    return _parse_tsv(process.stdout.decode('utf-8'), len(images))
+
+def _page_dpi(image):
+    dpi = getattr(image, 'info', {}).get('dpi')
+    return tuple(int(round(value)) for value in dpi) if dpi else None
+
+def iter_data_batches(images, lang='eng', config='', batch_pages=None, page_timeout=None):
+    """
+    Yields the Tesseract data dict of every page, OCRing them `batch_pages`
+    at a time (one process per batch and per resolution within it).
+
+    Args:
+        images (iterable): Pages as PIL images or NumPy arrays.
+        lang (str): Tesseract languages, e.g. 'eng+ara'.
+        config (str): Extra command line options.
+        batch_pages (int): Pages per process (defaults to settings.TESSERACT_BATCH_PAGES).
+        page_timeout (float): Seconds per page before a process is killed
+            (defaults to settings.ENGINE_TIMEOUTS['tesseract']).
+    """
+    batch_pages = batch_pages or settings.TESSERACT_BATCH_PAGES
+    images = list(images)
+    for start in range(0, len(images), batch_pages):
+        chunk = images[start:start + batch_pages]
+        data = [None] * len(chunk)
+        # A TIFF carries one resolution for all of its pages
+        groups = {}
+        for index, image in enumerate(chunk):
+            groups.setdefault(_page_dpi(image), []).append(index)
+        for dpi, indices in groups.items():
+            timeout = page_timeout * len(indices) if page_timeout else None
+            for index, page_data in zip(indices, image_to_data_batch([chunk[i] for i in indices], lang, config,
+                                                                     dpi=dpi, timeout=timeout)):
+                data[index] = page_data
+        yield from data
+
+def words_from_data(data):
+    """Word results (text, confidence, box) of a Tesseract data dict."""
+    return [
+        {
+            'text': text,
+            'confidence': int(conf),
+            'box': (left, top, width, height)
+        }
+        for text, conf, left, top, width, height in zip(data['text'], data['conf'], data['left'],
+                                                         data['top'], data['width'], data['height'])
+        if text.strip() != ""
+    ]
@@ -1,13 +1,16 @@
 import pytesseract
 import cv2
+from utils.result_cache import result_cache
 
-def run_tesseract_ocr(image, lang='eng+ara'):
+def run_tesseract_ocr(image, lang='eng+ara', cache=True):
     """
     Runs Tesseract OCR on the given image and returns results.
     Each result contains:
     - text
     - confidence score
     - bounding box coordinates
+    Results are kept in the result cache unless `cache` is off, as it is for the
+    crops, tiles and regions of a page that is cached as a whole.
     """
     # Ensure the input image is in the correct format
     if isinstance(image, str):
@@ -15,12 +18,20 @@ def run_tesseract_ocr(image, lang='eng+ara'):
         if image is None:
             raise ValueError(f"Could not load image at {image}")
 
-    # Convert to RGB
-    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    # Return the stored result if this exact image was OCR'd before
+    if cache:
+        cache_key = result_cache.make_key(image, 'tesseract', lang, {'config': '--oem 3 --psm 6'})
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Tesseract reads arrays as RGB; single-channel images are used as they are
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
     # Run Tesseract OCR
     data = pytesseract.image_to_data(
-        rgb,
+        image,
         output_type=pytesseract.Output.DICT,
         lang=lang,
         config='--oem 3 --psm 6'
@@ -44,4 +55,6 @@ def run_tesseract_ocr(image, lang='eng+ara'):
             }
             results.append(result)
 
+    if cache:
+        result_cache.put(cache_key, results)
     return results
@@ -1,49 +1,310 @@
+import time
+
+_IMPORT_START = time.perf_counter()
+
 import os
 import io
+import itertools
+import collections
+import importlib
+import threading
 import numpy as np
 from PIL import Image
-import pdf2image
-import pytesseract
-import easyocr
-import requests
-from paddleocr import PaddleOCR
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+from config import settings
+from ocr_engines.engine_pool import get_engine
+from page_scheduler import PageScheduler
+from utils.result_cache import result_cache
+from utils.checkpoint import PageCheckpoint, document_key
+from utils.word_table import WordTable
+from utils.instrumentation import (Tracer, current_tracer, measure_call, profiled, span,
+                                   stage_metrics, use_tracer)
+
+# Time spent importing this module and its dependencies, reported by startup_report()
+IMPORT_TIME = time.perf_counter() - _IMPORT_START
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ENGINE_METHODS = {
+    'easyocr': '_extract_with_easyocr',
+    'paddleocr': '_extract_with_paddleocr',
+    'tesseract': '_extract_with_tesseract',
+}
+
+ENGINE_LABELS = {
+    'easyocr': 'EasyOCR',
+    'paddleocr': 'PaddleOCR',
+    'tesseract': 'Tesseract',
+}
+
+# Engine libraries are only imported when an engine is first needed
+ENGINE_MODULES = {
+    'easyocr': 'easyocr',
+    'paddleocr': 'paddleocr',
+    'tesseract': 'pytesseract',
+}
+
+
+def _load_tesseract():
+    import pytesseract
+    # Raises if the tesseract binary is missing
+    return pytesseract.get_tesseract_version()
+
+
+def _load_paddleocr():
+    from ocr_engines.paddleocr_engine import get_paddleocr
+    return get_paddleocr('en')
+
+
+# Languages of the EasyOCR reader loaded at start-up
+EASYOCR_DEFAULT_LANGUAGES = ['en', 'ar']
+
+ENGINE_LOADERS = {
+    # EasyOCR with limited languages to reduce memory usage
+    'easyocr': lambda: get_engine('easyocr', EASYOCR_DEFAULT_LANGUAGES, gpu=False),
+    # The PaddleOCR instance shared with the pipeline and the cascade (one model per language)
+    'paddleocr': _load_paddleocr,
+    'tesseract': _load_tesseract,
+}
+
+
+_END = object()
+
+# Settings that change a page's result beyond the processor's own options; all of them are part of its cache key
+RESULT_SETTINGS = ('LANGUAGE_DETECTION', 'SCRIPT_MIN_CONFIDENCE', 'SCRIPT_DETECTION_BANDS', 'CASCADE_CONFIDENCE_LEVEL',
+                   'TILE_MAX_PIXELS', 'TILE_SIZE', 'TILE_OVERLAP', 'TILE_MEMORY_BUDGET', 'TILE_BYTES_PER_PIXEL',
+                   'BATCH_RECOGNITION')
+
+# Seconds between checks for engines that have started running, whose timeouts then start
+ENGINE_POLL_INTERVAL = 0.05
+
+
+def _traced_iter(iterator: Iterator, tracer: Tracer, name: str, page_numbers: Iterable[int]) -> Iterator:
+    """Yield from `iterator`, recording the time spent waiting for each item as a span"""
+    for page_number in page_numbers:
+        item, measured = measure_call(next, iterator, _END)
+        if item is _END:
+            return
+        tracer.record(name, page=page_number, **measured)
+        yield item
+
+
+def _record_dpi(images: Iterator[Image.Image], dpis: collections.deque) -> Iterator[Image.Image]:
+    """Yield from `images`, appending the horizontal DPI of each image to `dpis`"""
+    for image in images:
+        dpi = image.info.get('dpi')
+        dpis.append(int(round(dpi[0])) if dpi else None)
+        yield image
+
+
+def _growing_chunks(iterator: Iterator, max_size: int) -> Iterator[List]:
+    """Lists of the next 1, 2, 4... items of `iterator`, up to `max_size` long, so the first item is not held back"""
+    size = 1
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+        size = min(size * 2, max(max_size, 1))
+
+
+def _engine_array(image: Image.Image) -> np.ndarray:
+    """Three channel array of a page, as EasyOCR and PaddleOCR are given it"""
+    img_cv = np.array(image)
+    if len(img_cv.shape) == 2:  # Grayscale
+        img_cv = np.stack((img_cv,)*3, axis=-1)
+    elif img_cv.shape[2] == 4:  # RGBA
+        img_cv = img_cv[:, :, :3]
+    return img_cv
+
+
+def _run_tesseract_batch(images: List[Image.Image], lang: str, page_timeout: float) -> Tuple[List[Dict], Dict]:
+    """Tesseract data of a batch of pages from one process, with the time the batch took"""
+    from ocr_engines.tesseract_batch import iter_data_batches
+
+    def read():
+        return list(iter_data_batches(images, lang, batch_pages=len(images), page_timeout=page_timeout))
+    return measure_call(read)
+
+
+def _blank_page_result() -> Dict:
+    """Result of a page skipped as blank"""
+    return {'text': '', 'confidence': 0.0, 'engine_used': 'triage', 'words': [], 'all_engines': [],
+            'source': 'blank'}
+
+
+_worker_processor = None
+
+
+def _get_worker_processor(execution_mode: str = 'sequential', warm_up: bool = True) -> 'OCRProcessor':
+    """
+    Return the OCRProcessor owned by the current worker process, creating it once.
+    With `warm_up` every engine is loaded right away; otherwise each one is
+    loaded when the process first runs it.
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = OCRProcessor(execution_mode=execution_mode, warm_up=False)
+        if warm_up:
+            _worker_processor.warm_up(background=False)
+    return _worker_processor
+
+
+def _init_engine_worker(engine: str):
+    """Initializer of an engine's pool process: loads that engine, and only that one"""
+    _get_worker_processor(warm_up=False)._load_engine(engine)
+
+
+def _extract_in_worker(engine: str, *args):
+    """Run one engine inside its pool process (see `_init_engine_worker`)"""
+    return measure_call(getattr(_get_worker_processor(warm_up=False), ENGINE_METHODS[engine]), *args)
+
+
+def _process_page_in_worker(image: Image.Image, languages: List[str], kwargs: Dict) -> Dict:
+    """Process one page inside a page worker, reusing that process's warm OCRProcessor"""
+    return _get_worker_processor(settings.PAGE_WORKER_EXECUTION_MODE)._process_image(image, languages, **kwargs)
+
+
 class OCRProcessor:
-    def __init__(self):
-        """Initialize OCR processors with fallback options"""
-        self.easyocr_reader = None
-        self.paddle_ocr = None
-        self.use_native_tesseract = False
-        
-        try:
-            # Initialize EasyOCR with limited languages to reduce memory usage
-            self.easyocr_reader = easyocr.Reader(['en', 'ar'])
-            logger.info("EasyOCR initialized successfully")
-        except Exception as e:
-            logger.warning(f"Failed to initialize EasyOCR: {str(e)}")
-        
-        try:
-            # Initialize PaddleOCR with reduced capabilities
-            self.paddle_ocr = PaddleOCR(use_angle_cls=False, lang='en', show_log=False)
-            logger.info("PaddleOCR initialized successfully")
-        except Exception as e:
-            logger.warning(f"Failed to initialize PaddleOCR: {str(e)}")
-        
-        # Check if native Tesseract is available
-        try:
-            pytesseract.get_tesseract_version()
-            self.use_native_tesseract = True
-            logger.info("Native Tesseract is available")
-        except:
-            logger.warning("Native Tesseract not available - using Tesseract fallback")
+    def __init__(self, execution_mode: Optional[str] = None, max_workers: Optional[int] = None,
+                 engine_timeouts: Optional[Dict[str, float]] = None, page_workers: Optional[int] = None,
+                 max_pages_in_flight: Optional[int] = None, mode: Optional[str] = None,
+                 cascade_threshold=None, engines: Optional[List[str]] = None,
+                 warm_up: Optional[bool] = None):
+        """
+        Initialize OCR processors with fallback options
+
+        Args:
+            execution_mode: How the engines of a page are run: 'sequential', 'thread' or 'process'
+                (defaults to settings.ENGINE_EXECUTION_MODE)
+            max_workers: Size of the thread pool used for the engines (process mode runs
+                each engine in a process of its own)
+            engine_timeouts: Per-engine timeout in seconds, overriding settings.ENGINE_TIMEOUTS
+            page_workers: Number of worker processes pages are spread over (defaults to settings.PAGE_WORKERS)
+            max_pages_in_flight: Bound on pages submitted to the workers but not yet collected
+            mode: 'ensemble' runs every engine on every page, 'cascade' runs Tesseract first and only
+                sends low confidence regions to the other engines (defaults to settings.OCR_MODE)
+            cascade_threshold: Confidence (0-100) or settings.CONFIDENCE_THRESHOLDS level gating the cascade
+            engines: Engines to use (defaults to settings.OCR_ENGINES); each one is only imported
+                and loaded when first needed
+            warm_up: Load the engines on a background thread right away (defaults to settings.WARM_UP)
+        """
+        self.engines = [engine for engine in ENGINE_METHODS if engine in (engines or settings.OCR_ENGINES)]
+        unknown = set(engines or settings.OCR_ENGINES) - set(ENGINE_METHODS)
+        if unknown:
+            raise ValueError(f"Unknown OCR engines: {', '.join(sorted(unknown))}")
+        self._engines = {}
+        self._engine_errors = {}
+        self._engine_locks = {engine: threading.Lock() for engine in ENGINE_METHODS}
+        self._startup = {}
+        self._warm_up_thread = None
+        # Recent pages of each tenant, for duplicate detection across documents
+        # (settings.TRIAGE_CROSS_DOCUMENT); otherwise every document gets its own
+        self._page_indexes = collections.OrderedDict()
+        self._page_indexes_lock = threading.Lock()
 
-    def process_file(self, file_stream, file_extension: str, languages: List[str] = ['en'], **kwargs) -> Dict:
+        self.mode = mode or settings.OCR_MODE
+        if self.mode not in ('ensemble', 'cascade'):
+            raise ValueError(f"Unknown OCR mode: {self.mode}")
+        self.cascade_threshold = cascade_threshold
+
+        self.execution_mode = execution_mode or settings.ENGINE_EXECUTION_MODE
+        if self.execution_mode not in ('sequential', 'thread', 'process'):
+            raise ValueError(f"Unknown execution mode: {self.execution_mode}")
+        self.max_workers = max_workers or settings.ENGINE_WORKERS
+        self.engine_timeouts = dict(settings.ENGINE_TIMEOUTS)
+        self.engine_timeouts.update(engine_timeouts or {})
+        # Engine pools: one shared thread pool, or one single-process pool per engine
+        self._executors = {}
+        self._executor_lock = threading.Lock()
+        self.page_workers = page_workers or settings.PAGE_WORKERS
+        self.max_pages_in_flight = max_pages_in_flight
+        self._page_scheduler = None
+
+        if settings.WARM_UP if warm_up is None else warm_up:
+            self.warm_up(background=True)
+
+    @property
+    def easyocr_reader(self):
+        return self._load_engine('easyocr')
+
+    @property
+    def paddle_ocr(self):
+        return self._load_engine('paddleocr')
+
+    @property
+    def use_native_tesseract(self) -> bool:
+        return self._load_engine('tesseract') is not None
+
+    def _load_engine(self, engine: str):
+        """Import and load `engine` on first use; returns None if it is not configured or failed to load"""
+        if engine not in self.engines or engine in self._engine_errors:
+            return None
+        if engine in self._engines:
+            return self._engines[engine]
+
+        with self._engine_locks[engine]:
+            if engine not in self._engines and engine not in self._engine_errors:
+                report = {}
+                try:
+                    start = time.perf_counter()
+                    importlib.import_module(ENGINE_MODULES[engine])
+                    report['import_time'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    self._engines[engine] = ENGINE_LOADERS[engine]()
+                    report['load_time'] = time.perf_counter() - start
+                    report['status'] = 'loaded'
+                    logger.info(f"{ENGINE_LABELS[engine]} initialized successfully in "
+                                f"{report['import_time'] + report['load_time']:.2f}s")
+                except Exception as e:
+                    report['status'] = 'failed'
+                    report['error'] = str(e)
+                    self._engine_errors[engine] = str(e)
+                    logger.warning(f"Failed to initialize {ENGINE_LABELS[engine]}: {str(e)}")
+                self._startup[engine] = report
+        return self._engines.get(engine)
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load every configured engine now instead of on the first page.
+
+        With `background` the engines load on a daemon thread and the thread is
+        returned; pages submitted meanwhile wait only for the engines they need.
+        """
+        def load_all():
+            # The merge/cascade code pulls in OpenCV, which is worth loading early too
+            importlib.import_module('ocr_engines.ensemble_ocr')
+            for engine in self.engines:
+                self._load_engine(engine)
+
+        if not background:
+            load_all()
+            return None
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=load_all, name='ocr-warm-up', daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def startup_report(self) -> Dict:
+        """
+        Cold start costs: the import time of this module and, per engine, the
+        library import time, the model load time and whether it loaded.
+        Engines that have not been needed yet are reported as 'not loaded'.
+        """
+        return {
+            'import_time': IMPORT_TIME,
+            'engines': {
+                engine: dict(self._startup.get(engine, {'status': 'not loaded'}))
+                for engine in self.engines
+            }
+        }
+
+    def process_file(self, file_stream, file_extension: str, languages: List[str] = ['en'],
+                     profile_path: Optional[str] = None, trace_path: Optional[str] = None, **kwargs) -> Dict:
         """
         Process uploaded file and return OCR results
         
@@ -51,101 +312,495 @@ class OCRProcessor:
             file_stream: Uploaded file stream
             file_extension: File extension (pdf, jpg, png)
             languages: List of languages to use for OCR
+            profile_path: If set, run this request under cProfile and dump the stats there
+            trace_path: JSONL file the request's spans are appended to (defaults to settings.TRACE_FILE)
             
         Returns:
             Dictionary containing:
             - text: Combined OCR text
             - confidence: Average confidence score
-            - words: List of words with confidence scores
+            - words: WordTable of every page's words with confidence scores
             - languages: Detected languages
+            - timings: Wall time, CPU time and RSS delta per stage, page and engine
+            - resumed_pages: Number of pages reloaded from an earlier, interrupted run
+
+        With settings.CHECKPOINT_ENABLED every finished page is checkpointed
+        (see `checkpoint_for`); if the request fails, a retry with the same
+        document and options continues from the first unfinished page.
         """
         try:
-            # Convert PDF to images or load single image
-            if file_extension.lower() == 'pdf':
-                images = self._convert_pdf_to_images(file_stream)
-            else:
-                images = [Image.open(file_stream)]
-            
-            results = []
-            for img in images:
-                results.append(self._process_image(img, languages, **kwargs))
-            
-            return self._combine_results(results)
+            tracer = Tracer()
+            data = file_stream.read()
+            start_page = kwargs.pop('start_page', 1)
+            checkpoint = self.checkpoint_for(data, file_extension, languages, **kwargs)
+            page_results, next_page = checkpoint.resume(start_page) if checkpoint else ([], start_page)
+            resumed_pages = len(page_results)
+            if resumed_pages:
+                logger.info(f"Resuming at page {next_page}, {resumed_pages} pages reloaded from the checkpoint")
+
+            with profiled(profile_path):
+                for page_result in self.iter_pages(io.BytesIO(data), file_extension, languages, tracer=tracer,
+                                                   start_page=next_page, **kwargs):
+                    if checkpoint is not None:
+                        checkpoint.save_page(page_result)
+                    page_results.append(page_result)
+                with tracer.span('combine'):
+                    result = self._combine_results(page_results)
+
+            result['resumed_pages'] = resumed_pages
+            result['timings'] = tracer.report()
+            stage_metrics.observe(tracer.spans)
+            trace_path = trace_path or settings.TRACE_FILE
+            if trace_path:
+                tracer.write_jsonl(trace_path)
+            if checkpoint is not None:
+                checkpoint.clear()
+            return result
             
         except Exception as e:
             logger.error(f"Error processing file: {str(e)}")
             raise
 
-    def _convert_pdf_to_images(self, file_stream) -> List[Image.Image]:
-        """Convert PDF to list of PIL images"""
+    def checkpoint_for(self, data: bytes, file_extension: str, languages: List[str] = ['en'],
+                       **kwargs) -> Optional[PageCheckpoint]:
+        """
+        The page checkpoint `process_file` keeps for a document and these options,
+        or None if checkpointing is disabled. `load_pages()` on it returns the
+        pages finished so far, also while the document is still being processed.
+        """
+        if not settings.CHECKPOINT_ENABLED:
+            return None
+        options = {'extension': file_extension.lower(), 'languages': languages, 'engines': self.engines,
+                   'mode': self.mode, 'cascade_threshold': self.cascade_threshold, **kwargs}
+        return PageCheckpoint(document_key(data, options))
+
+    def _page_index_for(self, tenant: Optional[str]):
+        """
+        The duplicate index of a document: a new one, or with
+        settings.TRIAGE_CROSS_DOCUMENT the one shared by the tenant's documents.
+        Pages are never matched across tenants.
+        """
+        from processors.page_triage import PageIndex
+        if not settings.TRIAGE_CROSS_DOCUMENT or tenant is None:
+            return PageIndex()
+        with self._page_indexes_lock:
+            index = self._page_indexes.pop(tenant, None) or PageIndex()
+            self._page_indexes[tenant] = index
+            while len(self._page_indexes) > settings.TRIAGE_MAX_TENANTS:
+                self._page_indexes.popitem(last=False)
+        return index
+
+    def iter_pages(self, file_stream, file_extension: str, languages: List[str] = ['en'],
+                   tracer: Optional[Tracer] = None, start_page: int = 1, tenant: Optional[str] = None,
+                   **kwargs) -> Iterator[Dict]:
+        """
+        Process uploaded file page by page.
+
+        Page results are yielded in page order as soon as they are ready; PDF
+        pages are rendered while earlier pages are being OCR'd. Each result is
+        the page dict of `_process_image` plus its 1-based 'page' number, the
+        'dpi' it was rendered at (None if unknown) and its 'source': 'ocr',
+        'text_layer' for born-digital PDF pages whose embedded text is
+        trustworthy, which are never rendered or OCR'd, 'blank' for pages
+        without ink, or 'duplicate' for repeats of a recent page (its
+        'duplicate_of' page in this document), which reuse that page's result.
+        Duplicates are only looked up in the same document unless
+        settings.TRIAGE_CROSS_DOCUMENT is set and a `tenant` is given.
+        When a tracer is given, rasterization and page spans are moved into it;
+        otherwise each page keeps its own spans under 'spans'. Pages before
+        `start_page` are neither rendered nor OCR'd.
+        """
+        text_pages = {}
+        ocr_pages = None
+        # Convert PDF to images or load single image
+        if file_extension.lower() == 'pdf':
+            pdf_bytes = file_stream.read()
+            if settings.TEXT_LAYER_ENABLED:
+                text_pages, ocr_pages = self._read_text_layer(pdf_bytes, start_page, tracer)
+            images = self._iter_pdf_pages(io.BytesIO(pdf_bytes), first_page=start_page, pages=ocr_pages)
+        elif start_page <= 1:
+            images = iter([Image.open(file_stream)])
+        else:
+            images = iter([])
+
+        def page_numbers():
+            return iter(ocr_pages) if ocr_pages is not None else itertools.count(start_page)
+
+        if tracer is not None:
+            images = _traced_iter(images, tracer, 'rasterize', page_numbers())
+        # Images are consumed in page order, ahead of their results
+        dpis = collections.deque()
+        images = _record_dpi(images, dpis)
+        # Blank and repeated pages never reach the engines
+        from processors.page_triage import merge_triaged, triage_pages
+        plan = collections.deque()
+        owner = object()
+        images = triage_pages(images, page_numbers(), plan, owner=owner,
+                              index=self._page_index_for(tenant) if settings.TRIAGE_ENABLED else None)
+
+        if self.page_workers > 1:
+            # Pages run in parallel worker processes and come back in page order
+            results = self._get_page_scheduler().map(images, languages, kwargs)
+        else:
+            if self._batches_recognition():
+                # Text regions of several pages go through the recognizers together
+                images = self._prefetch_recognition(images, languages, kwargs, tracer)
+            if self._batches_tesseract():
+                # Tesseract reads a few pages per process instead of one process per page
+                images = self._prefetch_tesseract(images, languages, kwargs)
+            results = (self._process_image(img, languages, **kwargs) for img in images)
+
+        def duplicate(entry: Dict) -> Dict:
+            # Pages matched in an earlier document have no page number in this one
+            return dict(entry['result'], source='duplicate',
+                        duplicate_of=entry['page'] if entry['owner'] is owner else None)
+
+        pending = sorted(text_pages)
+        for page_number, result in merge_triaged(results, plan, _blank_page_result, duplicate):
+            while pending and pending[0] < page_number:
+                yield self._finish_page(text_pages.pop(pending.pop(0)), tracer)
+            result['page'] = page_number
+            result['dpi'] = dpis.popleft()
+            result.setdefault('source', 'ocr')
+            yield self._finish_page(result, tracer)
+        for page_number in pending:
+            yield self._finish_page(text_pages[page_number], tracer)
+
+    @staticmethod
+    def _finish_page(result: Dict, tracer: Optional[Tracer]) -> Dict:
+        """Tag a page's spans with its page number and move them into the tracer, if any"""
+        spans = [dict(page_span, page=result['page']) for page_span in result.pop('spans', [])]
+        if tracer is not None:
+            tracer.extend(spans)
+        else:
+            result['spans'] = spans
+        return result
+
+    def _read_text_layer(self, pdf_bytes: bytes, start_page: int,
+                         tracer: Optional[Tracer]) -> Tuple[Dict[int, Dict], Optional[List[int]]]:
+        """
+        Classify the PDF's embedded text layer page by page.
+
+        Returns the page results of the pages whose text layer can be used
+        as is, keyed by page number, and the page numbers that still need
+        OCR (None when the text layer could not be read, i.e. every page).
+        """
+        from processors.text_layer import classify_pdf, text_layer_result
+        pages, measured = measure_call(classify_pdf, pdf_bytes, first_page=start_page)
+        if tracer is not None:
+            tracer.record('text_layer', **measured)
+        if pages is None:
+            return {}, None
+
+        text_pages = {}
+        for page in pages:
+            if page['trusted']:
+                text_pages[page['page']] = dict(text_layer_result(page), page=page['page'])
+            else:
+                logger.debug(f"Page {page['page']} needs OCR: {page['reason']}")
+        return text_pages, [page['page'] for page in pages if not page['trusted']]
+
+    def _iter_pdf_pages(self, file_stream, first_page: int = 1,
+                        pages: Optional[List[int]] = None) -> Iterator[Image.Image]:
+        """Render PDF pages in small windows, yielding each PIL image as soon as it is ready"""
+        from processors.pdf_processor import iter_pdf_pages, pdf_dpi
         try:
             # Read PDF content
             pdf_bytes = file_stream.read()
             
-            # Convert each page to image
-            images = pdf2image.convert_from_bytes(
+            yield from iter_pdf_pages(
                 pdf_bytes,
-                dpi=300,
+                dpi=pdf_dpi(),
+                first_page=first_page,
+                pages=pages,
                 fmt='jpeg',
                 thread_count=2
             )
-            return images
         except Exception as e:
             logger.error(f"PDF conversion failed: {str(e)}")
             raise
 
+    def _batches_tesseract(self) -> bool:
+        """Whether Tesseract reads batches of pages in one process instead of one page per process"""
+        return (settings.TESSERACT_BATCH_PAGES > 1 and self.mode == 'ensemble'
+                and 'tesseract' in self.engines and 'tesseract' not in self._engine_errors)
+
+    def _prefetch_tesseract(self, images: Iterator[Image.Image], languages: List[str],
+                            kwargs: Dict) -> Iterator[Image.Image]:
+        """
+        Yield the images, handing them to Tesseract a batch at a time first
+        (see ocr_engines.tesseract_batch). Batches start at a single page, so the
+        first result is not delayed, and double up to settings.TESSERACT_BATCH_PAGES.
+        Each batch runs on the engine pool while the pages' other engines run, and
+        its future is attached to every page of it for `_ocr_image` to pick up;
+        cached and oversized pages are left to the per-page path.
+        """
+        from ocr_engines.languages import tesseract_lang
+        for chunk in _growing_chunks(images, settings.TESSERACT_BATCH_PAGES):
+            groups = {}
+            for image, page_languages in self._pages_to_prefetch(chunk, languages, kwargs):
+                groups.setdefault(tesseract_lang(page_languages), []).append(image)
+
+            for lang, group in groups.items():
+                args = (group, lang, self._engine_timeout('tesseract'))
+                if self.execution_mode == 'sequential':
+                    future = Future()
+                    try:
+                        future.set_result(_run_tesseract_batch(*args))
+                    except Exception as e:
+                        future.set_exception(e)
+                else:
+                    future = self._get_executor('tesseract').submit(_run_tesseract_batch, *args)
+                for index, image in enumerate(group):
+                    image.info['tesseract_batch'] = (lang, future, index)
+            yield from chunk
+
+    def _pages_to_prefetch(self, chunk: List[Image.Image], languages: List[str],
+                           kwargs: Dict) -> List[Tuple[Image.Image, List[str]]]:
+        """The pages of `chunk` the per-page path will OCR as a whole, with their languages"""
+        pages = []
+        for image in chunk:
+            if (image.width * image.height > settings.TILE_MAX_PIXELS
+                    or result_cache.contains(self._page_cache_key(image, languages, kwargs))):
+                continue
+            page_languages = image.info.get('ocr_languages', languages)
+            if settings.LANGUAGE_DETECTION and 'ocr_languages' not in image.info:
+                # Routed here so each batch only loads the models its pages need
+                from processors.language_detection import route_languages
+                page_languages = image.info['ocr_languages'] = route_languages(image, languages)
+            pages.append((image, page_languages))
+        return pages
+
+    def _batches_recognition(self) -> List[str]:
+        """Engines whose text regions are recognized a batch of pages at a time"""
+        if not settings.BATCH_RECOGNITION or self.mode != 'ensemble':
+            return []
+        # EasyOCR only batches recognition on a GPU, and its readers here run on CPU
+        return [engine for engine in ('paddleocr',)
+                if engine in self.engines and engine not in self._engine_errors]
+
+    def _prefetch_recognition(self, images: Iterator[Image.Image], languages: List[str], kwargs: Dict,
+                              tracer: Optional[Tracer] = None) -> Iterator[Image.Image]:
+        """
+        Yield the images, running PaddleOCR over them a batch at a time first
+        (see ocr_engines.batch_engine): regions are detected page by page but
+        recognized together. Batches grow from a single page to
+        settings.RECOGNITION_BATCH_PAGES like those of `_prefetch_tesseract`.
+        Each page's words are attached to the image and picked up by `_ocr_image`.
+        """
+        from ocr_engines.batch_engine import run_batch
+        for chunk in _growing_chunks(images, settings.RECOGNITION_BATCH_PAGES):
+            pages = self._pages_to_prefetch(chunk, languages, kwargs)
+            # Loaded through _load_engine so failures are reported like on the per-page path
+            engines = [engine for engine in self._batches_recognition() if self._load_engine(engine) is not None]
+            for engine in engines:
+                items = [{'image': _engine_array(image)} for image, _ in pages]
+                try:
+                    # The per-page path reads PaddleOCR with the English model loaded at start-up
+                    results, measured = measure_call(run_batch, items, engine, ['en'])
+                except Exception as e:
+                    logger.warning(f"Batched {ENGINE_LABELS[engine]} failed: {str(e)}")
+                    continue
+                if tracer is not None:
+                    tracer.record('recognition_batch', engine=engine, pages=len(pages), **measured)
+                for (image, page_languages), words in zip(pages, results):
+                    image.info.setdefault('recognized_words', {})[engine] = (page_languages, words)
+            yield from chunk
+
+    def _convert_pdf_to_images(self, file_stream) -> List[Image.Image]:
+        """Convert PDF to list of PIL images"""
+        return list(self._iter_pdf_pages(file_stream))
+
     def _process_image(self, image: Image.Image, languages: List[str], **kwargs) -> Dict:
-        """Process single image with multiple OCR engines"""
-        # Convert to OpenCV format if using OpenCV-based engines
-        img_cv = None
-        if self.easyocr_reader or self.paddle_ocr:
-            img_cv = np.array(image)
-            if len(img_cv.shape) == 2:  # Grayscale
-                img_cv = np.stack((img_cv,)*3, axis=-1)
-            elif img_cv.shape[2] == 4:  # RGBA
-                img_cv = img_cv[:, :, :3]
-        
-        # Get results from all available engines
+        """Process single image with multiple OCR engines; the page's timing spans are returned under 'spans'"""
+        tracer = Tracer()
+        with use_tracer(tracer):
+            with tracer.span('page'):
+                result = self._process_image_cached(image, languages, **kwargs)
+        result['spans'] = tracer.spans
+        return result
+
+    def _page_cache_key(self, image: Image.Image, languages: List[str], kwargs: Dict) -> str:
+        """Result cache key of a page"""
+        # Configured engines rather than loaded ones, so a cached page needs no model at all
+        engines = [engine for engine in self.engines if engine not in self._engine_errors]
+        options = {'engines': engines, 'mode': self.mode, 'cascade_threshold': self.cascade_threshold,
+                   **{name: getattr(settings, name) for name in RESULT_SETTINGS}, **kwargs}
+        return result_cache.make_key(image, 'ocr_processor', languages, options)
+
+    def _process_image_cached(self, image: Image.Image, languages: List[str], **kwargs) -> Dict:
+        """Process single image with multiple OCR engines, reusing the cached result of an identical page"""
+        cache_key = self._page_cache_key(image, languages, kwargs)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            current_tracer().record('cache_hit', wall_time=0.0)
+            return cached
+
+        if 'ocr_languages' in image.info:
+            # Already routed for batched Tesseract
+            languages = image.info.pop('ocr_languages')
+        elif settings.LANGUAGE_DETECTION:
+            # Only the models of the languages written in the page's script are used
+            from processors.language_detection import route_languages
+            with span('language_detection'):
+                languages = route_languages(image, languages)
+
+        if image.width * image.height > settings.TILE_MAX_PIXELS:
+            result = self._ocr_image_tiled(image, languages, **kwargs)
+        elif self.mode == 'cascade':
+            result = self._ocr_image_cascade(image, languages)
+            result['languages'] = languages
+            # A fallback engine that failed may only have failed this time
+            if not result['failed_engines']:
+                result_cache.put(cache_key, result)
+            return result
+        else:
+            result = self._ocr_image(image, languages, **kwargs)
+        result['languages'] = languages
+
+        # Don't persist degraded pages where an engine failed or timed out
+        engines = [engine for engine in self.engines if engine not in self._engine_errors]
+        if [res['engine'] for res in result['all_engines']] == engines:
+            result_cache.put(cache_key, result)
+        return result
+
+    def _ocr_image_tiled(self, image: Image.Image, languages: List[str], **kwargs) -> Dict:
+        """
+        OCR an oversized page in overlapping tiles (see processors.tiling), so no
+        engine ever sees more than one tile, and stitch the tile results together.
+        """
+        from processors.tiling import run_tiled
+        from ocr_engines.ensemble_ocr import order_words, words_to_text
+        tile_results = []
+
+        def recognize(tile: np.ndarray) -> List[Dict]:
+            if self.mode == 'cascade':
+                result = self._ocr_image_cascade(Image.fromarray(tile), languages)
+            else:
+                result = self._ocr_image(Image.fromarray(tile), languages, **kwargs)
+            tile_results.append(result)
+            return result['words']
+
+        words = run_tiled(np.asarray(image), recognize)
+        if self.mode != 'cascade':
+            # Lines crossing tile boundaries are put back together
+            words = order_words(words)
+
+        engine_results = {}
+        for tile_result in tile_results:
+            for res in tile_result['all_engines']:
+                total = engine_results.setdefault(res['engine'], {
+                    'engine': res['engine'], 'text': [], 'confidence': [], 'wall_time': 0.0})
+                total['text'].append(res['text'])
+                total['confidence'].append(res['confidence'])
+                total['wall_time'] += res.get('wall_time', 0.0)
+        for total in engine_results.values():
+            total['text'] = "\n".join(total['text'])
+            total['confidence'] = float(np.mean(total['confidence']))
+
+        return {
+            'text': words_to_text(words) if self.mode != 'cascade' else " ".join(word['text'] for word in words),
+            'confidence': float(np.mean([word['confidence'] for word in words]) / 100) if words else 0.0,
+            'engine_used': tile_results[0]['engine_used'] if tile_results else self.mode,
+            'words': words,
+            'all_engines': list(engine_results.values()),
+            'tiles': len(tile_results)
+        }
+
+    def _ocr_image_cascade(self, image: Image.Image, languages: List[str]) -> Dict:
+        """
+        Run Tesseract on the whole page and only send its low confidence
+        regions to EasyOCR/PaddleOCR for a second opinion.
+        """
+        from ocr_engines.ensemble_ocr import cascade_ocr
+        gray = np.array(image.convert('L'))
+        # Only configured, not loaded: clean pages never need the fallback models
+        fallback_engines = [engine for engine in ('easyocr', 'paddleocr')
+                            if engine in self.engines and engine not in self._engine_errors]
+        wall_times = {}
+        failed = set()
+        words = cascade_ocr(gray, languages, threshold=self.cascade_threshold,
+                            fallback_engines=fallback_engines, stats=wall_times, failed=failed)
+
         engine_results = []
-        
-        # 1. Try EasyOCR first
+        for engine, wall_time in wall_times.items():
+            current_tracer().record('engine', wall_time=wall_time, engine=engine)
+            engine_words = [word for word in words if word['engine'] == engine]
+            engine_results.append({
+                'engine': engine,
+                'text': " ".join(word['text'] for word in engine_words),
+                'confidence': float(np.mean([word['confidence'] for word in engine_words]) / 100) if engine_words else 0.0,
+                'words': len(engine_words),
+                'wall_time': wall_time
+            })
+
+        return {
+            'text': " ".join(word['text'] for word in words),
+            'confidence': float(np.mean([word['confidence'] for word in words]) / 100) if words else 0.0,
+            'engine_used': 'cascade',
+            'words': words,
+            'all_engines': engine_results,
+            'failed_engines': sorted(failed)
+        }
+
+    def _available_engines(self) -> List[str]:
+        """Names of the engines run on every page, in order of preference"""
+        if self.execution_mode == 'process':
+            # The engines are loaded by their pool processes (see `_get_executor`), never here
+            return [engine for engine in ('easyocr', 'paddleocr', 'tesseract')
+                    if engine in self.engines and engine not in self._engine_errors]
+        engines = []
         if self.easyocr_reader:
-            try:
-                easyocr_text, easyocr_conf = self._extract_with_easyocr(img_cv, languages)
-                engine_results.append({
-                    'engine': 'easyocr',
-                    'text': easyocr_text,
-                    'confidence': easyocr_conf
-                })
-            except Exception as e:
-                logger.warning(f"EasyOCR failed: {str(e)}")
-        
-        # 2. Try PaddleOCR
+            engines.append('easyocr')
         if self.paddle_ocr:
-            try:
-                paddle_text, paddle_conf = self._extract_with_paddleocr(img_cv)
-                engine_results.append({
-                    'engine': 'paddleocr',
-                    'text': paddle_text,
-                    'confidence': paddle_conf
-                })
-            except Exception as e:
-                logger.warning(f"PaddleOCR failed: {str(e)}")
+            engines.append('paddleocr')
+        if 'tesseract' in self.engines:
+            engines.append('tesseract')
+        return engines
+
+    def _ocr_image(self, image: Image.Image, languages: List[str], **kwargs) -> Dict:
+        """Run the available OCR engines on a single image and keep the best result"""
+        from ocr_engines.ensemble_ocr import merge_word_results, words_to_text
+        from ocr_engines.languages import tesseract_lang
+        engines = self._available_engines()
+
+        # Words recognized ahead in a batch of pages (see `_prefetch_recognition`)
+        batched = {engine: words for engine, (page_languages, words) in image.info.pop('recognized_words', {}).items()
+                   if engine in engines and page_languages == languages}
+        # Tesseract batch this page is part of (see `_prefetch_tesseract`)
+        tesseract_batch = image.info.pop('tesseract_batch', None)
+        if tesseract_batch is not None and tesseract_batch[0] != tesseract_lang(languages):
+            tesseract_batch = None
+
+        # Convert to OpenCV format if using OpenCV-based engines
+        img_cv = None
+        if {'easyocr', 'paddleocr'} & (set(engines) - set(batched)):
+            img_cv = _engine_array(image)
         
-        # 3. Try native Tesseract
-        try:
-            tesseract_text, tesseract_conf = self._extract_with_tesseract(image, languages)
-            engine_results.append({
-                'engine': 'tesseract',
-                'text': tesseract_text,
-                'confidence': tesseract_conf
-            })
-        except Exception as e:
-            logger.warning(f"Tesseract failed: {str(e)}")
+        # Engines to run, in order of preference
+        tasks = []
+        if 'easyocr' in engines and 'easyocr' not in batched:
+            tasks.append(('easyocr', (img_cv, languages)))
+        if 'paddleocr' in engines and 'paddleocr' not in batched:
+            tasks.append(('paddleocr', (img_cv,)))
+        if 'tesseract' in engines and tesseract_batch is None:
+            tasks.append(('tesseract', (image, languages)))
+
+        # Get results from all available engines
+        if self.execution_mode == 'sequential':
+            engine_results = self._run_engines_sequential(tasks)
+        else:
+            engine_results = self._run_engines_parallel(tasks)
+        if batched:
+            engine_results += [self._batched_engine_result(engine, words) for engine, words in batched.items()]
+        if 'tesseract' in engines and tesseract_batch is not None:
+            engine_results += self._tesseract_batch_result(*tesseract_batch[1:])
+        engine_results.sort(key=lambda res: engines.index(res['engine']))
         
         # Fallback to pytesseract if native not available
         if not engine_results:
             try:
+                import pytesseract
                 tesseract_text = pytesseract.image_to_string(image)
                 engine_results.append({
                     'engine': 'pytesseract',
@@ -156,6 +811,21 @@ class OCRProcessor:
                 logger.error(f"All OCR engines failed: {str(e)}")
                 raise RuntimeError("All OCR engines failed to process the image")
         
+        # Align the engines' word boxes and vote per word
+        # Every engine result drops its words, so all_engines has the same shape whatever they read
+        words_by_engine = {res['engine']: res.pop('words', None) for res in engine_results}
+        words_by_engine = {engine: words for engine, words in words_by_engine.items() if words}
+        with span('merge'):
+            merged = merge_word_results(words_by_engine) if words_by_engine else []
+        if merged:
+            return {
+                'text': words_to_text(merged),
+                'confidence': float(np.mean([word['confidence'] for word in merged]) / 100),
+                'engine_used': 'ensemble' if len(words_by_engine) > 1 else next(iter(words_by_engine)),
+                'words': merged,
+                'all_engines': engine_results
+            }
+
         # Select best result (highest confidence)
         best_result = max(engine_results, key=lambda x: x['confidence'])
         
@@ -163,44 +833,240 @@ class OCRProcessor:
             'text': best_result['text'],
             'confidence': best_result['confidence'],
             'engine_used': best_result['engine'],
+            'words': [],
             'all_engines': engine_results
         }
 
-    def _extract_with_easyocr(self, image: np.ndarray, languages: List[str]) -> Tuple[str, float]:
-        """Extract text using EasyOCR"""
-        # Convert language codes (e.g. 'en' -> 'english')
-        lang_map = {'en': 'en', 'ar': 'ar', 'fr': 'fr', 'de': 'de', 'zh': 'ch_sim'}
-        easyocr_langs = [lang_map.get(lang[:2].lower(), 'en') for lang in languages]
+    @staticmethod
+    def _batched_engine_result(engine: str, words: List[Dict]) -> Dict:
+        """Engine result of a page from its batch_engine words; the batch's time is in its own span"""
+        words = [{'text': word['text'], 'confidence': word['confidence'], 'box': word['box']} for word in words]
+        return {
+            'engine': engine,
+            'text': " ".join(word['text'] for word in words),
+            'confidence': float(np.mean([word['confidence'] for word in words]) / 100) if words else 0.0,
+            'words': words,
+            'wall_time': 0.0
+        }
+
+    def _tesseract_batch_result(self, future: Future, index: int) -> List[Dict]:
+        """
+        Tesseract result of one page of a batch, waiting for the batch if it is still
+        running; the page is charged its share of the batch's time. A batch that failed
+        or timed out (its process is killed after the per-page Tesseract timeout) drops
+        Tesseract from the page, like a failed engine.
+        """
+        try:
+            data, measured = future.result()
+        except Exception as e:
+            logger.warning(f"{ENGINE_LABELS['tesseract']} failed: {str(e)}")
+            return []
+        share = {name: value / len(data) for name, value in measured.items() if value is not None}
+        self._record_engine_span('tesseract', dict(share, batched=True))
+        text, confidence, words = self._tesseract_result(data[index])
+        return [{
+            'engine': 'tesseract',
+            'text': text,
+            'confidence': confidence,
+            'words': words,
+            'wall_time': share['wall_time']
+        }]
+
+    def _run_engines_sequential(self, tasks: List[Tuple[str, tuple]]) -> List[Dict]:
+        """Run the engines one after another"""
+        engine_results = []
+        for engine, args in tasks:
+            try:
+                (text, confidence, words), measured = measure_call(getattr(self, ENGINE_METHODS[engine]), *args)
+                self._record_engine_span(engine, measured)
+                engine_results.append({
+                    'engine': engine,
+                    'text': text,
+                    'confidence': confidence,
+                    'words': words,
+                    'wall_time': measured['wall_time']
+                })
+            except Exception as e:
+                logger.warning(f"{ENGINE_LABELS[engine]} failed: {str(e)}")
+        return engine_results
+
+    def _run_engines_parallel(self, tasks: List[Tuple[str, tuple]]) -> List[Dict]:
+        """
+        Run the engines concurrently on the thread pool or their process pools.
+
+        Every engine gets its own timeout, counted from when it starts running
+        rather than from submission, so time spent queued behind the engines
+        of other pages is not held against it. An engine that does not finish
+        in time is dropped from the page result without holding back the
+        others. A running engine cannot be interrupted, so the pool is then
+        replaced (see `_recycle_executor`) and later pages don't queue behind it.
+        """
+        futures = {}
+        executors = {}
+        for engine, args in tasks:
+            executors[engine] = self._get_executor(engine)
+            if self.execution_mode == 'process':
+                future = executors[engine].submit(_extract_in_worker, engine, *args)
+            else:
+                future = executors[engine].submit(measure_call, getattr(self, ENGINE_METHODS[engine]), *args)
+            futures[future] = engine
+
+        results_by_engine = {}
+        started = {}
+        timed_out = set()
+        while futures:
+            now = time.monotonic()
+            # Process pool futures run once handed to a worker's queue, which is at most one call deep
+            for future in futures:
+                if future not in started and (future.running() or future.done()):
+                    started[future] = now
+            for future, engine in list(futures.items()):
+                if not future.done() and future in started and now - started[future] >= self._engine_timeout(engine):
+                    del futures[future]
+                    timed_out.add(executors[engine])
+                    logger.warning(f"{ENGINE_LABELS[engine]} timed out after {self._engine_timeout(engine)}s")
+            if not futures:
+                break
+
+            # Sleep until the next deadline, looking again soon while some engines are still queued
+            waits = [started[future] + self._engine_timeout(engine) - now
+                     for future, engine in futures.items() if future in started]
+            if len(waits) < len(futures):
+                waits.append(ENGINE_POLL_INTERVAL)
+            done, _ = wait(futures, timeout=max(min(waits), 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                engine = futures.pop(future)
+                try:
+                    (text, confidence, words), measured = future.result()
+                    self._record_engine_span(engine, measured)
+                    results_by_engine[engine] = {
+                        'engine': engine,
+                        'text': text,
+                        'confidence': confidence,
+                        'words': words,
+                        'wall_time': measured['wall_time']
+                    }
+                except Exception as e:
+                    logger.warning(f"{ENGINE_LABELS[engine]} failed: {str(e)}")
+
+        for executor in timed_out:
+            self._recycle_executor(executor)
+
+        # Keep the original engine order in the result
+        return [results_by_engine[engine] for engine, _ in tasks if engine in results_by_engine]
+
+    @staticmethod
+    def _record_engine_span(engine: str, measured: Dict):
+        tracer = current_tracer()
+        if tracer is not None:
+            tracer.record('engine', engine=engine, **measured)
+
+    def _engine_timeout(self, engine: str) -> float:
+        return self.engine_timeouts.get(engine, settings.ENGINE_TIMEOUTS['default'])
+
+    def _get_executor(self, engine: Optional[str] = None):
+        """
+        Lazily create the pool `engine` runs on. Threads share one pool, with
+        at least one worker per engine so the engines of a page never queue
+        behind each other. Processes get one single-worker pool per engine,
+        which loads that engine only, so each model is held in memory once.
+        """
+        key = engine if self.execution_mode == 'process' else None
+        with self._executor_lock:
+            if key not in self._executors:
+                if self.execution_mode == 'process':
+                    self._executors[key] = ProcessPoolExecutor(max_workers=1, initializer=_init_engine_worker,
+                                                               initargs=(engine,))
+                else:
+                    self._executors[key] = ThreadPoolExecutor(max_workers=max(self.max_workers, len(self.engines)),
+                                                              thread_name_prefix='ocr-engine')
+            return self._executors[key]
+
+    def _recycle_executor(self, executor):
+        """
+        Replace an engine pool holding an engine that timed out. The old pool
+        finishes the calls already given to it, including other pages' engines,
+        and its workers exit once the stuck engine returns.
+        """
+        with self._executor_lock:
+            for key in [key for key, pool in self._executors.items() if pool is executor]:
+                del self._executors[key]
+        executor.shutdown(wait=False)
+
+    def _get_page_scheduler(self) -> PageScheduler:
+        """Lazily start the page workers; they stay alive (and warm) between documents"""
+        if self._page_scheduler is None:
+            self._page_scheduler = PageScheduler(
+                _process_page_in_worker,
+                workers=self.page_workers,
+                max_in_flight=self.max_pages_in_flight,
+                initializer=_get_worker_processor,
+                initargs=(settings.PAGE_WORKER_EXECUTION_MODE,)
+            )
+        return self._page_scheduler
+
+    def close(self):
+        """Shut down the engine and page pools without waiting for engines that timed out"""
+        with self._executor_lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self._page_scheduler is not None:
+            self._page_scheduler.close()
+            self._page_scheduler = None
+
+    def _extract_with_easyocr(self, image: np.ndarray, languages: List[str]) -> Tuple[str, float, List[Dict]]:
+        """Extract text and word boxes using EasyOCR"""
+        # Convert language codes (e.g. 'zh' -> 'ch_sim')
+        from ocr_engines.languages import engine_languages
+        easyocr_langs = engine_languages('easyocr', languages)
         
-        result = self.easyocr_reader.readtext(image, detail=1)
+        result = self._easyocr_reader_for(easyocr_langs).readtext(image, detail=1)
         text = " ".join([entry[1] for entry in result])
         confidence = np.mean([entry[2] for entry in result]) if result else 0.5
-        return text, float(confidence)
+        words = [
+            {'text': entry[1], 'confidence': float(entry[2]) * 100, 'box': entry[0]}
+            for entry in result if entry[1].strip()
+        ]
+        return text, float(confidence), words
 
-    def _extract_with_paddleocr(self, image: np.ndarray) -> Tuple[str, float]:
-        """Extract text using PaddleOCR"""
+    def _easyocr_reader_for(self, easyocr_langs: List[str]):
+        """
+        The EasyOCR reader for these EasyOCR language codes. The default en+ar
+        reader is the one loaded by warm-up; readers for other language sets
+        (e.g. English-only pages) are loaded on first use and kept in the engine pool.
+        """
+        if sorted(easyocr_langs) == sorted(EASYOCR_DEFAULT_LANGUAGES):
+            return self.easyocr_reader
+        return get_engine('easyocr', easyocr_langs, gpu=False)
+
+    def _extract_with_paddleocr(self, image: np.ndarray) -> Tuple[str, float, List[Dict]]:
+        """Extract text and word boxes using PaddleOCR"""
         result = self.paddle_ocr.ocr(image, cls=False)
         if result and result[0]:
             text = " ".join([line[1][0] for line in result[0]])
             confidence = np.mean([line[1][1] for line in result[0]])
-            return text, float(confidence)
-        return "", 0.0
-
-    def _extract_with_tesseract(self, image: Image.Image, languages: List[str]) -> Tuple[str, float]:
-        """Extract text using Tesseract OCR"""
-        # Map language codes to Tesseract format
-        lang_map = {
-            'en': 'eng',
-            'ar': 'ara',
-            'fr': 'fra',
-            'de': 'deu',
-            'zh': 'chi_sim'
-        }
-        tesseract_langs = "+".join([lang_map.get(lang[:2].lower(), 'eng') for lang in languages])
-        
+            words = [
+                {'text': line[1][0], 'confidence': float(line[1][1]) * 100, 'box': line[0]}
+                for line in result[0] if line[1][0].strip()
+            ]
+            return text, float(confidence), words
+        return "", 0.0, []
+
+    def _extract_with_tesseract(self, image: Image.Image, languages: List[str]) -> Tuple[str, float, List[Dict]]:
+        """Extract text and word boxes using Tesseract OCR"""
+        import pytesseract
+        from ocr_engines.languages import tesseract_lang
+        tesseract_langs = tesseract_lang(languages)
+
         # Get OCR data including confidence
         data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT, lang=tesseract_langs)
-        
+        return self._tesseract_result(data)
+
+    @staticmethod
+    def _tesseract_result(data: Dict) -> Tuple[str, float, List[Dict]]:
+        """Text, confidence and word boxes of a Tesseract data dict"""
         # Combine text with confidence > 60
         text = " ".join(
             word for word, conf in zip(data['text'], data['conf']) 
@@ -210,39 +1076,75 @@ class OCRProcessor:
         # Calculate average confidence (excluding -1 values)
         valid_confs = [c for c in data['conf'] if c != -1]
         avg_conf = np.mean(valid_confs) / 100 if valid_confs else 0.7
+
+        words = [
+            {
+                'text': data['text'][i],
+                'confidence': float(data['conf'][i]),
+                'box': (data['left'][i], data['top'][i], data['width'][i], data['height'][i])
+            }
+            for i in range(len(data['text']))
+            if data['text'][i].strip() and float(data['conf'][i]) >= 0
+        ]
         
-        return text, float(avg_conf)
+        return text, float(avg_conf), words
 
     def _combine_results(self, page_results: List[Dict]) -> Dict:
         """Combine results from multiple pages"""
         combined_text = "\n\n".join([res['text'] for res in page_results])
-        avg_confidence = np.mean([res['confidence'] for res in page_results])
+        # Blank pages have nothing to be confident about
+        avg_confidence = np.mean([res['confidence'] for res in page_results if res.get('source') != 'blank'] or [0.0])
         engines_used = list(set(res['engine_used'] for res in page_results))
+        languages = []
+        for res in page_results:
+            languages.extend(lang for lang in res.get('languages', []) if lang not in languages)
+        # Every page's words in one columnar table instead of one dict per word
+        words = WordTable.concat(WordTable.from_words(res.get('words') or [], page=res.get('page'))
+                                 for res in page_results)
         
         return {
             'text': combined_text,
             'confidence': avg_confidence,
             'engines_used': engines_used,
+            'languages': languages,
+            'words': words,
             'pages': len(page_results),
-            'quality_report': self._generate_quality_report(page_results)
+            'quality_report': self._generate_quality_report(page_results, words)
         }
 
-    def _generate_quality_report(self, page_results: List[Dict]) -> Dict:
+    def _generate_quality_report(self, page_results: List[Dict], words: Optional[WordTable] = None) -> Dict:
         """Generate quality assessment report"""
         word_counts = []
         confidences = []
+        page_sources = {}
         
         for page in page_results:
             word_counts.append(len(page['text'].split()))
-            confidences.append(page['confidence'])
+            source = page.get('source', 'ocr')
+            page_sources[source] = page_sources.get(source, 0) + 1
+            if source != 'blank':
+                confidences.append(page['confidence'])
+        confidences = confidences or [0.0]
         
-        return {
+        report = {
             'total_words': sum(word_counts),
             'avg_confidence': np.mean(confidences),
             'min_confidence': min(confidences),
             'max_confidence': max(confidences),
-            'pages_processed': len(page_results)
+            'pages_processed': len(page_results),
+            'page_sources': page_sources,
+            # Pages triage kept away from the engines
+            'skipped_blank_pages': page_sources.get('blank', 0),
+            'reused_duplicate_pages': page_sources.get('duplicate', 0)
         }
+        if words is not None and len(words):
+            # Word-level confidence breakdown (0-100), computed on the table's columns
+            thresholds = settings.CONFIDENCE_THRESHOLDS
+            report['low_confidence_words'] = int(np.count_nonzero(words.confidence < thresholds['low']))
+            report['medium_confidence_words'] = int(np.count_nonzero(
+                (words.confidence >= thresholds['low']) & (words.confidence < thresholds['high'])))
+            report['high_confidence_words'] = int(np.count_nonzero(words.confidence >= thresholds['high']))
+        return report
 
     def get_supported_languages(self) -> Dict[str, List[str]]:
         """Return supported languages for each engine"""
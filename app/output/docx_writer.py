@@ -1,10 +1,7 @@
 # app/output/docx_writer.py
 
-from docx import Document
-from docx.shared import Pt
-from docx.oxml.ns import qn
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 import os
+from output.streaming_docx import StreamingDocxWriter
 
 def create_docx_from_text(text, output_path, language='en'):
     """
@@ -21,29 +18,17 @@ def create_docx_from_text(text, output_path, language='en'):
     if not text.strip():
         raise ValueError("Cannot create a document with empty text.")
 
-    document = Document()
-
-    # Set default font
-    if language == 'ar':
-        style = document.styles['Normal']
-        font = style.font
-        font.name = 'Arial'
-        style._element.rPr.rFonts.set(qn('w:eastAsia'), 'Arial')
-
-    paragraphs = text.split('\n')
-    for para in paragraphs:
-        if para.strip():
-            p = document.add_paragraph()
-            run = p.add_run(para.strip())
-            run.font.size = Pt(12)
-
-            if language == 'ar':
-                p.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-            else:
-                p.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-
     # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Paragraphs are streamed into the file one line at a time
+    font = 'Arial' if language == 'ar' else None
+    with StreamingDocxWriter(output_path, font=font, font_size=12) as writer:
+        for para in text.split('\n'):
+            if para.strip():
+                writer.add_paragraph([(para.strip(), None)],
+                                     alignment='right' if language == 'ar' else 'left')
 
-    document.save(output_path)
     return output_path
@@ -0,0 +1,214 @@
+# app/output/streaming_docx.py
+
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from utils.word_table import WordTable
+
+# Characters that are not allowed in XML 1.0 and occasionally come out of OCR engines
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Bytes of document.xml collected before they are handed to the zip compressor
+FLUSH_BYTES = 64 * 1024
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:styles xmlns:w="{_W_NS}">'
+    '<w:docDefaults><w:rPrDefault><w:rPr>{fonts}<w:sz w:val="22"/><w:szCs w:val="22"/>'
+    '</w:rPr></w:rPrDefault><w:pPrDefault/></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/>'
+    '<w:qFormat/><w:rPr>{fonts}</w:rPr></w:style>'
+    '</w:styles>'
+)
+
+_DOCUMENT_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document xmlns:w="{_W_NS}"><w:body>'
+)
+
+# US Letter with 1" top/bottom and 1.25" side margins, like the python-docx default template
+_DOCUMENT_END = (
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" '
+    'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+    '</w:body></w:document>'
+)
+
+def _fonts_xml(font):
+    if not font:
+        return ''
+    return f'<w:rFonts w:ascii="{font}" w:hAnsi="{font}" w:eastAsia="{font}" w:cs="{font}"/>'
+
+def _text_xml(text):
+    return escape(_INVALID_XML_CHARS.sub('', text))
+
+class StreamingDocxWriter:
+    """
+    Writes a .docx file paragraph by paragraph.
+
+    `word/document.xml` is generated as text and compressed straight into
+    the zip while paragraphs are added, so no document object tree is built
+    and memory stays flat however long the document is. Use as a context
+    manager, or call `close()` to finish the file.
+
+    Args:
+        output_path (str or file-like): Path or stream to save the Word document to.
+        rtl (bool): Right-to-left paragraphs (for Arabic).
+        font (str): Font of every run (None keeps Word's default).
+        font_size (float): Font size in points (None keeps the default size).
+    """
+
+    def __init__(self, output_path, rtl=False, font='Arial', font_size=None):
+        self.rtl = rtl
+        self.font = font
+        self._run_props = _fonts_xml(font)
+        if font_size:
+            half_points = int(round(font_size * 2))
+            self._run_props += f'<w:sz w:val="{half_points}"/><w:szCs w:val="{half_points}"/>'
+        self._zip = zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        self._zip.writestr('_rels/.rels', _PACKAGE_RELS)
+        self._zip.writestr('word/_rels/document.xml.rels', _DOCUMENT_RELS)
+        self._zip.writestr('word/styles.xml', _STYLES.format(fonts=_fonts_xml(font)))
+        self._document = self._zip.open('word/document.xml', 'w', force_zip64=True)
+        self._buffer = io.StringIO()
+        self._buffer.write(_DOCUMENT_START)
+        self._last_page = None
+        self.paragraphs = 0
+
+    def add_paragraph(self, runs, alignment=None, page_break_before=False):
+        """
+        Writes one paragraph.
+
+        Args:
+            runs (list): (text, fill) pairs, where fill is a hex shading color or None.
+            alignment (str): 'left', 'right', 'center' or 'both'
+                (defaults to right for RTL documents and left otherwise).
+            page_break_before (bool): Start the paragraph on a new page.
+        """
+        alignment = alignment or ('right' if self.rtl else 'left')
+        write = self._buffer.write
+        write('<w:p><w:pPr>')
+        if page_break_before:
+            write('<w:pageBreakBefore/>')
+        if self.rtl:
+            write('<w:bidi/>')
+        write(f'<w:jc w:val="{alignment}"/></w:pPr>')
+        for text, fill in runs:
+            write('<w:r><w:rPr>')
+            write(self._run_props)
+            if fill:
+                write(f'<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>')
+            write(f'</w:rPr><w:t xml:space="preserve">{_text_xml(text)}</w:t></w:r>')
+        write('</w:p>')
+        self.paragraphs += 1
+        if self._buffer.tell() >= FLUSH_BYTES:
+            self._flush()
+
+    def add_words(self, words, fill=None):
+        """
+        Writes OCR words, one paragraph per line.
+
+        Adjacent words of a line that get the same shading are coalesced
+        into a single run. Words carrying 'page' and 'line' keys start a new
+        paragraph whenever either changes, and a new page starts on a new
+        page of the document; words without them form one paragraph.
+
+        Args:
+            words (iterable or WordTable): Dicts with 'text' and 'confidence' (0-100),
+                optionally 'page' and 'line', or a WordTable.
+            fill (callable): Maps a confidence to a hex shading color (None for no shading).
+        """
+        line_key = None
+        runs = []
+        page_break = False
+        for text, confidence, page, line in self._columns(words):
+            if text.strip() == "":
+                continue
+
+            key = (page, line)
+            if runs and key != line_key:
+                self.add_paragraph(self._join(runs), page_break_before=page_break)
+                runs = []
+            if not runs:
+                page_break = self._last_page is not None and page != self._last_page
+                self._last_page = page
+            line_key = key
+
+            color = fill(confidence) if fill else None
+            if runs and runs[-1][1] == color:
+                runs[-1][0].append(text)
+            else:
+                runs.append(([text], color))
+
+        if runs:
+            self.add_paragraph(self._join(runs), page_break_before=page_break)
+
+    @staticmethod
+    def _columns(words):
+        """(text, confidence, page, line) of every word of a list of dicts or a WordTable."""
+        if isinstance(words, WordTable):
+            # Whole columns at once, no per-word views
+            pages = [None if page < 0 else page for page in words.page.tolist()]
+            lines = [None if line < 0 else line for line in words.line.tolist()]
+            return zip(words.texts(), words.confidence.tolist(), pages, lines)
+        return ((word['text'], word['confidence'], word.get('page'), word.get('line')) for word in words)
+
+    @staticmethod
+    def _join(runs):
+        return [(' '.join(parts) + ' ', color) for parts, color in runs]
+
+    def _flush(self):
+        self._document.write(self._buffer.getvalue().encode('utf-8'))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def close(self):
+        """Finishes document.xml and the zip."""
+        if self._zip is None:
+            return
+        self._buffer.write(_DOCUMENT_END)
+        self._flush()
+        self._document.close()
+        self._zip.close()
+        self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
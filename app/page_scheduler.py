@@ -0,0 +1,106 @@
+import os
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(threads_per_worker, initializer, initargs):
+    """Limit native thread pools in a page worker, then run the user initializer"""
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads_per_worker)
+    try:
+        import cv2
+        cv2.setNumThreads(threads_per_worker)
+    except ImportError:
+        pass
+    if initializer is not None:
+        initializer(*initargs)
+
+
+class PageScheduler:
+    """
+    Runs a per-page function over the pages of a document on a pool of worker
+    processes.
+
+    Results are yielded in page order. At most `max_in_flight` pages are
+    submitted at any time, so pages are pulled lazily from the input iterable
+    and memory does not grow with document length. Worker processes live as
+    long as the scheduler, so anything they load (e.g. OCR engines in the
+    engine pool) stays warm between pages and documents.
+    """
+
+    def __init__(self, page_func: Callable, workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, initializer: Optional[Callable] = None,
+                 initargs: tuple = ()):
+        """
+        Args:
+            page_func: Module-level function called as `page_func(page, *args)`
+            workers: Number of worker processes; 1 runs pages inline
+            max_in_flight: Maximum number of pages submitted but not yet yielded
+            initializer: Optional function run once in every worker (e.g. to warm up engines)
+            initargs: Arguments for `initializer`
+        """
+        self.page_func = page_func
+        self.workers = max(1, workers or settings.PAGE_WORKERS)
+        self.max_in_flight = max(1, max_in_flight or settings.MAX_PAGES_IN_FLIGHT or 2 * self.workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor = None
+        self._initialized_inline = False
+
+    def map(self, pages: Iterable, *args) -> Iterator:
+        """Apply `page_func` to every page and yield the results in page order"""
+        if self.workers == 1:
+            yield from self._map_inline(pages, *args)
+            return
+
+        executor = self._get_executor()
+        pending = deque()
+        try:
+            for page in pages:
+                pending.append(executor.submit(self.page_func, page, *args))
+                if len(pending) >= self.max_in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Stop queued pages if the consumer bailed out or a page failed
+            for future in pending:
+                future.cancel()
+
+    def _map_inline(self, pages: Iterable, *args) -> Iterator:
+        if self.initializer is not None and not self._initialized_inline:
+            self.initializer(*self.initargs)
+            self._initialized_inline = True
+        for page in pages:
+            yield self.page_func(page, *args)
+
+    def _get_executor(self):
+        if self._executor is None:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+            logger.info(f"Starting {self.workers} page workers ({threads_per_worker} threads each)")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(settings.PAGE_WORKER_START_METHOD),
+                initializer=_init_worker,
+                initargs=(threads_per_worker, self.initializer, self.initargs)
+            )
+        return self._executor
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
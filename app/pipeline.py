@@ -0,0 +1,117 @@
+import cv2
+from processors.image_preprocessing import preprocess_image, PREPROCESSING_PARAMS
+from processors.tiling import is_oversized, run_tiled
+from processors.language_detection import route_languages
+from ocr_engines.languages import engine_languages, is_rtl_language, tesseract_lang
+from ocr_engines.tesseract_engine import run_tesseract_ocr
+from ocr_engines.easyocr_engine import run_easyocr
+from ocr_engines.paddleocr_engine import get_paddleocr, run_paddleocr
+from ocr_engines.engine_pool import get_engine
+from ocr_engines.ensemble_ocr import merge_word_results
+from config import settings
+from utils.result_cache import result_cache
+from utils.instrumentation import span
+
+# Languages a page may be written in; with settings.LANGUAGE_DETECTION each page
+# only gets the models of the ones its script needs
+PAGE_LANGUAGES = ['en', 'ar']
+
+# Settings that change what `process_page` returns for a page; all of them are part of its cache key
+RESULT_SETTINGS = ('LAYOUT_ENABLED', 'LANGUAGE_DETECTION', 'SCRIPT_MIN_CONFIDENCE', 'SCRIPT_DETECTION_BANDS',
+                   'TILE_MAX_PIXELS', 'TILE_SIZE', 'TILE_OVERLAP', 'TILE_MEMORY_BUDGET', 'TILE_BYTES_PER_PIXEL')
+
+
+def warm_up_engines():
+    """
+    Loads the EasyOCR and PaddleOCR (and layout) models `process_page` uses into this
+    process's engine pool, so the first page does not pay for model loading.
+    """
+    get_engine('easyocr', ['en', 'ar'], gpu=False)
+    get_paddleocr('en')
+    if settings.LAYOUT_ENABLED:
+        from processors.layout_detection import load_layout_model
+        load_layout_model()
+
+
+def _cache_key(image):
+    """Result cache key of a page under the current settings"""
+    options = {name: getattr(settings, name) for name in RESULT_SETTINGS}
+    return result_cache.make_key(image, 'pipeline', PAGE_LANGUAGES, options, preprocessing=PREPROCESSING_PARAMS)
+
+
+def process_page(image):
+    """
+    Runs the full OCR pipeline on a single page:
+    preprocessing followed by Tesseract, EasyOCR and PaddleOCR, whose words
+    are merged into one result per word (see ensemble_ocr.merge_word_results).
+    Oversized pages are OCR'd in overlapping tiles (see processors.tiling).
+    Tesseract and EasyOCR only load the languages of the page's script.
+    With settings.LAYOUT_ENABLED the engines only see the text blocks found
+    by the layout model (see ocr_engines.layout_ocr).
+
+    Args:
+        image: Page as a NumPy array (grayscale or BGR), or a path to the page image.
+
+    Returns:
+        list: Merged word results (text, confidence, box, the 'engines' that read
+        it, line) in reading order; with LAYOUT_ENABLED, the words of every engine
+        per block, each with its 'engine'.
+    """
+    if isinstance(image, str):
+        path = image
+        image = cv2.imread(path)
+        if image is None:
+            raise ValueError(f"Could not load image at {path}")
+
+    # A page seen before skips preprocessing and all three engines
+    cache_key = _cache_key(image)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Stages are timed on the caller's tracer, if any
+    with span('preprocess'):
+        preprocessed_img = preprocess_image(image)
+
+    languages = PAGE_LANGUAGES
+    if settings.LANGUAGE_DETECTION:
+        # English-only pages skip the Arabic models and vice versa
+        with span('language_detection'):
+            languages = route_languages(preprocessed_img, PAGE_LANGUAGES)
+
+    if settings.LAYOUT_ENABLED:
+        from ocr_engines.layout_ocr import run_layout_ocr
+        with span('layout'):
+            # Columns of Arabic-only pages are read right to left
+            results = run_layout_ocr(preprocessed_img, languages=languages, rtl=is_rtl_language(languages))
+        result_cache.put(cache_key, results)
+        return results
+    tesseract_languages = tesseract_lang(languages)
+    easyocr_languages = engine_languages('easyocr', languages)
+
+    # The page result is cached as a whole, so the engines skip the cache
+    if is_oversized(preprocessed_img):
+        # Large-format scans are OCR'd tile by tile to bound the engines' memory
+        with span('engine', engine='tesseract', tiled=True):
+            tesseract_results = run_tiled(preprocessed_img,
+                                          lambda tile: run_tesseract_ocr(tile, lang=tesseract_languages, cache=False))
+        with span('engine', engine='easyocr', tiled=True):
+            easyocr_results = run_tiled(preprocessed_img,
+                                        lambda tile: run_easyocr(tile, languages=easyocr_languages, cache=False))
+        with span('engine', engine='paddleocr', tiled=True):
+            paddleocr_results = run_tiled(preprocessed_img,
+                                          lambda tile: run_paddleocr(tile, languages='en', cache=False))
+    else:
+        with span('engine', engine='tesseract'):
+            tesseract_results = run_tesseract_ocr(preprocessed_img, lang=tesseract_languages, cache=False)
+        with span('engine', engine='easyocr'):
+            easyocr_results = run_easyocr(preprocessed_img, languages=easyocr_languages, cache=False)
+        with span('engine', engine='paddleocr'):
+            paddleocr_results = run_paddleocr(preprocessed_img, languages='en', cache=False)
+
+    # One word per position, voted on by the engines that read it, as the OCR service returns
+    with span('merge'):
+        results = merge_word_results({'tesseract': tesseract_results, 'easyocr': easyocr_results,
+                                      'paddleocr': paddleocr_results})
+    result_cache.put(cache_key, results)
+    return results
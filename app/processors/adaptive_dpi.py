@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+from config import settings
+
+def estimate_text_height(image, min_components=20):
+    """
+    Estimates the dominant glyph height of a page.
+
+    The page is binarized and its connected components are measured; specks,
+    rules, and figures are ignored, and the median height of the remaining
+    components (mostly single characters) is returned.
+
+    Args:
+        image (numpy.ndarray): Grayscale page, dark text on a light background.
+        min_components (int): Fewer character-sized components than this means
+            the page has too little text to measure.
+    Returns:
+        float: Median glyph height in pixels, or None if it cannot be estimated.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+    # Row 0 is the background
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    page_height, page_width = image.shape[:2]
+    glyphs = ((heights >= 2) & (widths >= 1)
+              & (heights < page_height * 0.05) & (widths < page_width * 0.05)
+              & (widths < heights * 4))
+    if np.count_nonzero(glyphs) < min_components:
+        return None
+    return float(np.median(heights[glyphs]))
+
+def choose_dpi(preview, preview_dpi, target_height=None, min_dpi=None, max_dpi=None, step=10):
+    """
+    Picks the lowest DPI that renders a page's text at the engines' preferred size.
+
+    Args:
+        preview (numpy.ndarray): The page rendered at `preview_dpi`.
+        preview_dpi (int): Resolution of the preview.
+        target_height (float): Wanted median glyph height in pixels
+            (defaults to settings.PDF_TARGET_TEXT_HEIGHT).
+        min_dpi (int): Lowest DPI returned (defaults to settings.PDF_MIN_DPI).
+        max_dpi (int): Highest DPI returned (defaults to settings.PDF_MAX_DPI).
+        step (int): The DPI is rounded up to a multiple of this.
+    Returns:
+        int: The DPI to render the page at; settings.PDF_DPI when the page has
+        too little text to measure.
+    """
+    target_height = target_height or settings.PDF_TARGET_TEXT_HEIGHT
+    min_dpi = min_dpi or settings.PDF_MIN_DPI
+    max_dpi = max_dpi or settings.PDF_MAX_DPI
+
+    height = estimate_text_height(preview)
+    if height is None:
+        return settings.PDF_DPI
+    dpi = int(np.ceil(preview_dpi * target_height / height / step)) * step
+    return min(max(dpi, min_dpi), max_dpi)
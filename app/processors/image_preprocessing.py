@@ -1,9 +1,39 @@
 import cv2
 import numpy as np
 
+from processors.tiling import is_oversized, map_strips
+
+# Parameters of the preprocessing steps; part of the OCR result cache key
+PREPROCESSING_PARAMS = {
+    'bilateral_diameter': 9,
+    'bilateral_sigma_color': 75,
+    'bilateral_sigma_space': 75,
+    'threshold_block_size': 11,
+    'threshold_c': 2,
+}
+
+# Size of the copy the skew angle of an oversized page is measured on
+DESKEW_SAMPLE_PIXELS = 4_000_000
+
+def decode_image(data, grayscale=True):
+    """
+    Decodes an uploaded image file held in memory.
+    Args:
+        data (bytes): Encoded image (PNG, JPEG...).
+        grayscale (bool): Decode straight to a single channel, as needed by preprocess_image.
+    Returns:
+        numpy.ndarray: The decoded image.
+    """
+    flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("Could not decode the uploaded image")
+    return image
+
 def preprocess_image(image_path):
     """
     Preprocess the input image to enhance OCR accuracy.
+    Accepts a path or an already loaded image (BGR or single-channel array).
     Steps:
     - Convert to grayscale
     - Remove noise
@@ -11,23 +41,43 @@ def preprocess_image(image_path):
     - Deskew the image
     - Sharpen edges
     """
-    # Read the image
-    image = cv2.imread(image_path)
+    # Read the image unless it is already loaded
+    if isinstance(image_path, str):
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not read the image at path: {image_path}")
+    else:
+        image = image_path
 
-    if image is None:
-        raise ValueError(f"Could not read the image at path: {image_path}")
+    # Convert to grayscale unless the page was loaded as grayscale already
+    if image.ndim == 2:
+        gray = image
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-    # Convert to grayscale
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def denoise_and_threshold(gray):
+        # Apply bilateral filter to remove noise while keeping edges sharp
+        filtered = cv2.bilateralFilter(
+            gray,
+            PREPROCESSING_PARAMS['bilateral_diameter'],
+            PREPROCESSING_PARAMS['bilateral_sigma_color'],
+            PREPROCESSING_PARAMS['bilateral_sigma_space']
+        )
 
-    # Apply bilateral filter to remove noise while keeping edges sharp
-    filtered = cv2.bilateralFilter(gray, 9, 75, 75)
+        # Apply adaptive thresholding
+        return cv2.adaptiveThreshold(
+            filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+            cv2.THRESH_BINARY,
+            PREPROCESSING_PARAMS['threshold_block_size'],
+            PREPROCESSING_PARAMS['threshold_c']
+        )
 
-    # Apply adaptive thresholding
-    thresh = cv2.adaptiveThreshold(
-        filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-        cv2.THRESH_BINARY, 11, 2
-    )
+    if is_oversized(gray):
+        # Large-format scans are filtered in strips; the margin covers both filter radii
+        margin = PREPROCESSING_PARAMS['bilateral_diameter'] + PREPROCESSING_PARAMS['threshold_block_size']
+        thresh = map_strips(denoise_and_threshold, gray, margin)
+    else:
+        thresh = denoise_and_threshold(gray)
 
     # Deskew the image
     deskewed = deskew(thresh)
@@ -40,8 +90,13 @@ def preprocess_image(image_path):
 def deskew(image):
     """
     Corrects skew in the image using image moments.
+    The angle of oversized pages is measured on a downsampled copy.
     """
-    coords = np.column_stack(np.where(image > 0))
+    sample = image
+    if is_oversized(image):
+        scale = (DESKEW_SAMPLE_PIXELS / (image.shape[0] * image.shape[1])) ** 0.5
+        sample = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+    coords = np.column_stack(np.where(sample > 0))
     if coords.shape[0] == 0:
         return image  # No text detected
 
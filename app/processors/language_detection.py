@@ -0,0 +1,88 @@
+import logging
+
+import cv2
+import numpy as np
+
+from config import settings
+from ocr_engines.languages import LANGUAGE_SCRIPTS
+
+logger = logging.getLogger(__name__)
+
+# Longest side of the image handed to OSD; script detection does not need full resolution
+OSD_MAX_SIDE = 2500
+
+def _gray(image):
+    """Grayscale copy of a page, shrunk so its longest side is at most OSD_MAX_SIDE."""
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    scale = OSD_MAX_SIDE / max(image.shape[:2])
+    if scale < 1:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image
+
+def detect_script(image):
+    """
+    Detects the dominant script of a page with Tesseract's orientation and
+    script detection (OSD), which is much cheaper than recognizing the page.
+
+    Args:
+        image (numpy.ndarray or PIL.Image.Image): The page.
+    Returns:
+        tuple: (script, confidence), e.g. ('Arabic', 4.2), or (None, 0.0) if
+        it could not be detected (too little text, or no OSD data installed).
+    """
+    import pytesseract
+
+    try:
+        osd = pytesseract.image_to_osd(_gray(image), output_type=pytesseract.Output.DICT)
+    except Exception as e:
+        logger.debug(f"Script detection failed: {str(e)}")
+        return None, 0.0
+    return osd['script'], float(osd['script_conf'])
+
+def _text_bands(gray, count, min_ink=0.002):
+    """Horizontal bands of a page that hold some ink; empty bands have no script to detect."""
+    for band in np.array_split(gray, count, axis=0):
+        if band.size and np.count_nonzero(band < 128) >= min_ink * band.size:
+            yield band
+
+def route_languages(image, languages, min_confidence=None, bands=None):
+    """
+    Narrows the candidate languages of a page down to those written in its script.
+
+    OSD only reports the dominant script of what it is shown, so the page
+    is checked in horizontal bands. Languages are only dropped when every
+    band holding text reports the same script with enough confidence; a
+    mixed-script page (e.g. Arabic with English lines) or any uncertain band
+    keeps every candidate, so minority-script words keep their models.
+
+    Args:
+        image (numpy.ndarray or PIL.Image.Image): The page.
+        languages (list): Candidate two-letter language codes, e.g. ['en', 'ar'].
+        min_confidence (float): Minimum OSD script confidence per band
+            (defaults to settings.SCRIPT_MIN_CONFIDENCE).
+        bands (int): Number of horizontal bands checked
+            (defaults to settings.SCRIPT_DETECTION_BANDS).
+    Returns:
+        list: The languages the page needs, in the given order.
+    """
+    if isinstance(languages, str):
+        languages = [languages]
+    languages = list(languages)
+    scripts = {LANGUAGE_SCRIPTS.get(lang[:2].lower()) for lang in languages}
+    if len(scripts) <= 1:
+        # A single script to choose from; nothing to detect
+        return languages
+
+    min_confidence = settings.SCRIPT_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    detected = set()
+    for band in _text_bands(_gray(image), bands or settings.SCRIPT_DETECTION_BANDS):
+        script, confidence = detect_script(band)
+        if script is None or confidence < min_confidence:
+            return languages
+        detected.add(script)
+    if len(detected) != 1:
+        return languages
+    routed = [lang for lang in languages if LANGUAGE_SCRIPTS.get(lang[:2].lower()) in detected]
+    return routed or languages
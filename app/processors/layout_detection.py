@@ -1,26 +1,114 @@
 # app/processors/layout_detection.py
 
-import layoutparser as lp
-from PIL import Image
 import os
+import cv2
+import numpy as np
+from ocr_engines.engine_pool import get_engine
 
-def detect_layout(image_path, model_name='lp://PubLayNet/faster_rcnn_R_50_FPN_3x/config', label_map=None):
+DEFAULT_MODEL = 'lp://PubLayNet/faster_rcnn_R_50_FPN_3x/config'
+
+# PubLayNet classes
+DEFAULT_LABEL_MAP = {0: "Text", 1: "Title", 2: "List", 3: "Table", 4: "Figure"}
+
+TEXT_BLOCK_TYPES = ('Text', 'Title', 'List')
+TABLE_BLOCK_TYPES = ('Table',)
+
+def load_layout_model(model_name=DEFAULT_MODEL, label_map=None, score_threshold=0.8):
+    """Returns the process-wide LayoutParser model for these settings, loading it on first use."""
+    label_map = label_map or DEFAULT_LABEL_MAP
+    # Engine pool keys must be hashable
+    return get_engine('layout', model_name=model_name, score_threshold=score_threshold,
+                      label_map=tuple(sorted(label_map.items())))
+
+def detect_layout(image_path, model_name=DEFAULT_MODEL, label_map=None, score_threshold=0.8):
     """
     Detect layout elements (tables, text blocks, figures) from an image.
 
+    The Detectron2 model is loaded once per process through the engine pool
+    and reused by every later call with the same settings.
+
     Args:
-        image_path (str): Path to the image file.
+        image_path (str or numpy.ndarray): Path to the image file, or the loaded page
+            (grayscale or BGR).
         model_name (str): Pre-trained model URL from LayoutParser.
         label_map (dict): Custom label mapping for detected blocks (optional).
+        score_threshold (float): Minimum detection score of a block.
+
+    Returns:
+        list: List of dictionaries containing block information:
+            - type: Block label ('Text', 'Title', 'List', 'Table', 'Figure')
+            - box: (x1, y1, x2, y2) in pixels
+            - score: Detection score
+    """
+    if isinstance(image_path, str):
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image not found: {image_path}")
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not load image at {image_path}")
+    else:
+        image = image_path
+
+    # Detectron2 expects a 3-channel RGB array
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    else:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    layout = load_layout_model(model_name, label_map, score_threshold).detect(image)
+
+    blocks = []
+    for block in layout:
+        x1, y1, x2, y2 = block.coordinates
+        blocks.append({
+            'type': block.type,
+            'box': (int(x1), int(y1), int(np.ceil(x2)), int(np.ceil(y2))),
+            'score': float(block.score) if block.score is not None else None
+        })
+    return blocks
+
+def order_blocks(blocks, page_width, rtl=False, full_width_ratio=0.6):
+    """
+    Sorts layout blocks into reading order.
+
+    Blocks spanning most of the page width (headings, wide tables) split the
+    page into horizontal sections. Inside a section, blocks are grouped into
+    columns by horizontal overlap; columns are read left to right (right to
+    left for RTL pages) and each column top to bottom.
+
+    Args:
+        blocks (list): Blocks from `detect_layout`.
+        page_width (int): Width of the page in pixels.
+        rtl (bool): Read columns right to left.
+        full_width_ratio (float): Width, relative to the page, from which a block spans all columns.
 
     Returns:
-        list: List of dictionaries containing block information.
+        list: The same blocks in reading order.
     """
-    if not os.path.exists(image_path):
-        raise FileNotFoundError(f"Image not found: {image_path}")
+    ordered = []
+    section = []
 
-    image = Image.open(image_path).convert('RGB')
+    def flush_section():
+        columns = []
+        for block in sorted(section, key=lambda b: b['box'][0]):
+            x1, _, x2, _ = block['box']
+            if columns and x1 < columns[-1]['x2']:
+                columns[-1]['blocks'].append(block)
+                columns[-1]['x2'] = max(columns[-1]['x2'], x2)
+            else:
+                columns.append({'x1': x1, 'x2': x2, 'blocks': [block]})
+        if rtl:
+            columns.reverse()
+        for column in columns:
+            ordered.extend(sorted(column['blocks'], key=lambda b: b['box'][1]))
+        section.clear()
 
-    model = lp.Detectron2LayoutModel(
-        model_name,
-        extra_config=["MODEL.ROI_HEADS.SCORE_THRESH_TEST", 0.8],
+    for block in sorted(blocks, key=lambda b: b['box'][1]):
+        x1, _, x2, _ = block['box']
+        if x2 - x1 >= full_width_ratio * page_width:
+            flush_section()
+            ordered.append(block)
+        else:
+            section.append(block)
+    flush_section()
+    return ordered
@@ -0,0 +1,216 @@
+import threading
+import collections
+
+import cv2
+import numpy as np
+
+from config import settings
+
+# Pages are hashed and measured for ink on a grid this wide
+TRIAGE_WIDTH = 256
+# Duplicates are verified on a thumbnail this wide, where single digits still differ
+VERIFY_WIDTH = 1024
+
+def _gray(image):
+    image = np.asarray(image)
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return image
+
+def _resize(image, width, interpolation):
+    height = max(1, int(round(image.shape[0] * width / image.shape[1])))
+    return cv2.resize(image, (width, height), interpolation=interpolation)
+
+def ink_mask(gray, ink_level=128, min_area=4):
+    """
+    Dark pixels of a page at full resolution, without specks smaller than
+    `min_area` pixels (scanner dust, salt and pepper noise).
+
+    Args:
+        gray (numpy.ndarray): Grayscale page.
+        ink_level (int): Gray level below which a pixel counts as ink.
+        min_area (int): Smallest connected group of dark pixels kept.
+    Returns:
+        numpy.ndarray: uint8 mask, 1 for ink.
+    """
+    mask = (gray < ink_level).astype(np.uint8)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_area
+    keep[0] = False
+    return keep[labels].astype(np.uint8)
+
+def pool_ink(mask, width):
+    """
+    Shrinks an ink mask to `width` columns, marking every cell that holds
+    any ink (a max-pool), so thin strokes survive the downsampling.
+    """
+    return _resize(mask * 255, width, cv2.INTER_AREA) > 0
+
+def ink_coverage(ink, border=0.03):
+    """
+    Share of cells holding ink on a pooled ink map (see `pool_ink`),
+    ignoring a margin where scanners leave shadows.
+
+    Args:
+        ink (numpy.ndarray): Boolean ink map.
+        border (float): Margin ignored on every side, relative to the page size.
+    """
+    height, width = ink.shape
+    dy, dx = int(height * border), int(width * border)
+    inner = ink[dy:height - dy, dx:width - dx]
+    return float(np.count_nonzero(inner)) / inner.size
+
+def dhash(thumbnail, size=16, dead_band=1.0):
+    """
+    Difference hash of a page: one bit per horizontally adjacent pair of a
+    size x (size + 1) copy, set where the right cell is brighter. Differences
+    within `dead_band` gray levels count as equal, so scanner noise on blank
+    paper does not flip bits.
+    """
+    small = cv2.resize(thumbnail.astype(np.float32), (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1] + dead_band).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+def page_difference(a, b):
+    """
+    Number of pixels of two equally sized page thumbnails differing by more
+    than a quarter of the gray range; scanner noise is averaged away on a
+    VERIFY_WIDTH thumbnail, but a changed digit is not.
+    """
+    return int(np.count_nonzero(cv2.absdiff(a, b) > 64))
+
+def page_signature(image, ink_level=None):
+    """
+    Measures a page for triage.
+
+    Returns:
+        dict: 'coverage' (share of ink cells, see `ink_coverage`), 'hash'
+        (see `dhash`) and 'thumbnail' (grayscale copy VERIFY_WIDTH wide).
+    """
+    gray = _gray(image)
+    mask = ink_mask(gray, settings.TRIAGE_INK_LEVEL if ink_level is None else ink_level)
+    return {
+        'coverage': ink_coverage(pool_ink(mask, TRIAGE_WIDTH)),
+        'hash': dhash(_resize(gray, TRIAGE_WIDTH, cv2.INTER_AREA)),
+        'thumbnail': _resize(gray, VERIFY_WIDTH, cv2.INTER_AREA),
+    }
+
+class PageIndex:
+    """
+    Rolling window of recently seen pages, for finding duplicates.
+
+    A page matches an earlier one when their difference hashes are within
+    `max_distance` bits and their VERIFY_WIDTH thumbnails differ in at most
+    `max_diff` pixels (see `page_difference`), so forms that share a layout
+    but carry different numbers or dates are not mistaken for each other. By
+    default an index covers one document; sharing one between documents
+    reuses text across them, so it must never be shared between tenants.
+    Safe to share between threads.
+
+    Args:
+        window (int): Number of pages remembered (defaults to settings.TRIAGE_WINDOW).
+        max_distance (int): Maximum Hamming distance between hashes
+            (defaults to settings.TRIAGE_MAX_DISTANCE).
+        max_diff (int): Maximum number of differing thumbnail pixels
+            (defaults to settings.TRIAGE_MAX_DIFF_PIXELS).
+    """
+
+    def __init__(self, window=None, max_distance=None, max_diff=None):
+        self.max_distance = settings.TRIAGE_MAX_DISTANCE if max_distance is None else max_distance
+        self.max_diff = settings.TRIAGE_MAX_DIFF_PIXELS if max_diff is None else max_diff
+        self._entries = collections.deque(maxlen=window or settings.TRIAGE_WINDOW)
+        self._lock = threading.Lock()
+
+    def find(self, signature, owner=None):
+        """
+        The most recent matching entry, or None. Entries whose result is not
+        known yet only match pages of the same `owner` (the same document run),
+        which are emitted after them.
+        """
+        with self._lock:
+            entries = list(self._entries)
+        for entry in reversed(entries):
+            if entry['result'] is None and entry['owner'] is not owner:
+                continue
+            if bin(signature['hash'] ^ entry['hash']).count('1') > self.max_distance:
+                continue
+            if entry['shape'] != signature['thumbnail'].shape:
+                continue
+            thumbnail = cv2.imdecode(entry['thumbnail'], cv2.IMREAD_GRAYSCALE)
+            if page_difference(thumbnail, signature['thumbnail']) <= self.max_diff:
+                return entry
+        return None
+
+    def add(self, signature, page, owner=None):
+        """Remembers a page; its 'result' is filled in once it has been OCR'd."""
+        # Text pages compress well; the window holds many of them
+        entry = {'hash': signature['hash'], 'thumbnail': cv2.imencode('.png', signature['thumbnail'])[1],
+                 'shape': signature['thumbnail'].shape, 'page': page, 'owner': owner, 'result': None}
+        with self._lock:
+            self._entries.append(entry)
+        return entry
+
+def triage_pages(images, page_numbers, plan, index=None, owner=None, blank_coverage=None):
+    """
+    Drops blank and duplicate pages from a page stream before OCR.
+
+    Every page gets a (page number, kind, entry) item on `plan`, in page
+    order and before the next page is yielded: kind is 'blank', 'duplicate'
+    (entry is the matching earlier page) or 'ocr' (entry is this page's
+    index entry, or None). Only 'ocr' pages are yielded; `merge_triaged`
+    puts the results back together.
+
+    Args:
+        images (iterable): Pages (PIL images or NumPy arrays).
+        page_numbers (iterable): Page number of each image.
+        plan (collections.deque): Receives the plan items.
+        index (PageIndex): Pages to match duplicates against; None disables triage.
+        owner: Token identifying this document run in the index (defaults to a new one).
+        blank_coverage (float): Ink coverage below which a page is blank
+            (defaults to settings.TRIAGE_BLANK_COVERAGE).
+    Yields:
+        The pages that need OCR.
+    """
+    blank_coverage = settings.TRIAGE_BLANK_COVERAGE if blank_coverage is None else blank_coverage
+    owner = owner or object()
+    for page_number, image in zip(page_numbers, images):
+        if index is None:
+            plan.append((page_number, 'ocr', None))
+            yield image
+            continue
+
+        signature = page_signature(image)
+        if signature['coverage'] < blank_coverage:
+            plan.append((page_number, 'blank', None))
+            continue
+        match = index.find(signature, owner)
+        if match is not None:
+            plan.append((page_number, 'duplicate', match))
+            continue
+        plan.append((page_number, 'ocr', index.add(signature, page_number, owner)))
+        yield image
+
+def merge_triaged(results, plan, blank, duplicate):
+    """
+    Yields (page number, result) for every page of a triaged stream, in page order.
+
+    Args:
+        results (iterable): OCR results of the pages `triage_pages` yielded, in order.
+        plan (collections.deque): The plan filled by `triage_pages`.
+        blank (callable): Returns the result of a blank page.
+        duplicate (callable): Takes the matching index entry and returns the
+            result of a duplicate page.
+    """
+    def skipped():
+        while plan and plan[0][1] != 'ocr':
+            page_number, kind, entry = plan.popleft()
+            yield page_number, blank() if kind == 'blank' else duplicate(entry)
+
+    for result in results:
+        # The plan already holds every page up to the one this result belongs to
+        yield from skipped()
+        page_number, _, entry = plan.popleft()
+        if entry is not None:
+            entry['result'] = result
+        yield page_number, result
+    yield from skipped()
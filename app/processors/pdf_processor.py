@@ -1,5 +1,167 @@
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
 import os
+import queue
+import tempfile
+import threading
+
+import numpy as np
+
+from config import settings
+from processors.adaptive_dpi import choose_dpi
+
+def iter_pdf_pages(pdf, dpi=300, window=None, prefetch=None, first_page=1, pages=None, **convert_kwargs):
+    """
+    Renders a PDF page by page and yields each page as soon as it is ready.
+
+    Pages are rendered in small windows (`first_page`/`last_page`) on a
+    background thread, which stays at most `prefetch` pages ahead of the
+    consumer. OCR can start on the first page while later pages are still
+    rendering, and only a handful of pages are held in memory at any time.
+
+    Args:
+        pdf (str or bytes): Path to the PDF file, or its raw bytes.
+        dpi (int or str): Dots per inch (quality of the output images), or 'auto'
+            to pick a DPI per page from a low-resolution preview (see `choose_dpi`).
+        window (int): Number of pages rendered per pdftoppm call.
+        prefetch (int): Maximum number of rendered pages waiting to be consumed.
+        first_page (int): 1-based page to start rendering at.
+        pages (iterable): 1-based page numbers to render instead of every page
+            from `first_page` on (e.g. the pages without a usable text layer).
+        **convert_kwargs: Extra arguments for pdf2image (fmt, grayscale, thread_count...).
+    Yields:
+        PIL.Image.Image: One image per page, in page order, with the DPI it was
+        rendered at in `image.info['dpi']`.
+    """
+    window = window or settings.PDF_RENDER_WINDOW
+    prefetch = prefetch or settings.PDF_PREFETCH_PAGES
+
+    temp_file = None
+    if isinstance(pdf, (bytes, bytearray)):
+        # Write the bytes once instead of once per window
+        temp_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        temp_file.write(pdf)
+        temp_file.close()
+        pdf_path = temp_file.name
+    else:
+        pdf_path = pdf
+
+    selected = sorted(set(pages)) if pages is not None else None
+    pages = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Block while the consumer is behind, but give up once it has gone away
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def render():
+        try:
+            for window_start, last_page in _render_windows(pdf_path, first_page, selected, window):
+                if dpi == 'auto':
+                    runs = _adaptive_runs(pdf_path, window_start, last_page, convert_kwargs.get('thread_count', 1))
+                else:
+                    runs = [(window_start, last_page, dpi)]
+                for run_start, run_end, run_dpi in runs:
+                    for page in convert_from_path(pdf_path, dpi=run_dpi, first_page=run_start,
+                                                  last_page=run_end, **convert_kwargs):
+                        page.info['dpi'] = (run_dpi, run_dpi)
+                        if not put(page):
+                            return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    renderer = threading.Thread(target=render, name='pdf-render', daemon=True)
+    renderer.start()
+
+    try:
+        while True:
+            item = pages.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        renderer.join()
+        if temp_file is not None:
+            os.unlink(temp_file.name)
+
+def _adaptive_runs(pdf_path, first_page, last_page, thread_count=1):
+    """
+    Chooses the DPI of every page of a window from a grayscale preview.
+
+    Returns:
+        list: (first_page, last_page, dpi) runs of consecutive pages sharing a DPI.
+    """
+    previews = convert_from_path(pdf_path, dpi=settings.PDF_PREVIEW_DPI, first_page=first_page,
+                                 last_page=last_page, grayscale=True, thread_count=thread_count)
+    runs = []
+    for page_number, preview in enumerate(previews, start=first_page):
+        page_dpi = choose_dpi(np.asarray(preview), settings.PDF_PREVIEW_DPI)
+        if runs and runs[-1][2] == page_dpi:
+            runs[-1][1] = page_number
+        else:
+            runs.append([page_number, page_number, page_dpi])
+    return [tuple(run) for run in runs]
+
+def _render_windows(pdf_path, first_page, selected, window):
+    """Yields (first_page, last_page) ranges of at most `window` consecutive pages."""
+    if selected is None:
+        page_count = pdfinfo_from_path(pdf_path)['Pages']
+        for window_start in range(first_page, page_count + 1, window):
+            yield window_start, min(window_start + window - 1, page_count)
+        return
+
+    window_start = None
+    for page in selected:
+        if page < first_page:
+            continue
+        if window_start is not None and page == last_page + 1 and page - window_start < window:
+            last_page = page
+            continue
+        if window_start is not None:
+            yield window_start, last_page
+        window_start = last_page = page
+    if window_start is not None:
+        yield window_start, last_page
+
+def pdf_page_count(pdf):
+    """Returns the number of pages of a PDF (path or raw bytes) without rendering it."""
+    if isinstance(pdf, (bytes, bytearray)):
+        return pdfinfo_from_bytes(pdf)['Pages']
+    return pdfinfo_from_path(pdf)['Pages']
+
+def iter_pdf_arrays(pdf, dpi=300, grayscale=True, **kwargs):
+    """
+    Renders a PDF page by page straight into NumPy arrays.
+
+    Pages are piped out of pdftoppm as raw PPM/PGM and never encoded or
+    written to disk. Grayscale rendering (the default) produces the
+    single-channel arrays `preprocess_image` works on, so no color
+    conversion is needed afterwards.
+
+    Args:
+        pdf (str or bytes): Path to the PDF file, or its raw bytes.
+        dpi (int or str): Dots per inch (quality of the output images), or 'auto'.
+        grayscale (bool): Render single-channel pages instead of RGB.
+        **kwargs: Extra arguments for `iter_pdf_pages`.
+    Yields:
+        numpy.ndarray: One array per page, in page order.
+    """
+    for page in iter_pdf_pages(pdf, dpi=dpi, grayscale=grayscale, **kwargs):
+        yield np.asarray(page)
+
+def pdf_dpi():
+    """The `dpi` argument for `iter_pdf_pages` configured in settings."""
+    return 'auto' if settings.PDF_ADAPTIVE_DPI else settings.PDF_DPI
 
 def pdf_to_images(pdf_path, output_folder, dpi=300):
     """
@@ -7,20 +169,19 @@ def pdf_to_images(pdf_path, output_folder, dpi=300):
     Args:
         pdf_path (str): Path to the input PDF file.
         output_folder (str): Folder to save the output images.
-        dpi (int): Dots per inch (quality of the output images).
+        dpi (int or str): Dots per inch (quality of the output images), or 'auto'
+            to choose it per page; the DPI is stored in every PNG.
     Returns:
         list: List of paths to the generated images.
     """
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
-    # Convert PDF to images
-    pages = convert_from_path(pdf_path, dpi=dpi)
-
+    # Convert PDF to images, saving each page as soon as it is rendered
     image_paths = []
-    for idx, page in enumerate(pages):
+    for idx, page in enumerate(iter_pdf_pages(pdf_path, dpi=dpi)):
         image_filename = os.path.join(output_folder, f"page_{idx + 1}.png")
-        page.save(image_filename, 'PNG')
+        page.save(image_filename, 'PNG', dpi=page.info['dpi'])
         image_paths.append(image_filename)
 
     return image_paths
@@ -0,0 +1,257 @@
+import os
+import shutil
+import logging
+import tempfile
+import contextlib
+import unicodedata
+import subprocess
+import xml.etree.ElementTree as ET
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def _poppler_tool(name):
+    return shutil.which(name) or os.path.join(settings.POPPLER_PATH, name)
+
+@contextlib.contextmanager
+def _pdf_path(pdf):
+    """Path of a PDF given as a path or as raw bytes (written to a temporary file)."""
+    if not isinstance(pdf, (bytes, bytearray)):
+        yield pdf
+        return
+    temp_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    try:
+        temp_file.write(pdf)
+        temp_file.close()
+        yield temp_file.name
+    finally:
+        os.unlink(temp_file.name)
+
+def _local(tag):
+    # pdftotext writes XHTML; drop the namespace
+    return tag.rsplit('}', 1)[-1]
+
+def extract_text_layer(pdf, first_page=None, last_page=None, dpi=None):
+    """
+    Extracts the embedded text of a PDF with word boxes, without rendering it.
+
+    Runs poppler's `pdftotext -bbox-layout` and parses its output as it is
+    produced.
+
+    Args:
+        pdf (str or bytes): Path to the PDF file, or its raw bytes.
+        first_page (int): First page to extract (1-based, default: the first page).
+        last_page (int): Last page to extract (default: the last page).
+        dpi (int): Resolution the boxes are scaled to, so they match the boxes of
+            pages rasterized for OCR (defaults to settings.PDF_DPI).
+    Returns:
+        list: One dict per page with
+            - page: 1-based page number
+            - width, height: Page size in pixels at `dpi`
+            - dpi: The resolution of the boxes
+            - words: Dicts with text, box (x, y, w, h) and line (index within the page)
+    Raises:
+        FileNotFoundError: If pdftotext is not installed.
+        RuntimeError: If pdftotext fails on the document.
+    """
+    dpi = dpi or settings.PDF_DPI
+    scale = dpi / 72.0
+
+    command = [_poppler_tool('pdftotext'), '-bbox-layout', '-q']
+    if first_page:
+        command += ['-f', str(first_page)]
+    if last_page:
+        command += ['-l', str(last_page)]
+    pages = []
+    with _pdf_path(pdf) as pdf_path:
+        process = subprocess.Popen(command + [pdf_path, '-'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            page_number = (first_page or 1) - 1
+            line_index = 0
+            for event, element in ET.iterparse(process.stdout, events=('start', 'end')):
+                tag = _local(element.tag)
+                if event == 'start':
+                    if tag == 'page':
+                        page_number += 1
+                        line_index = 0
+                        pages.append({
+                            'page': page_number,
+                            'width': int(round(float(element.get('width')) * scale)),
+                            'height': int(round(float(element.get('height')) * scale)),
+                            'dpi': dpi,
+                            'words': []
+                        })
+                    continue
+
+                if tag == 'word' and element.text and element.text.strip():
+                    x0, y0 = float(element.get('xMin')) * scale, float(element.get('yMin')) * scale
+                    x1, y1 = float(element.get('xMax')) * scale, float(element.get('yMax')) * scale
+                    pages[-1]['words'].append({
+                        'text': element.text.strip(),
+                        'box': (int(round(x0)), int(round(y0)), int(round(x1 - x0)), int(round(y1 - y0))),
+                        'line': line_index
+                    })
+                elif tag == 'line':
+                    line_index += 1
+                    element.clear()
+                elif tag == 'page':
+                    element.clear()
+        finally:
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise RuntimeError(f"pdftotext failed: {stderr.decode(errors='replace').strip()}")
+
+    return pages
+
+def _parse_image_list(output):
+    """
+    Parses `pdfimages -list` output into {page number: [(width, height), ...]},
+    the displayed size in inches of every image drawn on the page.
+    """
+    images = {}
+    for line in output.splitlines()[2:]:
+        fields = line.split()
+        # page num type width height color comp bpc enc interp object ID x-ppi y-ppi size ratio
+        if len(fields) < 14 or fields[2] != 'image':
+            continue
+        width, height = int(fields[3]), int(fields[4])
+        x_ppi, y_ppi = float(fields[12]), float(fields[13])
+        if x_ppi > 0 and y_ppi > 0:
+            images.setdefault(int(fields[0]), []).append((width / x_ppi, height / y_ppi))
+    return images
+
+def list_page_images(pdf, first_page=None, last_page=None):
+    """
+    Lists the raster images drawn on each page of a PDF with poppler's
+    `pdfimages -list`, without extracting them.
+
+    Returns:
+        dict: {page number: [(width, height) in inches, ...]}
+    Raises:
+        FileNotFoundError: If pdfimages is not installed.
+        RuntimeError: If pdfimages fails on the document.
+    """
+    command = [_poppler_tool('pdfimages'), '-list', '-q']
+    if first_page:
+        command += ['-f', str(first_page)]
+    if last_page:
+        command += ['-l', str(last_page)]
+    with _pdf_path(pdf) as pdf_path:
+        process = subprocess.run(command + [pdf_path], capture_output=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"pdfimages failed: {process.stderr.decode(errors='replace').strip()}")
+    return _parse_image_list(process.stdout.decode(errors='replace'))
+
+def image_coverage(page, images):
+    """Share of a page's area covered by its raster images (see `list_page_images`), at most 1."""
+    page_area = (page['width'] / page['dpi']) * (page['height'] / page['dpi'])
+    if page_area <= 0:
+        return 0.0
+    return min(1.0, sum(width * height for width, height in images) / page_area)
+
+def text_coverage(page):
+    """Share of a page's area covered by the boxes of its text-layer words."""
+    page_area = page['width'] * page['height']
+    if page_area <= 0:
+        return 0.0
+    return min(1.0, sum(word['box'][2] * word['box'][3] for word in page['words']) / page_area)
+
+def _valid_char(ch):
+    if ch == '\ufffd':
+        return False
+    # Letters, marks, numbers, punctuation and symbols; not controls or private use glyphs
+    return unicodedata.category(ch)[0] in 'LMNPS'
+
+def classify_page(page, min_words=None, min_valid_ratio=None, max_word_length=30,
+                  min_text_coverage=None, max_image_coverage=None):
+    """
+    Decides whether the text layer of a page can be used instead of OCR.
+
+    Scanned pages have no text layer at all, and PDFs with broken font
+    encodings produce replacement characters, private-use glyphs or words
+    glued together; all of these go to OCR. So do scans carrying only a
+    stamp, header or page number as text (the words cover too little of
+    the page) and scans under an invisible OCR layer, which may be stale or
+    incomplete (the page is mostly raster).
+
+    Args:
+        page (dict): A page from `extract_text_layer`, optionally with
+            'image_coverage' (see `image_coverage`).
+        min_words (int): Fewer words than this means the page is (mostly) an image
+            (defaults to settings.TEXT_LAYER_MIN_WORDS).
+        min_valid_ratio (float): Minimum share of ordinary characters
+            (defaults to settings.TEXT_LAYER_MIN_VALID_RATIO).
+        max_word_length (float): Maximum average word length.
+        min_text_coverage (float): Minimum share of the page covered by word boxes
+            (defaults to settings.TEXT_LAYER_MIN_TEXT_COVERAGE).
+        max_image_coverage (float): Maximum share of the page covered by raster images
+            (defaults to settings.TEXT_LAYER_MAX_IMAGE_COVERAGE).
+    Returns:
+        tuple: (trusted, reason)
+    """
+    min_words = settings.TEXT_LAYER_MIN_WORDS if min_words is None else min_words
+    min_valid_ratio = settings.TEXT_LAYER_MIN_VALID_RATIO if min_valid_ratio is None else min_valid_ratio
+    if min_text_coverage is None:
+        min_text_coverage = settings.TEXT_LAYER_MIN_TEXT_COVERAGE
+    if max_image_coverage is None:
+        max_image_coverage = settings.TEXT_LAYER_MAX_IMAGE_COVERAGE
+
+    words = page['words']
+    if len(words) < min_words:
+        return False, 'no text layer'
+    if page.get('image_coverage', 0.0) > max_image_coverage:
+        return False, 'scanned page'
+
+    text = ''.join(word['text'] for word in words)
+    valid_ratio = sum(_valid_char(ch) for ch in text) / len(text)
+    if valid_ratio < min_valid_ratio:
+        return False, 'garbled text layer'
+    if len(text) / len(words) > max_word_length:
+        return False, 'missing word breaks'
+    if text_coverage(page) < min_text_coverage:
+        return False, 'sparse text layer'
+    return True, 'text layer'
+
+def text_layer_result(page):
+    """
+    Turns a trusted text-layer page into a page result shaped like
+    OCRProcessor._process_image's, with every word at full confidence.
+    """
+    words = [dict(word, confidence=100.0, engines=['text_layer']) for word in page['words']]
+    lines = {}
+    for word in words:
+        lines.setdefault(word['line'], []).append(word['text'])
+    return {
+        'text': "\n".join(" ".join(line) for _, line in sorted(lines.items())),
+        'confidence': 1.0,
+        'engine_used': 'text_layer',
+        'words': words,
+        'all_engines': [],
+        'source': 'text_layer',
+        'dpi': page['dpi']
+    }
+
+def classify_pdf(pdf, first_page=None):
+    """
+    Extracts and classifies the text layer of every page of a PDF.
+
+    Returns:
+        list: The pages of `extract_text_layer`, each with 'image_coverage',
+        'trusted' and 'reason' added, or None if the text layer or the images
+        cannot be read (e.g. poppler is not installed), in which case every
+        page needs OCR.
+    """
+    try:
+        with _pdf_path(pdf) as pdf_path:
+            pages = extract_text_layer(pdf_path, first_page=first_page)
+            images = list_page_images(pdf_path, first_page=first_page)
+    except (OSError, RuntimeError, ET.ParseError, ValueError) as e:
+        logger.warning(f"Could not read the PDF text layer, OCR'ing every page: {str(e)}")
+        return None
+    for page in pages:
+        page['image_coverage'] = image_coverage(page, images.get(page['page'], []))
+        page['trusted'], page['reason'] = classify_page(page)
+    trusted = sum(page['trusted'] for page in pages)
+    logger.info(f"{trusted} of {len(pages)} PDF pages have a usable text layer")
+    return pages
@@ -0,0 +1,173 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def is_oversized(image):
+    """True if a page is too large to be preprocessed or OCR'd in one piece."""
+    return image.shape[0] * image.shape[1] > settings.TILE_MAX_PIXELS
+
+def map_strips(func, image, margin, strip_height=None):
+    """
+    Applies a neighbourhood filter to an image one horizontal strip at a time.
+
+    Every strip is filtered together with `margin` rows above and below it,
+    and only its own rows are kept, so the result is the same as filtering
+    the whole image when `margin` covers the filter radius, while the
+    filter's temporary buffers only ever hold one strip.
+
+    Args:
+        func (callable): Filter taking and returning an array of the same height.
+        image (numpy.ndarray): Image to filter.
+        margin (int): Rows of context added around every strip.
+        strip_height (int): Rows per strip (defaults to settings.TILE_SIZE).
+    Returns:
+        numpy.ndarray: The filtered image.
+    """
+    strip_height = strip_height or settings.TILE_SIZE
+    height = image.shape[0]
+    output = None
+    for top in range(0, height, strip_height):
+        bottom = min(top + strip_height, height)
+        context_top, context_bottom = max(0, top - margin), min(height, bottom + margin)
+        filtered = func(image[context_top:context_bottom])
+        if output is None:
+            output = np.empty((height,) + filtered.shape[1:], dtype=filtered.dtype)
+        output[top:bottom] = filtered[top - context_top:bottom - context_top]
+    return output
+
+def plan_tiles(height, width, tile_size, overlap):
+    """
+    Splits a page into overlapping tiles.
+
+    Every tile also gets a core: the tiles' cores split the overlaps down
+    the middle, so they cover the page exactly once.
+
+    Returns:
+        list: ((x, y, w, h) of the tile, (x1, y1, x2, y2) of its core) pairs, row by row.
+    """
+    xs, x_cores = _axis(width, tile_size, overlap)
+    ys, y_cores = _axis(height, tile_size, overlap)
+    tiles = []
+    for y, (core_y1, core_y2) in zip(ys, y_cores):
+        for x, (core_x1, core_x2) in zip(xs, x_cores):
+            tiles.append(((x, y, min(tile_size, width - x), min(tile_size, height - y)),
+                          (core_x1, core_y1, core_x2, core_y2)))
+    return tiles
+
+def _axis(length, tile_size, overlap):
+    if length <= tile_size:
+        return [0], [(0, length)]
+    starts = list(range(0, length - tile_size, tile_size - overlap)) + [length - tile_size]
+    # The core boundary between two tiles is the middle of their overlap
+    bounds = [0] + [(start + previous + tile_size) / 2 for previous, start in zip(starts, starts[1:])] + [length]
+    return starts, list(zip(bounds, bounds[1:]))
+
+def tile_layout(budget=None, bytes_per_pixel=None):
+    """
+    Tile size and number of tiles processed at once that fit a memory budget.
+
+    Args:
+        budget (int): Bytes available for tiles in flight (defaults to settings.TILE_MEMORY_BUDGET).
+        bytes_per_pixel (float): Peak memory an engine needs per tile pixel
+            (defaults to settings.TILE_BYTES_PER_PIXEL).
+    Returns:
+        tuple: (tile_size, workers)
+    """
+    budget = budget or settings.TILE_MEMORY_BUDGET
+    bytes_per_pixel = bytes_per_pixel or settings.TILE_BYTES_PER_PIXEL
+    tile_size = min(settings.TILE_SIZE, int((budget / bytes_per_pixel) ** 0.5))
+    # Tiles narrower than twice the overlap would be mostly overlap
+    tile_size = max(tile_size, 2 * settings.TILE_OVERLAP)
+    workers = int(budget // (tile_size * tile_size * bytes_per_pixel))
+    return tile_size, max(1, min(workers, os.cpu_count() or 1))
+
+def translate_box(box, dx, dy):
+    """Moves a Tesseract (x, y, w, h) box or a list of corner points by (dx, dy)."""
+    if len(box) == 4 and all(np.isscalar(value) for value in box):
+        x, y, w, h = box
+        return (x + dx, y + dy, w, h)
+    return [[float(x) + dx, float(y) + dy] for x, y in box]
+
+def _bounds(box):
+    if len(box) == 4 and all(np.isscalar(value) for value in box):
+        x, y, w, h = box
+        return float(x), float(y), float(x + w), float(y + h)
+    xs = [float(point[0]) for point in box]
+    ys = [float(point[1]) for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+def run_tiled(image, recognize, tile_size=None, overlap=None, workers=None):
+    """
+    OCRs an oversized page tile by tile.
+
+    Tiles overlap so that every word lies wholly inside at least one tile.
+    A word is kept only by the tile whose core contains its center; words
+    cut by a tile edge that survive this are removed when they overlap a
+    more confident word from another tile.
+
+    Args:
+        image (numpy.ndarray): The page.
+        recognize (callable): Runs OCR on a tile and returns its word results
+            (dicts with 'text', 'confidence' and 'box').
+        tile_size (int): Tile width and height in pixels; with `workers`,
+            defaults to what fits settings.TILE_MEMORY_BUDGET (see `tile_layout`).
+        overlap (int): Pixels shared by neighbouring tiles (defaults to settings.TILE_OVERLAP).
+        workers (int): Tiles recognized in parallel.
+    Returns:
+        list: Word results with boxes in page coordinates, tile by tile.
+    """
+    budget_tile_size, budget_workers = tile_layout()
+    tile_size = tile_size or budget_tile_size
+    workers = workers or budget_workers
+    overlap = overlap or settings.TILE_OVERLAP
+    tiles = plan_tiles(image.shape[0], image.shape[1], tile_size, overlap)
+    logger.info(f"Page of {image.shape[1]}x{image.shape[0]} pixels split into {len(tiles)} tiles "
+                f"of {tile_size} pixels, {workers} at a time")
+
+    def recognize_tile(tile):
+        (x, y, w, h), core = tile
+        words = []
+        for word in recognize(image[y:y + h, x:x + w]):
+            box = translate_box(word['box'], x, y)
+            x1, y1, x2, y2 = _bounds(box)
+            center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
+            if core[0] <= center_x < core[2] and core[1] <= center_y < core[3]:
+                words.append(dict(word, box=box))
+        return words
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tile_words = list(executor.map(recognize_tile, tiles))
+    return _drop_duplicates(tile_words, [core for _, core in tiles])
+
+def _drop_duplicates(tile_words, cores, min_overlap=0.5):
+    # Only words reaching out of their tile's core can have a twin in a neighbouring tile
+    candidates = []
+    for tile_index, (words, core) in enumerate(zip(tile_words, cores)):
+        for word in words:
+            bounds = _bounds(word['box'])
+            if bounds[0] < core[0] or bounds[1] < core[1] or bounds[2] > core[2] or bounds[3] > core[3]:
+                candidates.append((tile_index, bounds, word))
+
+    dropped = set()
+    kept = []
+    for tile_index, bounds, word in sorted(candidates, key=lambda c: -c[2]['confidence']):
+        for other_tile, other_bounds, other in kept:
+            if other_tile == tile_index:
+                continue
+            ix = min(bounds[2], other_bounds[2]) - max(bounds[0], other_bounds[0])
+            iy = min(bounds[3], other_bounds[3]) - max(bounds[1], other_bounds[1])
+            smaller = min((bounds[2] - bounds[0]) * (bounds[3] - bounds[1]),
+                          (other_bounds[2] - other_bounds[0]) * (other_bounds[3] - other_bounds[1]))
+            if ix > 0 and iy > 0 and smaller > 0 and ix * iy / smaller >= min_overlap:
+                dropped.add(id(word))
+                break
+        else:
+            kept.append((tile_index, bounds, word))
+
+    return [word for words in tile_words for word in words if id(word) not in dropped]
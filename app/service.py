@@ -0,0 +1,342 @@
+"""
+Local OCR service.
+
+An asyncio HTTP server in front of a fixed pool of worker processes, each
+holding a warm OCRProcessor, so every client shares one copy of the
+EasyOCR/PaddleOCR models. Jobs wait in a bounded priority queue; once it
+is full new jobs are rejected with 503 and a Retry-After header. Pages are
+published as soon as a worker finishes them, so large documents can be
+streamed page by page as NDJSON.
+
+Endpoints:
+    POST /jobs?extension=pdf&languages=en,ar&priority=0[&stream=1][&start_page=1]
+        Body: the raw document. Returns 202 with the job id, or streams the
+        page results directly when `stream` is set. Higher priorities are
+        served first.
+    GET  /jobs/{id}          Job status and the pages finished so far
+    GET  /jobs/{id}/pages    NDJSON stream of page results, ending with a {"job": ...} line
+    GET  /health             Worker and queue state
+    GET  /metrics            Queue gauges and stage counters in Prometheus text format
+
+Usage:
+    python app/service.py --port 8765 --workers 2
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from aiohttp import web
+
+from config import settings
+from page_scheduler import _init_worker
+from utils.instrumentation import stage_metrics
+
+logger = logging.getLogger(__name__)
+
+_processor = None
+
+def _init_service_worker(options):
+    """Loads the engines once per worker process."""
+    global _processor
+    from ocr_processor import OCRProcessor
+    _processor = OCRProcessor(page_workers=1, **options)
+    _processor.warm_up(background=False)
+    logger.info(f"Worker {os.getpid()} ready: {_processor.startup_report()}")
+
+def _warm_up():
+    return os.getpid()
+
+def _run_job(job_id, data, extension, languages, start_page, page_queue):
+    """Runs one job in a worker process, publishing every page on `page_queue`."""
+    pages = 0
+    for result in _processor.iter_pages(io.BytesIO(data), extension, languages, start_page=start_page):
+        page_queue.put((job_id, result))
+        pages += 1
+    return pages
+
+class Job:
+    """A submitted document and the page results received for it so far."""
+
+    def __init__(self, data, extension, languages, priority=0, start_page=1):
+        self.id = uuid.uuid4().hex
+        self.data = data
+        self.extension = extension
+        self.languages = languages
+        self.priority = priority
+        self.start_page = start_page
+        self.status = 'queued'
+        self.pages = []
+        self.page_count = None
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        # Replaced on every change; waiters grab the current one before reading the job
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'pages_done': len(self.pages),
+            'error': self.error,
+        }
+
+class OCRService:
+    """Job queue, dispatchers and the warm worker pool behind the HTTP handlers."""
+
+    def __init__(self, workers=None, queue_size=None, processor_options=None):
+        self.workers = max(1, workers or settings.SERVICE_WORKERS)
+        self.queue_size = queue_size or settings.SERVICE_QUEUE_SIZE
+        self.processor_options = processor_options or {}
+        self.jobs = {}
+        self.running = 0
+        self._sequence = itertools.count()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        self._context = multiprocessing.get_context(settings.PAGE_WORKER_START_METHOD)
+        self._sync_manager = self._context.Manager()
+        self.page_queue = self._sync_manager.Queue()
+        self.executor = self._make_executor()
+
+        # Load the engines in every worker before the first job arrives
+        await asyncio.gather(*(self.loop.run_in_executor(self.executor, _warm_up)
+                               for _ in range(self.workers)))
+        self._forwarder = threading.Thread(target=self._forward_pages, name='page-forwarder', daemon=True)
+        self._forwarder.start()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        logger.info(f"OCR service ready with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.page_queue.put(None)
+        self._forwarder.join(timeout=5)
+        self.executor.shutdown(cancel_futures=True)
+        self._sync_manager.shutdown()
+
+    def _make_executor(self):
+        threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(threads_per_worker, _init_service_worker, (self.processor_options,))
+        )
+
+    def submit(self, data, extension, languages, priority=0, start_page=1):
+        """Queues a job; raises asyncio.QueueFull when the service is saturated."""
+        self._expire_jobs()
+        job = Job(data, extension, languages, priority, start_page)
+        # Highest priority first, first come first served within a priority
+        self.queue.put_nowait((-priority, next(self._sequence), job))
+        self.jobs[job.id] = job
+        return job
+
+    def _expire_jobs(self):
+        deadline = time.time() - settings.SERVICE_JOB_TTL
+        for job_id in [job.id for job in self.jobs.values() if job.finished and job.finished_at < deadline]:
+            del self.jobs[job_id]
+
+    async def _dispatch(self):
+        # One dispatcher per worker, so a job only leaves the queue when a worker is free
+        while True:
+            _, _, job = await self.queue.get()
+            job.status = 'running'
+            job.notify()
+            self.running += 1
+            executor = self.executor
+            try:
+                job.page_count = await self.loop.run_in_executor(
+                    executor, _run_job, job.id, job.data, job.extension,
+                    job.languages, job.start_page, self.page_queue)
+                self._maybe_finish(job)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    self._replace_executor(executor)
+                self._finish(job, 'failed', f"{type(e).__name__}: {e}")
+            finally:
+                job.data = None
+                self.running -= 1
+                self.queue.task_done()
+
+    def _replace_executor(self, broken):
+        """
+        Restarts the worker pool after a worker died. Every job of the broken pool
+        fails with BrokenProcessPool; only the first of their dispatchers replaces
+        it, the others find it gone (dispatchers share the event loop thread, so
+        nothing runs between the check and the swap).
+        """
+        if self.executor is not broken:
+            return
+        logger.error("A worker process died, restarting the worker pool")
+        self.executor = self._make_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _forward_pages(self):
+        """Moves page results from the worker processes onto the event loop."""
+        while True:
+            item = self.page_queue.get()
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(self._add_page, *item)
+
+    def _add_page(self, job_id, result):
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return
+        stage_metrics.observe(result.get('spans', []))
+        job.pages.append(result)
+        job.notify()
+        self._maybe_finish(job)
+
+    def _maybe_finish(self, job):
+        # Pages travel separately from the job result, so wait until all of them are in
+        if job.page_count is not None and len(job.pages) >= job.page_count:
+            self._finish(job, 'done')
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job.notify()
+
+    def metrics(self):
+        lines = [
+            "# HELP ocr_queue_depth Jobs waiting for a worker",
+            "# TYPE ocr_queue_depth gauge",
+            f"ocr_queue_depth {self.queue.qsize()}",
+            "# HELP ocr_jobs_running Jobs being processed",
+            "# TYPE ocr_jobs_running gauge",
+            f"ocr_jobs_running {self.running}",
+        ]
+        return "\n".join(lines) + "\n" + stage_metrics.to_prometheus()
+
+# The OCRService of the application
+SERVICE_KEY = web.AppKey('service', OCRService)
+
+def _ndjson(record):
+    return (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+async def _stream_pages(request, job):
+    response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+    await response.prepare(request)
+    sent = 0
+    while True:
+        changed = job.changed
+        for page in job.pages[sent:]:
+            await response.write(_ndjson(page))
+        sent = len(job.pages)
+        if job.finished:
+            break
+        await changed.wait()
+    await response.write(_ndjson({'job': job.summary()}))
+    await response.write_eof()
+    return response
+
+def _get_job(request):
+    job = request.app[SERVICE_KEY].jobs.get(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(text=json.dumps({'error': 'unknown job'}), content_type='application/json')
+    return job
+
+async def submit_job(request):
+    service = request.app[SERVICE_KEY]
+    extension = request.query.get('extension', '').lower()
+    if extension not in ('pdf', 'png', 'jpg', 'jpeg', 'tif', 'tiff', 'bmp'):
+        return web.json_response({'error': f"Unsupported extension: {extension!r}"}, status=400)
+    try:
+        priority = int(request.query.get('priority', 0))
+        start_page = int(request.query.get('start_page', 1))
+    except ValueError:
+        return web.json_response({'error': 'priority and start_page must be integers'}, status=400)
+    languages = request.query.get('languages', 'en').split(',')
+
+    data = await request.read()
+    try:
+        job = service.submit(data, extension, languages, priority, start_page)
+    except asyncio.QueueFull:
+        return web.json_response({'error': 'queue full'}, status=503,
+                                 headers={'Retry-After': str(settings.SERVICE_RETRY_AFTER)})
+
+    if request.query.get('stream') in ('1', 'true'):
+        return await _stream_pages(request, job)
+    return web.json_response(job.summary(), status=202)
+
+async def get_job(request):
+    job = _get_job(request)
+    return web.json_response(dict(job.summary(), pages=job.pages), dumps=lambda obj: json.dumps(obj, default=str))
+
+async def stream_job(request):
+    return await _stream_pages(request, _get_job(request))
+
+async def health(request):
+    service = request.app[SERVICE_KEY]
+    return web.json_response({
+        'workers': service.workers,
+        'queued': service.queue.qsize(),
+        'queue_size': service.queue_size,
+        'running': service.running,
+    })
+
+async def metrics(request):
+    return web.Response(text=request.app[SERVICE_KEY].metrics(), content_type='text/plain')
+
+def create_app(workers=None, queue_size=None, processor_options=None):
+    app = web.Application(client_max_size=settings.SERVICE_MAX_UPLOAD_BYTES)
+    app[SERVICE_KEY] = OCRService(workers, queue_size, processor_options)
+
+    async def on_startup(app):
+        await app[SERVICE_KEY].start()
+
+    async def on_cleanup(app):
+        await app[SERVICE_KEY].stop()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.add_routes([
+        web.post('/jobs', submit_job),
+        web.get('/jobs/{job_id}', get_job),
+        web.get('/jobs/{job_id}/pages', stream_job),
+        web.get('/health', health),
+        web.get('/metrics', metrics),
+    ])
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve OCR jobs over HTTP from warm worker processes")
+    parser.add_argument('--host', default=settings.SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=settings.SERVICE_PORT)
+    parser.add_argument('--workers', type=int, default=settings.SERVICE_WORKERS)
+    parser.add_argument('--queue-size', type=int, default=settings.SERVICE_QUEUE_SIZE)
+    parser.add_argument('--mode', choices=('ensemble', 'cascade'), help="OCR mode (default: settings.OCR_MODE)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    app = create_app(args.workers, args.queue_size, {'mode': args.mode})
+    web.run_app(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
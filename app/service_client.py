@@ -0,0 +1,67 @@
+import json
+import time
+import logging
+import requests
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def iter_service_pages(file_bytes, extension, languages=['en'], priority=0, start_page=1,
+                       service_url=None, max_wait=None):
+    """
+    Submits a document to the OCR service (service.py) and yields its page
+    results as soon as the service publishes them.
+
+    While the service queue is full the submission is retried after the
+    Retry-After delay the service asks for.
+
+    Args:
+        file_bytes (bytes): Raw document.
+        extension (str): File extension (pdf, jpg, png...).
+        languages (list): Two-letter language codes.
+        priority (int): Higher priorities are served first.
+        start_page (int): 1-based page to start at.
+        service_url (str): Base URL of the service (defaults to settings.SERVICE_URL).
+        max_wait (float): Give up after waiting this many seconds for a queue slot.
+    Yields:
+        dict: Page results of OCRProcessor.iter_pages, in page order.
+    """
+    url = (service_url or settings.SERVICE_URL).rstrip('/')
+    params = {
+        'extension': extension,
+        'languages': ','.join(languages),
+        'priority': priority,
+        'start_page': start_page,
+        'stream': 1,
+    }
+    waited = 0.0
+    while True:
+        response = requests.post(f"{url}/jobs", params=params, data=file_bytes, stream=True, timeout=(10, None))
+        if response.status_code != 503:
+            break
+        response.close()
+        retry_after = float(response.headers.get('Retry-After', settings.SERVICE_RETRY_AFTER))
+        if max_wait is not None and waited + retry_after > max_wait:
+            raise TimeoutError(f"OCR service queue still full after {waited:.0f}s")
+        logger.info(f"OCR service queue is full, retrying in {retry_after:.0f}s")
+        time.sleep(retry_after)
+        waited += retry_after
+    response.raise_for_status()
+
+    with response:
+        for line in response.iter_lines():
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'job' in record:
+                if record['job']['status'] == 'failed':
+                    raise RuntimeError(f"OCR job failed: {record['job']['error']}")
+                return
+            yield record
+    raise ConnectionError("OCR service closed the stream before the job finished")
+
+def page_words(page):
+    """Word results (text, confidence 0-100) of a page result, for the DOCX writer."""
+    if page.get('words'):
+        return page['words']
+    return [{'text': page['text'], 'confidence': page['confidence'] * 100}]
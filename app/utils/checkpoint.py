@@ -0,0 +1,166 @@
+import os
+import json
+import shutil
+import pickle
+import time
+import hashlib
+import logging
+import tempfile
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of checkpointed page results changes
+CHECKPOINT_VERSION = 1
+
+
+def document_key(data, options=None):
+    """
+    Returns the checkpoint key of a document: a hash of its bytes together
+    with every option that affects its page results.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(data)
+    digest.update(json.dumps({'version': CHECKPOINT_VERSION, 'options': options or {}},
+                             sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def prune_checkpoints(checkpoint_dir=None, max_age=None, max_bytes=None, keep=None):
+    """
+    Removes abandoned checkpoints: those not written to for `max_age` seconds,
+    then the least recently written ones until the rest take at most
+    `max_bytes`, like the LRU eviction of utils.result_cache.
+
+    Args:
+        checkpoint_dir (str): Root folder of all checkpoints (defaults to settings.CHECKPOINT_DIR).
+        max_age (float): Age in seconds (defaults to settings.CHECKPOINT_MAX_AGE).
+        max_bytes (int): Size budget (defaults to settings.CHECKPOINT_MAX_BYTES).
+        keep (str): Key of a checkpoint that is never removed (the one being written).
+    Returns:
+        int: Number of checkpoints removed.
+    """
+    checkpoint_dir = checkpoint_dir or settings.CHECKPOINT_DIR
+    max_age = settings.CHECKPOINT_MAX_AGE if max_age is None else max_age
+    max_bytes = settings.CHECKPOINT_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        names = os.listdir(checkpoint_dir)
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        path = os.path.join(checkpoint_dir, name)
+        if name == keep:
+            continue
+        try:
+            # Other processes may be writing or clearing checkpoints meanwhile
+            mtime, size = os.stat(path).st_mtime, 0
+            for entry in os.scandir(path):
+                stat = entry.stat()
+                mtime, size = max(mtime, stat.st_mtime), size + stat.st_size
+        except OSError:
+            continue
+        entries.append((mtime, size, path))
+
+    now = time.time()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in sorted(entries):
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Removed {removed} abandoned checkpoints")
+    return removed
+
+
+class PageCheckpoint:
+    """
+    Page results of one document, stored one file per page as they are produced.
+
+    A job that fails or is killed half way keeps its finished pages, and
+    a retry of the same document with the same options reloads them and
+    continues from the first missing page. Other threads and processes can
+    read the finished pages while the job is still running. Checkpoints that
+    are never retried are pruned (see `prune_checkpoints`) when a new one starts.
+
+    Args:
+        key (str): Document key (see `document_key`).
+        checkpoint_dir (str): Root folder of all checkpoints (defaults to settings.CHECKPOINT_DIR).
+    """
+
+    def __init__(self, key, checkpoint_dir=None):
+        self.key = key
+        self.path = os.path.join(checkpoint_dir or settings.CHECKPOINT_DIR, key)
+        self._pruned = False
+
+    def _page_path(self, page_number):
+        return os.path.join(self.path, f"page-{page_number:05d}.pkl")
+
+    def page_numbers(self):
+        """Sorted numbers of the pages saved so far."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[5:-4]) for name in names if name.startswith('page-') and name.endswith('.pkl'))
+
+    def load_pages(self, start_page=1):
+        """
+        Returns the saved page results from `start_page` on, in page order.
+        Unreadable pages (e.g. from an older version) are dropped and left
+        to be processed again.
+        """
+        pages = []
+        for page_number in self.page_numbers():
+            if page_number < start_page:
+                continue
+            path = self._page_path(page_number)
+            try:
+                with open(path, 'rb') as f:
+                    pages.append(pickle.load(f))
+            except Exception as e:
+                logger.warning(f"Dropping unreadable checkpoint page {path}: {str(e)}")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return pages
+
+    def resume(self, start_page=1):
+        """
+        Returns (finished page results, first missing page): the unbroken run
+        of saved pages from `start_page` on and the page to continue from.
+        """
+        finished = []
+        next_page = start_page
+        for result in self.load_pages(start_page):
+            if result['page'] != next_page:
+                break
+            finished.append(result)
+            next_page += 1
+        return finished, next_page
+
+    def save_page(self, result):
+        """Stores one page result under its 'page' number."""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            # Write to a temporary file first so readers and retries never see partial pages
+            fd, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._page_path(result['page']))
+        except Exception as e:
+            logger.warning(f"Could not checkpoint page {result.get('page')}: {str(e)}")
+            return
+        if not self._pruned:
+            self._pruned = True
+            prune_checkpoints(os.path.dirname(self.path), keep=self.key)
+
+    def clear(self):
+        """Removes the checkpoint once the document is done."""
+        shutil.rmtree(self.path, ignore_errors=True)
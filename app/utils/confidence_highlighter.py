@@ -1,7 +1,4 @@
-from docx import Document
-from docx.shared import RGBColor
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from output.streaming_docx import StreamingDocxWriter
 
 def get_highlight_color(confidence):
     """
@@ -16,47 +13,18 @@ def get_highlight_color(confidence):
     else:
         return "00FF00"  # Green
 
-def add_colored_text(paragraph, text, confidence):
-    """
-    Adds a run to the paragraph with highlight color based on confidence.
-    """
-    run = paragraph.add_run(text)
-
-    # Apply color highlight
-    highlight_color = get_highlight_color(confidence)
-    shading_elm = OxmlElement('w:shd')
-    shading_elm.set(qn('w:fill'), highlight_color)
-    run._r.get_or_add_rPr().append(shading_elm)
-
-    # Set font properties
-    font = run.font
-    font.size = None  # Keep default size
-    font.name = 'Arial'
-
 def create_highlighted_document(results, output_path, rtl=False):
     """
     Creates a Word document with highlighted text based on confidence scores.
+    Adjacent words with the same highlight color share one run, and words
+    carrying 'page'/'line' keys are laid out one paragraph per line with
+    each page starting on a new page. The document is streamed to
+    `output_path`, so long documents do not build up in memory.
     Args:
-        results (list): List of dictionaries containing 'text' and 'confidence'.
-        output_path (str): Path to save the Word document.
+        results (list or WordTable): List of dictionaries containing 'text' and 'confidence',
+            or a WordTable.
+        output_path (str or file-like): Path or stream to save the Word document to.
         rtl (bool): If True, sets the paragraph direction to RTL (for Arabic).
     """
-    document = Document()
-    paragraph = document.add_paragraph()
-
-    if rtl:
-        # Set RTL direction for Arabic paragraphs
-        paragraph.paragraph_format.alignment = 3  # Right alignment
-        pPr = paragraph._p.get_or_add_pPr()
-        bidi = OxmlElement('w:bidi')
-        bidi.set(qn('w:val'), '1')
-        pPr.append(bidi)
-
-    for item in results:
-        text = item['text']
-        confidence = item['confidence']
-
-        if text.strip() != "":
-            add_colored_text(paragraph, text + ' ', confidence)
-
-    document.save(output_path)
+    with StreamingDocxWriter(output_path, rtl=rtl, font='Arial') as writer:
+        writer.add_words(results, fill=get_highlight_color)
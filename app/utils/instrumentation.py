@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import resource
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+
+_current_tracer = contextvars.ContextVar('ocr_tracer', default=None)
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def current_rss():
+    """Returns the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # Peak RSS is the best we can do without /proc (kilobytes on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure_call(func, *args, **kwargs):
+    """
+    Calls `func` and returns its result together with the wall time, the CPU
+    time of the process and the RSS change observed during the call.
+    """
+    rss = current_rss()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, {
+        'wall_time': time.perf_counter() - start,
+        'cpu_time': time.process_time() - cpu,
+        'rss_delta': current_rss() - rss,
+    }
+
+
+class Tracer:
+    """
+    Collects timing spans for one request.
+
+    Every span records its wall time, the CPU time of the process and the
+    change in resident memory while it was open, plus free-form attributes
+    such as the page number or the engine. CPU time is process-wide, so
+    spans running concurrently on several threads overlap.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+        self._created = time.time()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Times the enclosed block as span `name`."""
+        rss = current_rss()
+        cpu = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, wall_time=time.perf_counter() - start,
+                        cpu_time=time.process_time() - cpu,
+                        rss_delta=current_rss() - rss, **attrs)
+
+    def record(self, name, wall_time, cpu_time=None, rss_delta=None, **attrs):
+        """Adds a span measured elsewhere, e.g. in a worker thread or process."""
+        span = {'name': name, 'wall_time': wall_time, 'cpu_time': cpu_time, 'rss_delta': rss_delta}
+        span.update(attrs)
+        with self._lock:
+            self.spans.append(span)
+
+    def extend(self, spans, **attrs):
+        """Adds spans collected by another tracer, tagging them with `attrs` (e.g. the page)."""
+        with self._lock:
+            for span in spans:
+                self.spans.append(dict(span, **attrs))
+
+    def summary(self):
+        """Totals per stage, and per engine for engine spans."""
+        stages = defaultdict(lambda: {'count': 0, 'wall_time': 0.0, 'cpu_time': 0.0, 'rss_delta': 0})
+        for span in self.spans:
+            key = f"{span['name']}:{span['engine']}" if span.get('engine') else span['name']
+            stage = stages[key]
+            stage['count'] += 1
+            stage['wall_time'] += span['wall_time']
+            stage['cpu_time'] += span['cpu_time'] or 0.0
+            stage['rss_delta'] += span['rss_delta'] or 0
+        return dict(stages)
+
+    def report(self):
+        """The instrumentation block added to OCR results."""
+        return {
+            'stages': self.summary(),
+            'spans': list(self.spans),
+        }
+
+    def write_jsonl(self, path):
+        """Appends one JSON line per span to `path`."""
+        with open(path, 'a', encoding='utf-8') as f:
+            for span in self.spans:
+                f.write(json.dumps(dict(span, trace_start=self._created), default=str) + '\n')
+
+    def to_prometheus(self, prefix='ocr'):
+        """The spans of this tracer in Prometheus text format."""
+        metrics = StageMetrics(prefix)
+        metrics.observe(self.spans)
+        return metrics.to_prometheus()
+
+
+class StageMetrics:
+    """Process-wide cumulative stage counters, exported in Prometheus text format."""
+
+    def __init__(self, prefix='ocr'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def observe(self, spans):
+        with self._lock:
+            for span in spans:
+                total = self._totals[(span['name'], span.get('engine') or '')]
+                total[0] += 1
+                total[1] += span['wall_time']
+                total[2] += span['cpu_time'] or 0.0
+
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            totals = sorted(self._totals.items())
+        for metric, index, help_text in (
+            ('stage_calls_total', 0, 'Number of times each stage ran'),
+            ('stage_wall_seconds_total', 1, 'Wall time spent in each stage'),
+            ('stage_cpu_seconds_total', 2, 'Process CPU time spent in each stage'),
+        ):
+            name = f"{self.prefix}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (stage, engine), values in totals:
+                labels = f'stage="{stage}"' + (f',engine="{engine}"' if engine else '')
+                lines.append(f"{name}{{{labels}}} {values[index]}")
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics()
+
+
+@contextmanager
+def use_tracer(tracer):
+    """Makes `tracer` the target of `span()` calls in the current context."""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def current_tracer():
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Times the enclosed block on the current tracer; does nothing if there is none."""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name, **attrs):
+        yield
+
+
+@contextmanager
+def profiled(path):
+    """
+    Runs the enclosed block under cProfile and dumps the stats to `path`
+    (readable with pstats or snakeviz). Does nothing when `path` is None.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        pstats.Stats(profiler).dump_stats(path)
@@ -0,0 +1,206 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of cached results changes
+CACHE_VERSION = 1
+
+
+def hash_image(image):
+    """
+    Returns a hex digest of the pixels of an image.
+    Accepts NumPy arrays and PIL images.
+    """
+    pixels = np.ascontiguousarray(np.asarray(image))
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{pixels.shape}|{pixels.dtype}|".encode())
+    digest.update(memoryview(pixels).cast('B'))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed, file-backed cache for OCR results.
+
+    Entries are keyed by a hash of the page pixels together with the engine,
+    its languages and options and the preprocessing parameters, so the same
+    page re-uploaded later is served from disk instead of being OCR'd again.
+    When the cache grows beyond `max_bytes` the least recently used entries
+    are removed.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None, enabled=None):
+        self.cache_dir = cache_dir or settings.CACHE_DIR
+        self.max_bytes = max_bytes or settings.CACHE_MAX_BYTES
+        self.enabled = settings.CACHE_ENABLED if enabled is None else enabled
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image, engine, languages=None, options=None, preprocessing=None):
+        """
+        Builds the cache key of an OCR result.
+
+        Args:
+            image: Page pixels (NumPy array or PIL image).
+            engine (str): Name of the engine or pipeline producing the result.
+            languages: Languages the engine was run with.
+            options (dict): Engine options affecting the result.
+            preprocessing (dict): Preprocessing parameters applied before the engine.
+        Returns:
+            str: Hex digest identifying the result.
+        """
+        if isinstance(languages, str):
+            languages = [languages]
+        params = json.dumps({
+            'version': CACHE_VERSION,
+            'engine': engine,
+            'languages': sorted(languages or []),
+            'options': options or {},
+            'preprocessing': preprocessing or {},
+        }, sort_keys=True, default=str)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(hash_image(image).encode())
+        digest.update(params.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.pkl')
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Refresh the entry's position in the LRU order
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def contains(self, key):
+        """Whether an entry exists for `key`, without reading it or counting a hit or miss."""
+        return self.enabled and os.path.exists(self._path(key))
+
+    def put(self, key, value):
+        """Stores `value` under `key`, evicting old entries if the cache is over budget."""
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so concurrent readers never see partial entries
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for `key`, computing and storing it on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Removes least recently used entries until the cache is below 90% of its budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if self._remove(path):
+                total -= size
+        self._size = total
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Returns the hit/miss counters of this process and the size of the cache."""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
+
+
+result_cache = ResultCache()
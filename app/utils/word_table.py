@@ -0,0 +1,246 @@
+import numpy as np
+
+# Engine names are stored as small integer codes into this tuple
+ENGINE_NAMES = ('tesseract', 'easyocr', 'paddleocr', 'ensemble', 'text_layer')
+
+_NONE = -1
+
+def _box_xywh(box):
+    """(left, top, width, height) of a Tesseract box or a list of corner points."""
+    if len(box) == 4 and all(np.isscalar(value) for value in box):
+        return box
+    xs = [float(point[0]) for point in box]
+    ys = [float(point[1]) for point in box]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+class WordView:
+    """
+    One word of a WordTable, read like a word result dict
+    (`view['text']`, `view.get('page')`) without copying it out of the table.
+    """
+
+    __slots__ = ('_table', '_index')
+
+    KEYS = ('text', 'confidence', 'box', 'engine', 'page', 'line')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        table, index = self._table, self._index
+        if key == 'text':
+            return table.text_at(index)
+        if key == 'confidence':
+            return float(table.confidence[index])
+        if key == 'box':
+            return tuple(table.boxes[index].tolist())
+        if key == 'engine':
+            code = int(table.engine[index])
+            return None if code == _NONE else ENGINE_NAMES[code]
+        if key in ('page', 'line'):
+            value = int(getattr(table, key)[index])
+            return None if value == _NONE else value
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def keys(self):
+        return self.KEYS
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS if self[key] is not None}
+
+    def __repr__(self):
+        return f"WordView({self.to_dict()!r})"
+
+class WordTable:
+    """
+    Word results stored column by column.
+
+    Texts share one UTF-8 buffer addressed by offsets (starting at 0);
+    confidences (0-100), boxes (left, top, width, height), engine codes,
+    page and line numbers are NumPy arrays. A million words take a few tens of megabytes instead
+    of a million dicts, confidence filters are vectorized, and the columns
+    can be written to .npz without copying or handed to Arrow (see `to_arrow`).
+
+    Indexing with an integer returns a WordView; with a slice, boolean mask
+    or index array it returns a new WordTable. Iterating yields WordViews,
+    so code written for lists of word dicts keeps working.
+    """
+
+    __slots__ = ('text_buffer', 'text_offsets', 'confidence', 'boxes', 'engine', 'page', 'line')
+
+    def __init__(self, text_buffer, text_offsets, confidence, boxes, engine, page, line):
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self.confidence = confidence
+        self.boxes = boxes
+        self.engine = engine
+        self.page = page
+        self.line = line
+
+    @classmethod
+    def from_words(cls, words, page=None, engine=None):
+        """
+        Builds a table from word result dicts.
+
+        Args:
+            words (iterable): Dicts with 'text', 'confidence' and 'box', optionally
+                'engine', 'page' and 'line'.
+            page (int): Page number of every word, overriding their 'page' keys.
+            engine (str): Engine of every word, overriding their 'engine' keys.
+        """
+        if isinstance(words, WordTable):
+            return words
+        words = list(words)
+        encoded = [word['text'].encode('utf-8') for word in words]
+        offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+
+        def code(word):
+            # Merged words list the engines that agreed on them
+            engines = word.get('engines')
+            name = engine or word.get('engine') or (engines and (engines[0] if len(engines) == 1 else 'ensemble'))
+            return ENGINE_NAMES.index(name) if name in ENGINE_NAMES else _NONE
+
+        # Lines may be numbers or tuples (layout OCR's (block, row)); they are
+        # renumbered in order of appearance, which keeps every line distinct
+        line_ids = {}
+
+        def line(word):
+            key = word.get('line')
+            if key is None:
+                return _NONE
+            return line_ids.setdefault((word.get('page'), key), len(line_ids))
+
+        def page_number(word):
+            value = word.get('page')
+            return value if isinstance(value, (int, np.integer)) else _NONE
+
+        return cls(
+            text_buffer=np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            text_offsets=offsets,
+            confidence=np.array([word['confidence'] for word in words], dtype=np.float32),
+            boxes=np.array([_box_xywh(word['box']) if word.get('box') is not None else (0, 0, 0, 0)
+                            for word in words], dtype=np.float32).reshape(-1, 4),
+            engine=np.array([code(word) for word in words], dtype=np.int8),
+            page=np.full(len(words), page, dtype=np.int32) if page is not None
+            else np.array([page_number(word) for word in words], dtype=np.int32),
+            line=np.array([line(word) for word in words], dtype=np.int32),
+        )
+
+    @classmethod
+    def concat(cls, tables):
+        """Joins tables end to end."""
+        tables = [table for table in tables if len(table)]
+        if not tables:
+            return cls.from_words([])
+        # Every table's offsets start at 0; shift them past the texts before them
+        shifts = np.cumsum([0] + [table.text_offsets[-1] for table in tables[:-1]])
+        return cls(
+            text_buffer=np.concatenate([t.text_buffer for t in tables]),
+            text_offsets=np.concatenate([[0]] + [t.text_offsets[1:] + shift for t, shift in zip(tables, shifts)]),
+            confidence=np.concatenate([t.confidence for t in tables]),
+            boxes=np.concatenate([t.boxes for t in tables]),
+            engine=np.concatenate([t.engine for t in tables]),
+            page=np.concatenate([t.page for t in tables]),
+            line=np.concatenate([t.line for t in tables]),
+        )
+
+    def __len__(self):
+        return len(self.confidence)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield WordView(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError(key)
+            return WordView(self, key)
+        indices = np.arange(len(self))[key]
+        starts, ends = self.text_offsets[:-1][indices], self.text_offsets[1:][indices]
+        lengths = ends - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Gather the selected texts' bytes in one vectorized step
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return WordTable(self.text_buffer[positions], offsets, self.confidence[indices],
+                         self.boxes[indices], self.engine[indices], self.page[indices], self.line[indices])
+
+    def text_at(self, index):
+        return bytes(self.text_buffer[self.text_offsets[index]:self.text_offsets[index + 1]]).decode('utf-8')
+
+    def texts(self):
+        """All texts as a list of str."""
+        data = self.text_buffer.tobytes()
+        offsets = self.text_offsets.tolist()
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def filter(self, min_confidence=None, max_confidence=None):
+        """Words with min_confidence <= confidence <= max_confidence."""
+        mask = np.ones(len(self), dtype=bool)
+        if min_confidence is not None:
+            mask &= self.confidence >= min_confidence
+        if max_confidence is not None:
+            mask &= self.confidence <= max_confidence
+        return self[mask]
+
+    def by_engine(self):
+        """Engine name -> WordTable of that engine's words (words without an engine are left out)."""
+        return {ENGINE_NAMES[code]: self[self.engine == code]
+                for code in np.unique(self.engine) if code != _NONE}
+
+    def to_dicts(self):
+        return [view.to_dict() for view in self]
+
+    def save_npz(self, path):
+        """Writes the columns to an uncompressed .npz file."""
+        np.savez(path, text_buffer=self.text_buffer, text_offsets=self.text_offsets,
+                 confidence=self.confidence, boxes=self.boxes, engine=self.engine,
+                 page=self.page, line=self.line, engine_names=np.array(ENGINE_NAMES))
+
+    @classmethod
+    def load_npz(cls, path, mmap_mode=None):
+        """Reads a table written by `save_npz`."""
+        with np.load(path, mmap_mode=mmap_mode) as data:
+            if tuple(data['engine_names'].tolist()) != ENGINE_NAMES:
+                raise ValueError(f"{path} was written with different engine codes")
+            return cls(*(data[name] for name in cls.__slots__))
+
+    def to_arrow(self):
+        """
+        The table as a pyarrow.Table. Texts and confidences are wrapped without
+        copying; the box columns (strided slices) and the engine, page and line
+        columns, which get a null mask for missing values, are copies.
+        Requires pyarrow.
+        """
+        import pyarrow as pa
+
+        text = pa.LargeStringArray.from_buffers(
+            len(self), pa.py_buffer(self.text_offsets), pa.py_buffer(self.text_buffer))
+
+        def nullable(values):
+            return pa.array(values, mask=values == _NONE)
+
+        return pa.table({
+            'text': text,
+            'confidence': pa.array(self.confidence),
+            'left': pa.array(self.boxes[:, 0]),
+            'top': pa.array(self.boxes[:, 1]),
+            'width': pa.array(self.boxes[:, 2]),
+            'height': pa.array(self.boxes[:, 3]),
+            'engine': pa.DictionaryArray.from_arrays(
+                pa.array(self.engine, mask=self.engine == _NONE), pa.array(ENGINE_NAMES)),
+            'page': nullable(self.page),
+            'line': nullable(self.line),
+        })
@@ -0,0 +1,57 @@
+"""Accuracy and latency metrics for the OCR benchmark."""
+
+import numpy as np
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two sequences (strings or lists of words)."""
+    if len(reference) < len(hypothesis):
+        reference, hypothesis = hypothesis, reference
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_item in enumerate(reference, start=1):
+        current = [i]
+        for j, hyp_item in enumerate(hypothesis, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_item != hyp_item)
+            ))
+        previous = current
+    return previous[-1]
+
+def _normalize(text):
+    return " ".join(text.split())
+
+def error_counts(reference, hypothesis):
+    """
+    Returns character and word edit counts together with the reference lengths,
+    so error rates can be aggregated over many pages.
+    """
+    reference = _normalize(reference)
+    hypothesis = _normalize(hypothesis)
+    ref_words = reference.split()
+    return {
+        'char_errors': edit_distance(reference, hypothesis),
+        'chars': len(reference),
+        'word_errors': edit_distance(ref_words, hypothesis.split()),
+        'words': len(ref_words),
+    }
+
+def error_rates(counts):
+    """Character and word error rates from summed `error_counts`."""
+    return {
+        'cer': counts['char_errors'] / counts['chars'] if counts['chars'] else 0.0,
+        'wer': counts['word_errors'] / counts['words'] if counts['words'] else 0.0,
+    }
+
+def latency_summary(samples):
+    """p50/p95/mean/total in milliseconds for a list of durations in seconds."""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'mean_ms': None, 'total_s': 0.0, 'count': 0}
+    values = np.array(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 2),
+        'p95_ms': round(float(np.percentile(values, 95)), 2),
+        'mean_ms': round(float(values.mean()), 2),
+        'total_s': round(float(values.sum()) / 1000, 3),
+        'count': len(samples),
+    }
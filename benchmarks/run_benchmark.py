@@ -0,0 +1,234 @@
+"""
+Offline OCR benchmark.
+
+Renders synthetic English and Arabic pages with known ground truth, runs
+each pipeline configuration over them and reports throughput, per-stage
+latency, peak memory and character/word error rates. Results can be saved
+as a named baseline and compared against later runs.
+
+Usage:
+    python benchmarks/run_benchmark.py --configs tesseract,pipeline --save-baseline main
+    python benchmarks/run_benchmark.py --configs tesseract,pipeline --compare main
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'app')
+BASELINE_DIR = os.path.join(BENCHMARK_DIR, 'baselines')
+
+# Every run must do the full work, never serve pages from the result cache
+os.environ['OCR_CACHE_ENABLED'] = '0'
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from metrics import error_counts, error_rates, latency_summary
+from synthetic import build_dataset
+
+def _timed(timings, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage].append(time.perf_counter() - start)
+    return result
+
+def _pipeline_page(engines):
+    """
+    Preprocessing, the given engines on the page's language, then the
+    word-level merge of ensemble_ocr, each stage timed on its own.
+    """
+    from processors.image_preprocessing import preprocess_image
+    from ocr_engines.ensemble_ocr import merge_word_results, words_to_text, _run_engine
+
+    def ocr_page(page, language, timings):
+        preprocessed = _timed(timings, 'preprocess', preprocess_image, page)
+        results = {}
+        for engine in engines:
+            results[engine] = _timed(timings, engine, _run_engine, engine, preprocessed, [language])
+        merged = _timed(timings, 'merge', merge_word_results, results)
+        return words_to_text(merged)
+
+    return ocr_page
+
+def _processor_page(**options):
+    """OCRProcessor._process_image with the given constructor options."""
+    from PIL import Image
+    from ocr_processor import OCRProcessor
+
+    processor = OCRProcessor(**options)
+
+    def ocr_page(page, language, timings):
+        result = processor._process_image(Image.fromarray(page), [language])
+        for engine in result['all_engines']:
+            if 'wall_time' in engine:
+                timings[engine['engine']].append(engine['wall_time'])
+        return result['text']
+
+    return ocr_page
+
+CONFIGS = {
+    'tesseract': lambda: _pipeline_page(['tesseract']),
+    'pipeline': lambda: _pipeline_page(['tesseract', 'easyocr', 'paddleocr']),
+    'processor-sequential': lambda: _processor_page(mode='ensemble', execution_mode='sequential'),
+    'processor-threaded': lambda: _processor_page(mode='ensemble', execution_mode='thread'),
+    'processor-cascade': lambda: _processor_page(mode='cascade'),
+}
+
+def _iter_pages(document, timings):
+    """Yields (page array, ground truth) for a document, timing PDF rasterization."""
+    if document['kind'] == 'image':
+        yield from zip(document['pages'], document['ground_truth'])
+        return
+
+    from processors.pdf_processor import iter_pdf_arrays
+    pages = iter_pdf_arrays(document['pdf'])
+    try:
+        for truth in document['ground_truth']:
+            page = _timed(timings, 'rasterize', next, pages)
+            yield page, truth
+    finally:
+        # Also when the caller stops early, so the rasterizer's pages are released
+        pages.close()
+
+def run_config(name, dataset_options, warmup=True):
+    """
+    Runs one configuration over the dataset. Executed in a fresh process so
+    peak RSS and model loading belong to this configuration only.
+    """
+    documents = build_dataset(**dataset_options)
+    ocr_page = CONFIGS[name]()
+
+    if warmup:
+        # Load the models outside the measurement
+        first = next(document for document in documents if document['kind'] == 'image')
+        ocr_page(first['pages'][0], first['language'], defaultdict(list))
+
+    timings = defaultdict(list)
+    totals = defaultdict(int)
+    per_language = defaultdict(lambda: defaultdict(int))
+    pages = 0
+    start = time.perf_counter()
+
+    for document in documents:
+        for page, truth in _iter_pages(document, timings):
+            text = _timed(timings, 'page', ocr_page, page, document['language'], timings)
+            pages += 1
+            for key, value in error_counts(truth, text).items():
+                totals[key] += value
+                per_language[document['language']][key] += value
+
+    wall_time = time.perf_counter() - start
+    return {
+        'config': name,
+        'pages': pages,
+        'wall_time_s': round(wall_time, 3),
+        'pages_per_sec': round(pages / wall_time, 4) if wall_time else 0.0,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'stages': {stage: latency_summary(samples) for stage, samples in timings.items()},
+        **error_rates(totals),
+        'languages': {language: error_rates(counts) for language, counts in per_language.items()},
+    }
+
+def _run_config_safely(name, dataset_options, warmup):
+    # Engine exceptions are not always picklable, so failures travel back as text
+    try:
+        return run_config(name, dataset_options, warmup)
+    except Exception as e:
+        return {'config': name, 'error': f"{type(e).__name__}: {e}"}
+
+def run_benchmark(configs, dataset_options, warmup=True):
+    """Runs every configuration in its own process and returns their reports."""
+    reports = []
+    context = multiprocessing.get_context('spawn')
+    for name in configs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                reports.append(executor.submit(_run_config_safely, name, dataset_options, warmup).result())
+            except Exception as e:
+                reports.append({'config': name, 'error': f"{type(e).__name__}: {e}"})
+    return reports
+
+def _delta(current, baseline):
+    if current is None or baseline in (None, 0):
+        return ''
+    return f" ({(current - baseline) / baseline * 100:+.1f}%)"
+
+def print_report(reports, baseline=None):
+    baseline = {report['config']: report for report in (baseline or {}).get('reports', [])}
+    for report in reports:
+        print(f"\n== {report['config']} ==")
+        if 'error' in report:
+            print(f"  failed: {report['error']}")
+            continue
+        base = baseline.get(report['config'], {})
+        print(f"  pages/sec   {report['pages_per_sec']:.3f}{_delta(report['pages_per_sec'], base.get('pages_per_sec'))}")
+        print(f"  peak RSS    {report['peak_rss_mb']:.1f} MB{_delta(report['peak_rss_mb'], base.get('peak_rss_mb'))}")
+        print(f"  CER         {report['cer']:.4f}{_delta(report['cer'], base.get('cer'))}")
+        print(f"  WER         {report['wer']:.4f}{_delta(report['wer'], base.get('wer'))}")
+        for stage, summary in sorted(report['stages'].items()):
+            base_stage = base.get('stages', {}).get(stage, {})
+            print(f"  {stage:<12} p50 {summary['p50_ms']:>9.1f} ms{_delta(summary['p50_ms'], base_stage.get('p50_ms')):<10}"
+                  f" p95 {summary['p95_ms']:>9.1f} ms{_delta(summary['p95_ms'], base_stage.get('p95_ms'))}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipelines on synthetic pages")
+    parser.add_argument('--configs', default='tesseract,pipeline',
+                        help=f"Comma separated configurations: {', '.join(CONFIGS)}")
+    parser.add_argument('--languages', default='en,ar')
+    parser.add_argument('--font-sizes', default='10,14,24')
+    parser.add_argument('--skews', default='0,2')
+    parser.add_argument('--noises', default='0,0.03')
+    parser.add_argument('--pdf-pages', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--font-en', help="TrueType font for English pages")
+    parser.add_argument('--font-ar', help="TrueType font with Arabic glyphs")
+    parser.add_argument('--no-warmup', action='store_true', help="Include model loading in the measurement")
+    parser.add_argument('--save-baseline', metavar='NAME', help="Save the results as a named baseline")
+    parser.add_argument('--compare', metavar='NAME', help="Compare against a saved baseline")
+    parser.add_argument('--output', help="Also write the JSON report to this path")
+    args = parser.parse_args()
+
+    configs = [name.strip() for name in args.configs.split(',') if name.strip()]
+    unknown = [name for name in configs if name not in CONFIGS]
+    if unknown:
+        parser.error(f"Unknown configurations: {', '.join(unknown)}")
+
+    dataset_options = {
+        'languages': tuple(args.languages.split(',')),
+        'font_sizes': tuple(int(size) for size in args.font_sizes.split(',')),
+        'skews': tuple(float(skew) for skew in args.skews.split(',')),
+        'noises': tuple(float(noise) for noise in args.noises.split(',')),
+        'pdf_pages': args.pdf_pages,
+        'seed': args.seed,
+        'fonts': {'en': args.font_en, 'ar': args.font_ar},
+    }
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    reports = run_benchmark(configs, dataset_options, warmup=not args.no_warmup)
+    print_report(reports, baseline)
+
+    result = {'dataset': dataset_options, 'reports': reports}
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nBaseline saved to {path}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
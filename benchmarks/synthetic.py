@@ -0,0 +1,186 @@
+"""
+Synthetic benchmark pages with known ground truth.
+
+Pages are rendered with PIL from a fixed seed, so every run of the
+benchmark sees exactly the same pixels.
+"""
+
+import io
+import os
+import random
+import logging
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, features
+
+logger = logging.getLogger(__name__)
+
+DPI = 300
+
+# Written into the benchmark PDFs instead of the current time, so their bytes never change
+PDF_DATE = time.strptime("2024-01-01", "%Y-%m-%d")
+
+ENGLISH_WORDS = (
+    "invoice total amount due payment contract agreement party shall date "
+    "customer account number reference order quantity price description tax "
+    "signature address delivery terms conditions period notice company report "
+    "section page table summary balance credit debit receipt service annual"
+).split()
+
+ARABIC_WORDS = (
+    "فاتورة المبلغ الإجمالي الدفع عقد اتفاقية الطرف التاريخ العميل رقم الحساب "
+    "المرجع الطلب الكمية السعر الوصف الضريبة التوقيع العنوان التسليم الشروط "
+    "الفترة الشركة التقرير القسم الصفحة الجدول الملخص الرصيد الخدمة السنوي"
+).split()
+
+FONT_CANDIDATES = {
+    'en': [
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf',
+        '/Library/Fonts/Arial.ttf',
+        'C:/Windows/Fonts/arial.ttf',
+    ],
+    'ar': [
+        '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/Library/Fonts/Arial.ttf',
+        'C:/Windows/Fonts/arial.ttf',
+    ],
+}
+
+def find_font(language, font_path=None):
+    """Returns the first available TrueType font able to render `language`."""
+    candidates = [font_path] if font_path else FONT_CANDIDATES[language]
+    for path in candidates:
+        if path and os.path.exists(path):
+            return path
+    raise FileNotFoundError(
+        f"No font found for '{language}'; pass one with --font-{language}"
+    )
+
+_warned_unshaped = False
+
+def _visual_arabic(line):
+    """
+    Returns the string to draw for an Arabic line and the extra draw arguments.
+    PIL shapes and orders Arabic itself when built with libraqm; otherwise the
+    optional arabic_reshaper/python-bidi packages are used.
+    """
+    if features.check('raqm'):
+        return line, {'direction': 'rtl', 'language': 'ar'}
+    try:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+        return get_display(arabic_reshaper.reshape(line)), {}
+    except ImportError:
+        global _warned_unshaped
+        if not _warned_unshaped:
+            logger.warning("Neither libraqm nor arabic_reshaper/python-bidi is available; "
+                           "Arabic pages are drawn unshaped")
+            _warned_unshaped = True
+        return line[::-1], {}
+
+def render_page(lines, language, font_size, font_path, skew=0.0, noise=0.0,
+                width=2480, height=3508, seed=0):
+    """
+    Renders text lines onto an A4 page at 300 DPI.
+
+    Args:
+        lines (list): Text lines, in logical order.
+        language (str): 'en' or 'ar' (Arabic is right aligned).
+        font_size (int): Font size in points.
+        font_path (str): TrueType font file.
+        skew (float): Rotation of the page in degrees.
+        noise (float): Fraction of pixels flipped to salt and pepper noise.
+    Returns:
+        numpy.ndarray: Grayscale page.
+    """
+    font = ImageFont.truetype(font_path, int(round(font_size * DPI / 72)))
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+
+    margin = 200
+    line_height = int(font.size * 1.6)
+    y = margin
+    for line in lines:
+        if y + line_height > height - margin:
+            break
+        if language == 'ar':
+            text, kwargs = _visual_arabic(line)
+            text_width = draw.textlength(text, font=font, **kwargs)
+            draw.text((width - margin - text_width, y), text, font=font, fill=0, **kwargs)
+        else:
+            draw.text((margin, y), line, font=font, fill=0)
+        y += line_height
+
+    if skew:
+        page = page.rotate(skew, resample=Image.BICUBIC, expand=False, fillcolor=255)
+
+    pixels = np.array(page)
+    if noise:
+        rng = np.random.default_rng(seed)
+        mask = rng.random(pixels.shape) < noise
+        pixels[mask] = rng.choice(np.array([0, 255], dtype=np.uint8), size=int(mask.sum()))
+    return pixels
+
+def _text_lines(rng, language, count, words_per_line):
+    vocabulary = ENGLISH_WORDS if language == 'en' else ARABIC_WORDS
+    return [" ".join(rng.choice(vocabulary) for _ in range(words_per_line)) for _ in range(count)]
+
+def build_dataset(languages=('en', 'ar'), font_sizes=(10, 14, 24), skews=(0.0, 2.0),
+                  noises=(0.0, 0.03), pdf_pages=3, seed=1234, fonts=None):
+    """
+    Builds the benchmark documents.
+
+    Every combination of language, font size, skew and noise gives one
+    single-page image document. For each language there is also one
+    multi-page PDF (clean, medium font size) that exercises rasterization.
+
+    Returns:
+        list: Documents as dicts with
+            - id: Stable name of the document
+            - kind: 'image' or 'pdf'
+            - language: 'en' or 'ar'
+            - pages: Grayscale page arrays ('image' documents)
+            - pdf: Raw PDF bytes ('pdf' documents)
+            - ground_truth: Text of each page, lines separated by newlines
+    """
+    fonts = fonts or {}
+    rng = random.Random(seed)
+    documents = []
+
+    for language in languages:
+        font_path = find_font(language, fonts.get(language))
+        for font_size in font_sizes:
+            # Fewer, shorter lines for big type so the text fits the page
+            count = max(5, int(40 * 10 / font_size))
+            words_per_line = max(3, int(9 * 10 / font_size))
+            for skew in skews:
+                for noise in noises:
+                    lines = _text_lines(rng, language, count, words_per_line)
+                    page = render_page(lines, language, font_size, font_path,
+                                       skew=skew, noise=noise, seed=rng.randrange(2 ** 31))
+                    documents.append({
+                        'id': f"{language}-{font_size}pt-skew{skew:g}-noise{noise:g}",
+                        'kind': 'image',
+                        'language': language,
+                        'pages': [page],
+                        'ground_truth': ["\n".join(lines)],
+                    })
+
+        if pdf_pages:
+            page_lines = [_text_lines(rng, language, 30, 8) for _ in range(pdf_pages)]
+            images = [Image.fromarray(render_page(lines, language, 12, font_path)) for lines in page_lines]
+            buffer = io.BytesIO()
+            images[0].save(buffer, format='PDF', save_all=True, append_images=images[1:], resolution=DPI,
+                           creationDate=PDF_DATE, modDate=PDF_DATE)
+            documents.append({
+                'id': f"{language}-pdf-{pdf_pages}pages",
+                'kind': 'pdf',
+                'language': language,
+                'pdf': buffer.getvalue(),
+                'ground_truth': ["\n".join(lines) for lines in page_lines],
+            })
+
+    return documents
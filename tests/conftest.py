@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+# The app imports its modules from app/ (e.g. `from config import settings`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+
+@pytest.fixture
+def typed_page():
+    """
+    Renders lines of regular-weight 12pt text onto an A4 page at 300 DPI,
+    like a scanned typed page; optional Gaussian noise imitates the scanner.
+    """
+    try:
+        font = ImageFont.load_default(size=50)
+    except TypeError:
+        pytest.skip("Pillow >= 10.1 is needed for a scalable default font")
+
+    def render(lines, noise=0.0, seed=0, width=2480, height=3508):
+        page = Image.new('L', (width, height), 255)
+        draw = ImageDraw.Draw(page)
+        for index, line in enumerate(lines):
+            draw.text((200, 200 + index * 80), line, font=font, fill=0)
+        pixels = np.array(page)
+        if noise:
+            rng = np.random.default_rng(seed)
+            pixels = np.clip(pixels + rng.normal(0, noise, pixels.shape), 0, 255).astype(np.uint8)
+        return pixels
+
+    return render
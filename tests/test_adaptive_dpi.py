@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+import processors.adaptive_dpi as adaptive_dpi
+from processors.adaptive_dpi import choose_dpi, estimate_text_height
+
+
+def glyph_page(glyph_height, count=60, size=(800, 600)):
+    """A page of `count` character-like blocks `glyph_height` pixels tall, plus a rule and specks."""
+    page = np.full(size, 255, np.uint8)
+    width = max(1, glyph_height * 2 // 3)
+    for index in range(count):
+        x = 20 + (index % 20) * (width + 8)
+        y = 20 + (index // 20) * (glyph_height * 2)
+        page[y:y + glyph_height, x:x + width] = 0
+    page[size[0] - 40:size[0] - 38, 20:size[1] - 20] = 0
+    page[5, 5] = page[7, 300] = 0
+    return page
+
+
+def test_text_height_ignores_rules_and_specks():
+    assert estimate_text_height(glyph_page(10)) == 10.0
+    assert estimate_text_height(glyph_page(10, count=5)) is None
+
+
+def test_dpi_scales_the_text_to_the_target_height(monkeypatch):
+    monkeypatch.setattr(adaptive_dpi.settings, 'PDF_DPI', 300)
+    kwargs = dict(preview_dpi=100, target_height=25, min_dpi=150, max_dpi=450)
+    assert choose_dpi(glyph_page(10), **kwargs) == 250
+    assert choose_dpi(glyph_page(12), **kwargs) == 210
+    # Tiny and huge print are clamped, blank pages get the default
+    assert choose_dpi(glyph_page(4), **kwargs) == 450
+    assert choose_dpi(glyph_page(30), **kwargs) == 150
+    assert choose_dpi(np.full((800, 600), 255, np.uint8), **kwargs) == 300
+
+
+def test_typed_page_preview(typed_page):
+    page = typed_page(["The quick brown fox jumps over the lazy dog"] * 10)
+    preview = cv2.resize(page, None, fx=1 / 3, fy=1 / 3, interpolation=cv2.INTER_AREA)
+    full, small = estimate_text_height(page), estimate_text_height(preview)
+    assert abs(small * 3 - full) <= 3
+    assert 150 <= choose_dpi(preview, 100, target_height=25, min_dpi=150, max_dpi=450) <= 450
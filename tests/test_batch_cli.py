@@ -0,0 +1,70 @@
+import json
+import os
+
+import batch_cli
+from batch_cli import Manifest, completed_pages, expand_inputs, run_batch
+
+
+def write_jsonl(path, pages, torn=b''):
+    with open(path, 'wb') as f:
+        for page in range(1, pages + 1):
+            f.write(json.dumps({'page': page}).encode() + b'\n')
+        f.write(torn)
+
+
+def test_completed_pages_cuts_off_a_torn_record(tmp_path):
+    output = tmp_path / 'doc.jsonl'
+    assert completed_pages(str(output)) == 0
+    write_jsonl(output, 3, torn=b'{"page": 4, "te')
+    assert completed_pages(str(output)) == 3
+    assert output.read_bytes().endswith(b'{"page": 3}\n')
+
+
+def test_expand_inputs_finds_supported_documents(tmp_path):
+    (tmp_path / 'a').mkdir()
+    for name in ('a/one.PDF', 'a/two.png', 'a/notes.txt', 'three.jpg'):
+        (tmp_path / name).write_bytes(b'x')
+    found = expand_inputs([str(tmp_path / 'a'), str(tmp_path / '*.jpg'), str(tmp_path / 'missing')])
+    assert [os.path.basename(path) for path in found] == ['one.PDF', 'two.png', 'three.jpg']
+
+
+def test_manifest_keeps_finished_pages_until_the_input_changes(tmp_path):
+    document = tmp_path / 'scan.png'
+    document.write_bytes(b'first')
+    manifest = Manifest(str(tmp_path / 'manifest.json'))
+    entry = manifest.prepare(str(document), str(tmp_path))
+    assert (entry['pages'], entry['pages_done'], entry['status']) == (1, 0, 'pending')
+
+    write_jsonl(entry['output'], 1)
+    manifest.save()
+    entry = Manifest(str(tmp_path / 'manifest.json')).prepare(str(document), str(tmp_path))
+    assert (entry['pages_done'], entry['status']) == (1, 'done')
+
+    document.write_bytes(b'second version')
+    entry = manifest.prepare(str(document), str(tmp_path))
+    assert (entry['pages_done'], entry['status']) == (0, 'pending')
+    assert not os.path.exists(entry['output'])
+
+
+def test_interrupted_batches_resume_failed_documents_only(tmp_path, monkeypatch):
+    paths = []
+    for name in ('good.png', 'bad.png'):
+        (tmp_path / name).write_bytes(name.encode())
+        paths.append(str(tmp_path / name))
+    calls = []
+    failing = {'bad.png'}
+
+    def process(service_url, path, output_path, languages, start_page, progress):
+        calls.append((os.path.basename(path), start_page))
+        if os.path.basename(path) in failing:
+            raise RuntimeError("service unavailable")
+        return batch_cli._write_pages(path, output_path, [{'page': 1, 'text': 'ok'}], progress)
+
+    monkeypatch.setattr(batch_cli, '_process_document_remote', process)
+    output_dir = str(tmp_path / 'out')
+    assert run_batch(paths, output_dir, service_url='http://ocr') == {'done': 1, 'failed': 1}
+
+    failing.clear()
+    calls.clear()
+    assert run_batch(paths, output_dir, service_url='http://ocr') == {'done': 2}
+    assert calls == [('bad.png', 1)]
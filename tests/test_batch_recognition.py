@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import ocr_engines.batch_engine as batch_engine
+import ocr_engines.engine_pool as engine_pool_module
+import ocr_processor
+from ocr_engines.engine_pool import EnginePool
+from ocr_engines.paddleocr_engine import get_paddleocr
+from utils.result_cache import result_cache
+
+
+class FakePaddle:
+    """Detects one fixed line per page and reads every crop as its width."""
+
+    def ocr(self, image, det=True, rec=True, cls=False):
+        return [[[[2, 2], [22, 2], [22, 12], [2, 12]]]]
+
+    def text_recognizer(self, crops):
+        return [(f"w{crop.shape[1]}", 0.9) for crop in crops], 0.0
+
+
+def test_paddleocr_batches_reuse_the_shared_instance(monkeypatch):
+    created = []
+    pool = EnginePool(factories={'paddleocr': lambda languages, **options: created.append(options) or FakePaddle()})
+    monkeypatch.setattr(engine_pool_module, 'engine_pool', pool)
+
+    items = [{'image': np.full((30, 40, 3), 255, np.uint8), 'source': page, 'offset': (0, 100 * page)}
+             for page in range(3)]
+    results = batch_engine.run_batch(items, 'paddleocr', ['en'])
+
+    assert get_paddleocr('en') is get_paddleocr('en')
+    assert len(created) == 1
+    assert [[(word['text'], word['source']) for word in words] for words in results] == \
+        [[('w20', 0)], [('w20', 1)], [('w20', 2)]]
+    assert results[2][0]['box'][0] == [2.0, 202.0]
+
+
+class FakeReader:
+    """Detects one fixed box per image and reads every box as its height."""
+
+    def __init__(self, device):
+        self.device = device
+        self.recognized = []
+
+    def detect(self, image):
+        return [[[2, 22, 2, 12]]], [[]]
+
+    def recognize(self, image, horizontal_list, free_list, batch_size=1):
+        self.recognized.append(image.shape)
+        return [([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], f"h{y1 - y0}", 0.9)
+                for x0, x1, y0, y1 in horizontal_list]
+
+
+@pytest.mark.parametrize('device, canvas', [('cpu', False), ('cuda', True)])
+def test_easyocr_only_stacks_regions_on_a_gpu(monkeypatch, device, canvas):
+    reader = FakeReader(device)
+    monkeypatch.setattr(batch_engine, 'get_engine', lambda *args, **kwargs: reader)
+
+    items = [{'image': np.full((30, 40), 255, np.uint8), 'source': page} for page in range(3)]
+    results = batch_engine.run_batch(items, 'easyocr', ['en'], batch_size=8)
+
+    assert [len(words) for words in results] == [1, 1, 1]
+    assert [word['source'] for words in results for word in words] == [0, 1, 2]
+    assert len(reader.recognized) == (1 if canvas else 3)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(ocr_processor.settings, 'BATCH_RECOGNITION', True)
+    monkeypatch.setattr(ocr_processor.settings, 'RECOGNITION_BATCH_PAGES', 2)
+    monkeypatch.setattr(ocr_processor.settings, 'LANGUAGE_DETECTION', False)
+    monkeypatch.setattr(result_cache, 'contains', lambda key: False)
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: None)
+    processor = ocr_processor.OCRProcessor(engines=['paddleocr'], mode='ensemble')
+    monkeypatch.setattr(processor, '_load_engine', lambda engine: object())
+    monkeypatch.setattr(processor, '_extract_with_paddleocr',
+                        lambda *args: pytest.fail("page was recognized again on the per-page path"))
+    return processor
+
+
+def test_prefetched_pages_skip_the_per_page_engine(processor, monkeypatch):
+    batches = []
+
+    def run_batch(items, engine, languages):
+        batches.append((engine, languages, len(items)))
+        return [[{'text': 'Total', 'confidence': 88.0, 'box': [[0, 0], [10, 0], [10, 5], [0, 5]], 'source': None}]
+                for _ in items]
+    monkeypatch.setattr(batch_engine, 'run_batch', run_batch)
+
+    images = [Image.new('L', (30 + page, 20), 255) for page in range(4)]
+    pages = processor._prefetch_recognition(iter(images), ['en'], {})
+    results = [processor._process_image(image, ['en']) for image in pages]
+
+    assert batches == [('paddleocr', ['en'], 1), ('paddleocr', ['en'], 2), ('paddleocr', ['en'], 1)]
+    assert [result['text'] for result in results] == ['Total'] * 4
+    assert all(result['all_engines'][0]['engine'] == 'paddleocr' for result in results)
+
+
+def test_batched_recognition_is_off_by_default_and_in_cascade_mode(processor, monkeypatch):
+    assert processor._batches_recognition() == ['paddleocr']
+    processor.engines = ['easyocr', 'paddleocr']
+    assert processor._batches_recognition() == ['paddleocr']
+    monkeypatch.setattr(ocr_processor.settings, 'BATCH_RECOGNITION', False)
+    assert processor._batches_recognition() == []
+    monkeypatch.setattr(ocr_processor.settings, 'BATCH_RECOGNITION', True)
+    processor.mode = 'cascade'
+    assert processor._batches_recognition() == []
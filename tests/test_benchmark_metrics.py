@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from metrics import edit_distance, error_counts, error_rates, latency_summary  # noqa: E402
+from synthetic import build_dataset  # noqa: E402
+
+
+def test_edit_distance_on_characters_and_words():
+    assert edit_distance('kitten', 'sitting') == 3
+    assert edit_distance('', 'abc') == edit_distance('abc', '') == 3
+    assert edit_distance('total due'.split(), 'total amount due'.split()) == 1
+
+
+def test_error_rates_ignore_whitespace_and_aggregate_over_pages():
+    first = error_counts('Total  due\n1,250', 'Total due 1,250')
+    assert first == {'char_errors': 0, 'chars': 15, 'word_errors': 0, 'words': 3}
+
+    second = error_counts('invoice 42', 'invoice 43')
+    total = {key: first[key] + second[key] for key in first}
+    rates = error_rates(total)
+    assert rates['cer'] == pytest.approx(1 / 25)
+    assert rates['wer'] == pytest.approx(1 / 5)
+    assert error_rates(error_counts('', '')) == {'cer': 0.0, 'wer': 0.0}
+
+
+def test_latency_summary():
+    summary = latency_summary([0.1, 0.2, 0.3, 0.4])
+    assert summary['p50_ms'] == 250.0
+    assert summary['mean_ms'] == 250.0
+    assert summary['total_s'] == 1.0
+    assert summary['count'] == 4
+    assert latency_summary([])['p95_ms'] is None
+
+
+def build_small_dataset():
+    try:
+        return build_dataset(languages=('en',), font_sizes=(24,), skews=(0.0,), noises=(0.03,), pdf_pages=1)
+    except FileNotFoundError as e:
+        pytest.skip(str(e))
+
+
+def test_dataset_is_reproducible():
+    first, second = build_small_dataset(), build_small_dataset()
+    assert [document['id'] for document in first] == [document['id'] for document in second]
+    assert [document['ground_truth'] for document in first] == [document['ground_truth'] for document in second]
+    for one, other in zip(first, second):
+        if one['kind'] == 'image':
+            np.testing.assert_array_equal(one['pages'][0], other['pages'][0])
+        else:
+            assert one['pdf'] == other['pdf']
+
+
+def test_pdf_pages_are_closed_when_the_benchmark_stops_early(monkeypatch):
+    import processors.pdf_processor as pdf_processor
+    # Importing the benchmark turns the result cache off for the whole process
+    monkeypatch.setenv('OCR_CACHE_ENABLED', '0')
+    import run_benchmark
+
+    rasterizers = []
+
+    def iter_pdf_arrays(data):
+        # Kept alive here, so only an explicit close() finishes it
+        rasterizers.append(np.zeros((2, 2), np.uint8) for _ in data)
+        return rasterizers[-1]
+    monkeypatch.setattr(pdf_processor, 'iter_pdf_arrays', iter_pdf_arrays)
+
+    pages = run_benchmark._iter_pages({'kind': 'pdf', 'pdf': b'abc', 'ground_truth': ['a', 'b', 'c']},
+                                      run_benchmark.defaultdict(list))
+    next(pages)
+    pages.close()
+    assert rasterizers[0].gi_frame is None
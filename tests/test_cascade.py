@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import ocr_engines.engine_pool as engine_pool_module
+import ocr_engines.ensemble_ocr as ensemble_ocr
+import ocr_processor
+from ocr_engines.engine_pool import EnginePool
+from ocr_engines.ensemble_ocr import cascade_ocr
+from utils.result_cache import result_cache
+
+TESSERACT_WORDS = [
+    {'text': 'clear', 'confidence': 95, 'box': (10, 10, 50, 20)},
+    {'text': 'b1urry', 'confidence': 30, 'box': (70, 10, 60, 20)},
+]
+
+
+@pytest.fixture
+def engines(monkeypatch):
+    """Fake engines: Tesseract is unsure of one word, EasyOCR fails, PaddleOCR reads it."""
+    def run(engine, image, languages, cache=True):
+        if engine == 'tesseract':
+            return [dict(word) for word in TESSERACT_WORDS]
+        if engine == 'easyocr':
+            raise RuntimeError("out of memory")
+        return [{'text': 'blurry', 'confidence': 90.0, 'box': (2, 2, 56, 16)}]
+    monkeypatch.setattr(ensemble_ocr, '_run_engine', run)
+
+
+def test_cascade_rereads_unsure_regions_and_reports_failed_engines(engines):
+    failed = set()
+    words = cascade_ocr(np.full((40, 200), 255, np.uint8), threshold=60,
+                        fallback_engines=('easyocr', 'paddleocr'), failed=failed)
+    assert [(word['text'], word['engine']) for word in words] == [('clear', 'tesseract'), ('blurry', 'paddleocr')]
+    assert failed == {'easyocr'}
+
+
+def test_cascade_page_with_a_failed_engine_is_not_cached(engines, monkeypatch):
+    processor = ocr_processor.OCRProcessor(mode='cascade', engines=['tesseract', 'easyocr', 'paddleocr'])
+    monkeypatch.setattr(processor, '_load_engine', lambda engine: pytest.fail(f"{engine} was loaded"))
+    stored = []
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: stored.append(value))
+
+    result = processor._process_image(Image.new('L', (200, 40), 255), ['en'])
+    assert result['failed_engines'] == ['easyocr']
+    assert stored == []
+
+
+def test_paddleocr_is_loaded_once_for_processor_and_cascade(monkeypatch):
+    created = []
+    pool = EnginePool(factories={'paddleocr': lambda languages, **options: created.append(options) or object()})
+    monkeypatch.setattr(engine_pool_module, 'engine_pool', pool)
+    from ocr_engines.paddleocr_engine import get_paddleocr
+
+    assert ocr_processor.ENGINE_LOADERS['paddleocr']() is get_paddleocr('en')
+    assert len(created) == 1
@@ -0,0 +1,113 @@
+import io
+import os
+import pickle
+
+import pytest
+from PIL import Image
+
+import ocr_processor
+from utils.checkpoint import PageCheckpoint, document_key, prune_checkpoints
+
+
+def page(number):
+    return {'page': number, 'text': f"page {number}"}
+
+
+def test_document_key_depends_on_bytes_and_options():
+    key = document_key(b'%PDF', {'languages': ['en']})
+    assert key == document_key(b'%PDF', {'languages': ['en']})
+    assert key != document_key(b'%PDF', {'languages': ['ar']})
+    assert key != document_key(b'%PDF-1.7', {'languages': ['en']})
+
+
+def test_resume_stops_at_the_first_missing_page(tmp_path):
+    checkpoint = PageCheckpoint('doc', str(tmp_path))
+    for number in (1, 2, 4):
+        checkpoint.save_page(page(number))
+    finished, next_page = PageCheckpoint('doc', str(tmp_path)).resume()
+    assert [result['page'] for result in finished] == [1, 2]
+    assert next_page == 3
+    assert PageCheckpoint('doc', str(tmp_path)).resume(start_page=4) == ([page(4)], 5)
+
+    checkpoint.clear()
+    assert checkpoint.resume() == ([], 1)
+
+
+def test_unreadable_pages_are_dropped(tmp_path):
+    checkpoint = PageCheckpoint('doc', str(tmp_path))
+    checkpoint.save_page(page(1))
+    with open(checkpoint._page_path(2), 'wb') as f:
+        f.write(b'not a pickle')
+    assert checkpoint.resume() == ([page(1)], 2)
+    assert checkpoint.page_numbers() == [1]
+
+
+def write_checkpoint(root, key, pages, mtime, size=1000):
+    path = root / key
+    path.mkdir()
+    for number in range(1, pages + 1):
+        page_path = path / f"page-{number:05d}.pkl"
+        page_path.write_bytes(pickle.dumps('x' * size))
+        os.utime(page_path, (mtime, mtime))
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_removes_old_then_least_recently_written_checkpoints(tmp_path):
+    now = os.path.getmtime(tmp_path)
+    write_checkpoint(tmp_path, 'expired', 1, now - 100)
+    write_checkpoint(tmp_path, 'oldest', 2, now - 30)
+    write_checkpoint(tmp_path, 'newer', 2, now - 20)
+    write_checkpoint(tmp_path, 'current', 2, now - 90)
+
+    removed = prune_checkpoints(str(tmp_path), max_age=60, max_bytes=3000, keep='current')
+    assert removed == 2
+    assert sorted(os.listdir(tmp_path)) == ['current', 'newer']
+
+
+def test_a_new_checkpoint_prunes_abandoned_ones(tmp_path):
+    write_checkpoint(tmp_path, 'abandoned', 1, 0)
+    checkpoint = PageCheckpoint('doc', str(tmp_path))
+    checkpoint.save_page(page(1))
+    assert os.listdir(tmp_path) == ['doc']
+
+
+def test_interrupted_document_resumes_at_its_first_unfinished_page(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_processor.settings, 'CHECKPOINT_ENABLED', True)
+    monkeypatch.setattr(ocr_processor.settings, 'CHECKPOINT_DIR', str(tmp_path))
+    monkeypatch.setattr(ocr_processor.settings, 'TEXT_LAYER_ENABLED', False)
+    monkeypatch.setattr(ocr_processor.settings, 'TRIAGE_ENABLED', False)
+    monkeypatch.setattr(ocr_processor.OCRProcessor, '_load_engine', lambda self, engine: object())
+    processor = ocr_processor.OCRProcessor(engines=['easyocr'], mode='ensemble')
+
+    rendered, processed, failed = [], [], []
+
+    def iter_pdf_pages(file_stream, first_page=1, pages=None):
+        for number in range(first_page, 6):
+            rendered.append(number)
+            yield Image.new('L', (20, 20), 255 - number)
+
+    def process_image(image, languages, **kwargs):
+        number = 255 - image.getpixel((0, 0))
+        if number == 3 and not failed:
+            failed.append(number)
+            raise RuntimeError("worker died")
+        processed.append(number)
+        return {'text': f"page {number}", 'confidence': 0.9, 'engine_used': 'easyocr', 'words': [],
+                'all_engines': []}
+    monkeypatch.setattr(processor, '_iter_pdf_pages', iter_pdf_pages)
+    monkeypatch.setattr(processor, '_process_image', process_image)
+
+    with pytest.raises(RuntimeError):
+        processor.process_file(io.BytesIO(b'%PDF'), 'pdf', ['en'])
+    assert processed == [1, 2]
+
+    rendered.clear()
+    result = processor.process_file(io.BytesIO(b'%PDF'), 'pdf', ['en'])
+    processor.close()
+
+    assert result['resumed_pages'] == 2
+    assert rendered == [3, 4, 5]
+    assert processed == [1, 2, 3, 4, 5]
+    assert result['text'] == "\n\n".join(f"page {number}" for number in range(1, 6))
+    # The checkpoint of a finished document is removed
+    assert os.listdir(tmp_path) == []
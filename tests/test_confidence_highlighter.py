@@ -0,0 +1,39 @@
+import io
+import re
+import zipfile
+
+from utils.confidence_highlighter import create_highlighted_document, get_highlight_color
+
+WORDS = [
+    {'text': 'Invoice', 'confidence': 95, 'page': 1, 'line': 0},
+    {'text': 'number', 'confidence': 99, 'page': 1, 'line': 0},
+    {'text': '4711', 'confidence': 40, 'page': 1, 'line': 0},
+    {'text': 'Total', 'confidence': 80, 'page': 1, 'line': 1},
+    {'text': 'Thanks', 'confidence': 70, 'page': 2, 'line': 0},
+]
+
+
+def document_xml(words, **kwargs):
+    buffer = io.BytesIO()
+    create_highlighted_document(words, buffer, **kwargs)
+    with zipfile.ZipFile(buffer) as docx:
+        return docx.read('word/document.xml').decode('utf-8')
+
+
+def test_highlight_colors_follow_the_confidence_bands():
+    assert [get_highlight_color(c) for c in (10, 50, 60, 75, 85, 90, 95)] == \
+        ['FF0000', 'FF0000', 'FFA500', 'FFA500', 'FFFF00', 'FFFF00', '00FF00']
+
+
+def test_one_paragraph_per_line_with_coalesced_runs():
+    xml = document_xml(WORDS)
+    paragraphs = re.findall(r'<w:p>.*?</w:p>', xml)
+    assert len(paragraphs) == 3
+    runs = re.findall(r'w:fill="(\w+)"/></w:rPr><w:t xml:space="preserve">([^<]*)<', paragraphs[0])
+    assert runs == [('00FF00', 'Invoice number '), ('FF0000', '4711 ')]
+    assert '<w:pageBreakBefore/>' in paragraphs[2] and '<w:pageBreakBefore/>' not in paragraphs[1]
+
+
+def test_rtl_documents_are_right_aligned():
+    xml = document_xml(WORDS[:1], rtl=True)
+    assert '<w:bidi/><w:jc w:val="right"/>' in xml
@@ -0,0 +1,53 @@
+import ocr_processor
+
+
+def fake_loaders(monkeypatch, loaded, failing=()):
+    def loader(engine):
+        def load():
+            loaded.append(engine)
+            if engine in failing:
+                raise RuntimeError(f"{engine} model missing")
+            return object()
+        return load
+
+    for engine in ocr_processor.ENGINE_METHODS:
+        monkeypatch.setitem(ocr_processor.ENGINE_MODULES, engine, 'json')
+        monkeypatch.setitem(ocr_processor.ENGINE_LOADERS, engine, loader(engine))
+
+
+def test_engines_load_once_on_first_use(monkeypatch):
+    loaded = []
+    fake_loaders(monkeypatch, loaded)
+    processor = ocr_processor.OCRProcessor(engines=['easyocr', 'tesseract'], warm_up=False)
+    assert loaded == []
+
+    assert processor.easyocr_reader is processor.easyocr_reader
+    assert processor.paddle_ocr is None
+    assert loaded == ['easyocr']
+
+
+def test_startup_report_reports_every_engine_status(monkeypatch):
+    loaded = []
+    fake_loaders(monkeypatch, loaded, failing=('tesseract',))
+    processor = ocr_processor.OCRProcessor(engines=['easyocr', 'paddleocr', 'tesseract'], warm_up=False)
+    processor.easyocr_reader
+    assert not processor.use_native_tesseract
+    assert not processor.use_native_tesseract
+    assert loaded == ['easyocr', 'tesseract']
+
+    report = processor.startup_report()
+    assert report['import_time'] > 0
+    engines = report['engines']
+    assert engines['easyocr']['status'] == 'loaded'
+    assert engines['easyocr']['load_time'] >= 0
+    assert engines['paddleocr'] == {'status': 'not loaded'}
+    assert engines['tesseract']['status'] == 'failed'
+    assert engines['tesseract']['error'] == 'tesseract model missing'
+
+
+def test_warm_up_loads_every_configured_engine(monkeypatch):
+    loaded = []
+    fake_loaders(monkeypatch, loaded)
+    processor = ocr_processor.OCRProcessor(engines=['paddleocr', 'tesseract'], warm_up=True)
+    processor._warm_up_thread.join(5)
+    assert sorted(loaded) == ['paddleocr', 'tesseract']
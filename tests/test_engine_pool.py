@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from ocr_engines.engine_pool import EnginePool
+
+
+def make_pool(max_engines=2, created=None, delay=0.0):
+    created = created if created is not None else []
+
+    def factory(languages, **options):
+        time.sleep(delay)
+        created.append((tuple(languages), tuple(sorted(options.items()))))
+        return object()
+    return EnginePool(max_engines=max_engines, factories={'easyocr': factory, 'paddleocr': factory})
+
+
+def test_same_languages_and_options_share_one_instance():
+    created = []
+    pool = make_pool(created=created)
+    reader = pool.get('easyocr', ['en', 'ar'], gpu=False)
+    assert pool.get('easyocr', ['ar', 'en'], gpu=False) is reader
+    assert pool.get('easyocr', ['en', 'ar'], gpu=True) is not reader
+    assert len(created) == 2
+
+
+def test_factory_gets_the_languages_in_the_callers_order():
+    created = []
+    pool = make_pool(created=created)
+    pool.get('easyocr', ['en', 'ar'])
+    pool.get('paddleocr', 'ar')
+    assert [languages for languages, _ in created] == [('en', 'ar'), ('ar',)]
+
+
+def test_least_recently_used_engine_is_evicted():
+    pool = make_pool(max_engines=2)
+    english = pool.get('easyocr', 'en')
+    pool.get('paddleocr', 'en')
+    # Using English again makes PaddleOCR the least recently used
+    assert pool.get('easyocr', 'en') is english
+    pool.get('easyocr', 'ar')
+    assert [key[:2] for key in pool.resident()] == [('easyocr', ('en',)), ('easyocr', ('ar',))]
+
+    pool.evict('easyocr')
+    assert pool.resident() == []
+
+
+def test_concurrent_requests_load_an_engine_once():
+    created = []
+    pool = make_pool(created=created, delay=0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get('easyocr', 'en'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+    assert len({id(result) for result in results}) == 1
+
+
+def test_failed_load_is_retried_and_unknown_engines_rejected():
+    attempts = []
+
+    def flaky(languages, **options):
+        attempts.append(languages)
+        if len(attempts) == 1:
+            raise RuntimeError("download failed")
+        return object()
+    pool = EnginePool(factories={'easyocr': flaky})
+    with pytest.raises(RuntimeError):
+        pool.get('easyocr', 'en')
+    assert pool.get('easyocr', 'en') is not None
+    with pytest.raises(ValueError):
+        pool.get('tesseract', 'en')
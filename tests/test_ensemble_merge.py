@@ -0,0 +1,79 @@
+from PIL import Image
+
+import ocr_processor
+from ocr_engines.ensemble_ocr import merge_word_results, order_words, split_words, words_to_text
+from utils.result_cache import result_cache
+from utils.word_table import WordTable
+
+TESSERACT = [
+    {'text': 'Invoice', 'confidence': 90.0, 'box': (10, 10, 70, 20)},
+    {'text': '4711', 'confidence': 50.0, 'box': (90, 10, 40, 20)},
+    {'text': 'Total', 'confidence': 85.0, 'box': (10, 50, 50, 20)},
+]
+# EasyOCR and PaddleOCR return whole lines as corner points
+EASYOCR = [{'text': 'Invoice 4T11', 'confidence': 80.0, 'box': [[10, 10], [130, 10], [130, 30], [10, 30]]}]
+PADDLEOCR = [{'text': '4711', 'confidence': 60.0, 'box': [[91, 11], [129, 11], [129, 29], [91, 29]]}]
+
+
+def test_split_words_divides_lines_by_length_and_direction():
+    assert [box for _, _, box in split_words(EASYOCR[0])] == [(10.0, 10.0, 80.0, 30.0), (90.0, 10.0, 130.0, 30.0)]
+    arabic = split_words({'text': 'فاتورة رقم', 'confidence': 70.0, 'box': (0, 0, 110, 20)})
+    # The first Arabic word is the rightmost one
+    assert arabic[0][0] == 'فاتورة' and arabic[0][2][2] == 110.0
+
+
+def test_engines_vote_per_word():
+    merged = merge_word_results({'tesseract': TESSERACT, 'easyocr': EASYOCR, 'paddleocr': PADDLEOCR})
+    assert [(word['text'], word['line']) for word in merged] == [('Invoice', 0), ('4711', 0), ('Total', 1)]
+    invoice, number, total = merged
+    assert invoice['engines'] == ['easyocr', 'tesseract'] and invoice['confidence'] == 85.0
+    # Two engines read 4711 against one 4T11; the dissent lowers the confidence
+    assert number['engines'] == ['paddleocr', 'tesseract']
+    assert number['confidence'] == round((50.0 + 60.0) / 3, 2)
+    assert total == {'text': 'Total', 'confidence': 85.0, 'box': (10, 50, 50, 20), 'engines': ['tesseract'],
+                     'line': 1}
+    assert words_to_text(merged) == "Invoice 4711\nTotal"
+
+
+def test_weights_and_word_tables():
+    words = WordTable.concat([WordTable.from_words(TESSERACT, engine='tesseract'),
+                              WordTable.from_words(EASYOCR, engine='easyocr')])
+    merged = merge_word_results(words, weights={'easyocr': 2.0})
+    assert [word['text'] for word in merged] == ['Invoice', '4T11', 'Total']
+
+
+def test_words_of_one_engine_are_never_merged():
+    overlapping = [{'text': 'a', 'confidence': 90.0, 'box': (0, 0, 20, 20)},
+                   {'text': 'b', 'confidence': 80.0, 'box': (2, 0, 20, 20)}]
+    assert len(merge_word_results({'tesseract': overlapping})) == 2
+
+
+def test_order_words_numbers_lines_and_reads_arabic_right_to_left():
+    words = [
+        {'text': 'رقم', 'box': (10, 52, 40, 20)},
+        {'text': 'world', 'box': (80, 12, 50, 20)},
+        {'text': 'فاتورة', 'box': (60, 50, 50, 20)},
+        {'text': 'Hello', 'box': (10, 10, 60, 20)},
+    ]
+    ordered = order_words(words)
+    assert [(word['text'], word['line']) for word in ordered] == \
+        [('Hello', 0), ('world', 0), ('فاتورة', 1), ('رقم', 1)]
+
+
+def test_processor_results_of_every_engine_drop_their_words(monkeypatch):
+    monkeypatch.setattr(ocr_processor.settings, 'LANGUAGE_DETECTION', False)
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: None)
+    processor = ocr_processor.OCRProcessor(engines=['tesseract', 'easyocr'], mode='ensemble')
+    monkeypatch.setattr(processor, '_load_engine', lambda engine: object())
+    monkeypatch.setattr(processor, '_extract_with_tesseract', lambda *args: ('', 0.0, []))
+    monkeypatch.setattr(processor, '_extract_with_easyocr', lambda *args: ('Total', 0.9, [
+        {'text': 'Total', 'confidence': 90.0, 'box': (10, 10, 50, 20)}]))
+
+    result = processor._process_image(Image.new('L', (80, 40), 255), ['en'])
+    processor.close()
+
+    assert result['engine_used'] == 'easyocr'
+    assert [word['text'] for word in result['words']] == ['Total']
+    assert [sorted(res) for res in result['all_engines']] == [sorted(result['all_engines'][0])] * 2
+    assert not any('words' in res for res in result['all_engines'])
@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import processors.pdf_processor as pdf_processor
+from processors.image_preprocessing import decode_image, preprocess_image
+
+
+@pytest.fixture
+def page(typed_page):
+    return typed_page(['INVOICE 2041', 'Total due: 1,250.00'], width=1200, height=600)
+
+
+def test_decoded_pages_match_pages_read_from_disk(page, tmp_path):
+    path = str(tmp_path / 'page.png')
+    cv2.imwrite(path, page)
+    data = open(path, 'rb').read()
+
+    gray = decode_image(data)
+    assert gray.ndim == 2
+    assert decode_image(data, grayscale=False).shape == page.shape + (3,)
+    np.testing.assert_array_equal(preprocess_image(gray), preprocess_image(path))
+
+
+def test_grayscale_and_bgr_pages_preprocess_the_same(page):
+    bgr = cv2.cvtColor(page, cv2.COLOR_GRAY2BGR)
+    np.testing.assert_array_equal(preprocess_image(page), preprocess_image(bgr))
+
+
+def test_undecodable_upload_is_rejected():
+    with pytest.raises(ValueError):
+        decode_image(b'not an image')
+
+
+def test_pdf_pages_are_yielded_as_arrays(monkeypatch):
+    calls = []
+
+    def convert_from_path(path, dpi, first_page, last_page, grayscale=False, **kwargs):
+        calls.append(grayscale)
+        return [Image.new('L' if grayscale else 'RGB', (8, 6), number) for number in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(pdf_processor, 'convert_from_path', convert_from_path)
+    monkeypatch.setattr(pdf_processor, 'pdfinfo_from_path', lambda path: {'Pages': 2})
+
+    pages = list(pdf_processor.iter_pdf_arrays(b'%PDF', dpi=100))
+    assert all(isinstance(page, np.ndarray) and page.shape == (6, 8) for page in pages)
+    assert [page[0, 0] for page in pages] == [1, 2]
+    assert set(calls) == {True}
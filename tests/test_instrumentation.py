@@ -0,0 +1,55 @@
+import threading
+
+from utils.instrumentation import StageMetrics, Tracer, current_tracer, measure_call, span, use_tracer
+
+
+def test_spans_are_recorded_on_the_current_tracer_only():
+    with span('preprocess'):
+        pass
+    tracer = Tracer()
+    with use_tracer(tracer):
+        assert current_tracer() is tracer
+        with span('engine', engine='tesseract', page=1):
+            sum(range(1000))
+    assert current_tracer() is None
+
+    (recorded,) = tracer.spans
+    assert (recorded['name'], recorded['engine'], recorded['page']) == ('engine', 'tesseract', 1)
+    assert recorded['wall_time'] >= 0 and recorded['cpu_time'] is not None
+
+
+def test_tracers_do_not_leak_into_other_threads():
+    seen = []
+    with use_tracer(Tracer()):
+        thread = threading.Thread(target=lambda: seen.append(current_tracer()))
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_summary_totals_stages_and_engines():
+    tracer = Tracer()
+    tracer.record('engine', wall_time=1.0, cpu_time=0.5, engine='easyocr')
+    tracer.record('engine', wall_time=2.0, engine='easyocr')
+    tracer.record('engine', wall_time=4.0, cpu_time=1.0, engine='tesseract')
+    tracer.extend([{'name': 'rasterize', 'wall_time': 0.25, 'cpu_time': None, 'rss_delta': 10}], page=3)
+
+    summary = tracer.summary()
+    assert summary['engine:easyocr'] == {'count': 2, 'wall_time': 3.0, 'cpu_time': 0.5, 'rss_delta': 0}
+    assert summary['rasterize']['rss_delta'] == 10
+    assert tracer.spans[-1]['page'] == 3
+
+
+def test_measure_call_and_prometheus_export():
+    result, measured = measure_call(sorted, [3, 1, 2])
+    assert result == [1, 2, 3]
+    assert set(measured) == {'wall_time', 'cpu_time', 'rss_delta'}
+
+    metrics = StageMetrics(prefix='test')
+    metrics.observe([{'name': 'page', 'wall_time': 1.5, 'cpu_time': 1.0},
+                     {'name': 'engine', 'engine': 'tesseract', 'wall_time': 0.5, 'cpu_time': None}])
+    metrics.observe([{'name': 'page', 'wall_time': 0.5, 'cpu_time': 0.25}])
+    text = metrics.to_prometheus()
+    assert 'test_stage_calls_total{stage="page"} 2' in text
+    assert 'test_stage_wall_seconds_total{stage="engine",engine="tesseract"} 0.5' in text
+    assert '# TYPE test_stage_cpu_seconds_total counter' in text
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import processors.language_detection as language_detection
+from processors.language_detection import route_languages
+
+
+@pytest.fixture
+def page(typed_page):
+    # Text in every third of the page
+    return typed_page(["Quarterly report 2024 - revenue and costs"] * 40)
+
+
+def fake_osd(monkeypatch, results):
+    """Makes OSD report results[i] for the i-th band it is called on."""
+    calls = iter(results)
+    monkeypatch.setattr(language_detection, 'detect_script', lambda band: next(calls))
+
+
+def test_single_script_page_drops_other_languages(monkeypatch, page):
+    fake_osd(monkeypatch, [('Latin', 9.0)] * 3)
+    assert route_languages(page, ['en', 'ar'], min_confidence=5.0, bands=3) == ['en']
+
+
+def test_mixed_script_page_keeps_every_language(monkeypatch, page):
+    # Arabic body with an English band: OSD on the whole page would only say Arabic
+    fake_osd(monkeypatch, [('Arabic', 8.0), ('Latin', 7.5), ('Arabic', 9.0)])
+    assert route_languages(page, ['en', 'ar'], min_confidence=5.0, bands=3) == ['en', 'ar']
+
+
+def test_uncertain_band_keeps_every_language(monkeypatch, page):
+    fake_osd(monkeypatch, [('Latin', 9.0), ('Latin', 1.5), ('Latin', 9.0)])
+    assert route_languages(page, ['en', 'ar'], min_confidence=5.0, bands=3) == ['en', 'ar']
+    fake_osd(monkeypatch, [('Latin', 9.0), (None, 0.0), ('Latin', 9.0)])
+    assert route_languages(page, ['en', 'ar'], min_confidence=5.0, bands=3) == ['en', 'ar']
+
+
+def test_empty_bands_are_not_checked(monkeypatch, typed_page):
+    # Text only in the top third
+    fake_osd(monkeypatch, [('Arabic', 9.0)])
+    page = typed_page(["word"] * 5)
+    assert route_languages(page, ['en', 'ar'], min_confidence=5.0, bands=3) == ['ar']
+
+
+def test_single_script_candidates_skip_detection(monkeypatch):
+    fake_osd(monkeypatch, [])
+    assert route_languages(np.full((100, 100), 255, np.uint8), ['en', 'fr']) == ['en', 'fr']
@@ -0,0 +1,70 @@
+import numpy as np
+
+import ocr_engines.layout_ocr as layout_ocr
+from processors.layout_detection import order_blocks
+
+BLOCKS = [
+    {'type': 'Text', 'box': (520, 100, 900, 300)},
+    {'type': 'Title', 'box': (40, 10, 900, 60)},
+    {'type': 'Figure', 'box': (40, 320, 900, 600)},
+    {'type': 'Text', 'box': (40, 100, 480, 300)},
+    {'type': 'Table', 'box': (40, 620, 900, 700)},
+]
+
+
+def test_order_blocks_reads_columns_between_full_width_blocks():
+    ordered = order_blocks(BLOCKS, 1000)
+    assert [block['box'][:2] for block in ordered] == [(40, 10), (40, 100), (520, 100), (40, 320), (40, 620)]
+    rtl = order_blocks(BLOCKS, 1000, rtl=True)
+    assert [block['box'][:2] for block in rtl][1:3] == [(520, 100), (40, 100)]
+
+
+def test_layout_words_are_tagged_and_use_the_page_languages(monkeypatch):
+    calls = []
+
+    def tesseract(crop, lang='eng+ara', cache=True):
+        assert not cache
+        calls.append(('tesseract', lang))
+        return [{'text': 'a', 'confidence': 90, 'box': (1, 2, 10, 8)},
+                {'text': 'b', 'confidence': 90, 'box': (1, 30, 10, 8)}]
+
+    def easyocr(crop, languages=('en', 'ar'), cache=True):
+        assert not cache
+        calls.append(('easyocr', tuple(languages)))
+        return [{'text': 'c', 'confidence': 80, 'box': [[1, 2], [11, 2], [11, 10], [1, 10]]}]
+
+    monkeypatch.setattr(layout_ocr, 'run_tesseract_ocr', tesseract)
+    monkeypatch.setattr(layout_ocr, 'run_easyocr', easyocr)
+    page = np.full((720, 1000), 255, np.uint8)
+    words = layout_ocr.run_layout_ocr(page, engines=['tesseract', 'easyocr'], blocks=BLOCKS,
+                                      padding=0, workers=2, languages=['ar'])
+
+    # Three text blocks and the table; the figure is never recognized
+    assert len(calls) == 3 * 2 + 1
+    assert set(calls) == {('tesseract', 'ara'), ('easyocr', ('ar',))}
+    assert all(word['engine'] in ('tesseract', 'easyocr') for word in words)
+    table = [word for word in words if word['block_type'] == 'Table']
+    assert [(word['text'], word['line'], word['engine']) for word in table] == \
+        [('a', (3, 0), 'tesseract'), ('b', (3, 1), 'tesseract')]
+    # Boxes are moved back into page coordinates
+    assert table[0]['box'] == (41, 622, 10, 8)
+
+
+def test_pipeline_reads_arabic_only_pages_right_to_left(monkeypatch):
+    import pipeline
+    from ocr_engines.languages import is_rtl_language
+    from utils.result_cache import result_cache
+
+    assert is_rtl_language(['ar']) and not is_rtl_language(['en', 'ar']) and not is_rtl_language([])
+    calls = []
+    monkeypatch.setattr(pipeline.settings, 'LAYOUT_ENABLED', True)
+    monkeypatch.setattr(pipeline.settings, 'LANGUAGE_DETECTION', True)
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: None)
+    monkeypatch.setattr(layout_ocr, 'run_layout_ocr',
+                        lambda image, languages, rtl: calls.append((languages, rtl)) or [])
+    page = np.full((60, 80), 255, np.uint8)
+    for routed in (['ar'], ['en'], ['en', 'ar']):
+        monkeypatch.setattr(pipeline, 'route_languages', lambda image, candidates, routed=routed: routed)
+        pipeline.process_page(page)
+    assert calls == [(['ar'], True), (['en'], False), (['en', 'ar'], False)]
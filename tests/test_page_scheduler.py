@@ -0,0 +1,30 @@
+import itertools
+
+from page_scheduler import PageScheduler
+
+
+def test_pages_come_back_in_order_and_are_pulled_lazily():
+    pulled = []
+
+    def pages():
+        for page in itertools.count(1):
+            pulled.append(page)
+            yield page
+
+    with PageScheduler(pow, workers=2, max_in_flight=3) as scheduler:
+        results = scheduler.map(pages(), 2)
+        assert next(results) == 1
+        # Only the pages in flight have been read
+        assert len(pulled) == 3
+        assert [next(results) for _ in range(5)] == [4, 9, 16, 25, 36]
+        results.close()
+        assert len(pulled) <= 9
+
+
+def test_single_worker_runs_inline_and_initializes_once():
+    initialized = []
+    scheduler = PageScheduler(lambda page, offset: page + offset, workers=1,
+                              initializer=initialized.append, initargs=('warm',))
+    assert list(scheduler.map([1, 2, 3], 10)) == [11, 12, 13]
+    assert list(scheduler.map([4], 10)) == [14]
+    assert initialized == ['warm']
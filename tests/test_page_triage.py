@@ -0,0 +1,118 @@
+import collections
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import processors.text_layer as text_layer
+from config import settings
+from ocr_processor import OCRProcessor
+from processors.page_triage import PageIndex, merge_triaged, page_signature, triage_pages
+
+
+def invoice(number, date, amount):
+    return ["ACME Corp - INVOICE", f"Invoice no: {number}", f"Date: {date}", "Item  Qty  Price",
+            "Widgets  3  10.00", f"Total: {amount}"] + ["Terms: payable within 30 days"] * 5
+
+
+def run_triage(pages, index):
+    plan = collections.deque()
+    ocr = list(triage_pages(pages, range(1, len(pages) + 1), plan, index=index))
+    results = merge_triaged(({'text': f'ocr{n}'} for n in range(len(ocr))), plan,
+                            blank=lambda: 'blank', duplicate=lambda entry: ('duplicate', entry['page']))
+    return list(results)
+
+
+@pytest.mark.parametrize('lines', [1, 3, 10, 30])
+def test_typed_page_is_not_blank(typed_page, lines):
+    page = typed_page(["The quick brown fox jumps over the lazy dog 0123456789"] * lines)
+    assert page_signature(page)['coverage'] >= settings.TRIAGE_BLANK_COVERAGE
+
+
+def test_single_word_is_not_blank(typed_page):
+    assert page_signature(typed_page(["Page 3"]))['coverage'] >= settings.TRIAGE_BLANK_COVERAGE
+
+
+def test_noisy_and_speckled_empty_pages_are_blank():
+    rng = np.random.default_rng(0)
+    noisy = np.clip(245 + rng.normal(0, 8, (3508, 2480)), 0, 255).astype(np.uint8)
+    speckled = np.full((3508, 2480), 255, np.uint8)
+    speckled[rng.random(speckled.shape) < 0.001] = 0
+    assert page_signature(noisy)['coverage'] < settings.TRIAGE_BLANK_COVERAGE
+    assert page_signature(speckled)['coverage'] < settings.TRIAGE_BLANK_COVERAGE
+
+
+@pytest.mark.parametrize('other', [
+    ('10024', '2024-03-14', '1,234.56'),
+    ('10023', '2024-03-15', '1,234.56'),
+    ('10023', '2024-03-14', '1,234.58'),
+])
+def test_same_layout_with_different_fields_is_not_a_duplicate(typed_page, other):
+    first = typed_page(invoice('10023', '2024-03-14', '1,234.56'))
+    second = typed_page(invoice(*other), noise=8)
+    assert run_triage([first, second], PageIndex()) == [(1, {'text': 'ocr0'}), (2, {'text': 'ocr1'})]
+
+
+def test_noisy_copy_of_a_page_is_a_duplicate(typed_page):
+    page = typed_page(invoice('10023', '2024-03-14', '1,234.56'))
+    copy = typed_page(invoice('10023', '2024-03-14', '1,234.56'), noise=8, seed=1)
+    blank = np.full_like(page, 255)
+    assert run_triage([page, blank, copy], PageIndex()) == [
+        (1, {'text': 'ocr0'}), (2, 'blank'), (3, ('duplicate', 1))]
+
+
+def test_without_index_every_page_is_ocrd(typed_page):
+    blank = np.full((1000, 800), 255, np.uint8)
+    assert run_triage([blank, blank], None) == [(1, {'text': 'ocr0'}), (2, {'text': 'ocr1'})]
+
+
+def test_documents_and_tenants_do_not_share_pages(monkeypatch):
+    processor = OCRProcessor()
+
+    monkeypatch.setattr(settings, 'TRIAGE_CROSS_DOCUMENT', False)
+    assert processor._page_index_for('alice') is not processor._page_index_for('alice')
+
+    monkeypatch.setattr(settings, 'TRIAGE_CROSS_DOCUMENT', True)
+    assert processor._page_index_for('alice') is processor._page_index_for('alice')
+    assert processor._page_index_for('alice') is not processor._page_index_for('bob')
+    assert processor._page_index_for(None) is not processor._page_index_for(None)
+
+
+def test_text_layer_and_triaged_pages_interleave_in_page_order(typed_page, monkeypatch):
+    # Pages 1, 4 and 7 have a trusted text layer; of the rest, 3 is blank and 5 repeats 2
+    scans = {2: typed_page(invoice('10023', '2024-03-14', '1,234.56')),
+             3: np.full((3508, 2480), 255, np.uint8),
+             5: typed_page(invoice('10023', '2024-03-14', '1,234.56'), noise=8, seed=1),
+             6: typed_page(invoice('10024', '2024-03-15', '99.00'))}
+    layer = [{'page': number, 'trusted': number not in scans, 'reason': 'scan', 'dpi': None,
+              'words': [{'text': f"text{number}", 'line': 0, 'box': (0, 0, 10, 10)}]}
+             for number in range(1, 8)]
+    monkeypatch.setattr(settings, 'TEXT_LAYER_ENABLED', True)
+    monkeypatch.setattr(settings, 'TRIAGE_ENABLED', True)
+    monkeypatch.setattr(text_layer, 'classify_pdf', lambda pdf, first_page=None: layer)
+
+    processor = OCRProcessor(engines=['easyocr'], mode='ensemble')
+    rendered, processed = [], []
+
+    def iter_pdf_pages(file_stream, first_page=1, pages=None):
+        for number in pages:
+            rendered.append(number)
+            yield Image.fromarray(scans[number])
+
+    def process_image(image, languages, **kwargs):
+        processed.append(image)
+        return {'text': f"ocr{len(processed)}", 'confidence': 0.9, 'engine_used': 'easyocr',
+                'words': [], 'all_engines': []}
+    monkeypatch.setattr(processor, '_iter_pdf_pages', iter_pdf_pages)
+    monkeypatch.setattr(processor, '_process_image', process_image)
+
+    pages = list(processor.iter_pages(io.BytesIO(b'%PDF'), 'pdf', ['en']))
+
+    assert rendered == [2, 3, 5, 6]
+    assert len(processed) == 2
+    assert [(page['page'], page['source']) for page in pages] == [
+        (1, 'text_layer'), (2, 'ocr'), (3, 'blank'), (4, 'text_layer'),
+        (5, 'duplicate'), (6, 'ocr'), (7, 'text_layer')]
+    assert [page['text'] for page in pages] == ['text1', 'ocr1', '', 'text4', 'ocr1', 'ocr2', 'text7']
+    assert pages[4]['duplicate_of'] == 2
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import ocr_processor
+
+PAGE = np.full((20, 20, 3), 255, np.uint8)
+TASKS = [('easyocr', (PAGE, ['en'])), ('tesseract', (PAGE, ['en']))]
+
+
+def result(text):
+    return text, 0.9, [{'text': text, 'confidence': 90.0, 'box': (0, 0, 5, 5)}]
+
+
+@pytest.fixture
+def processor():
+    processor = ocr_processor.OCRProcessor(execution_mode='thread', engines=['easyocr', 'tesseract'],
+                                           warm_up=False, engine_timeouts={'easyocr': 5, 'tesseract': 0.2})
+    yield processor
+    processor.close()
+
+
+def test_queued_engine_is_timed_from_when_it_starts(processor, monkeypatch):
+    # One worker: Tesseract waits longer than its timeout for EasyOCR to finish
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(processor, '_get_executor', lambda engine=None: executor)
+    monkeypatch.setattr(processor, '_extract_with_easyocr', lambda *args: time.sleep(0.4) or result('slow'))
+    monkeypatch.setattr(processor, '_extract_with_tesseract', lambda *args: result('fast'))
+
+    results = processor._run_engines_parallel(TASKS)
+    assert [res['text'] for res in results] == ['slow', 'fast']
+    executor.shutdown()
+
+
+def test_stuck_engine_is_dropped_and_the_pool_replaced(processor, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(processor, '_extract_with_easyocr', lambda *args: result('fast'))
+    monkeypatch.setattr(processor, '_extract_with_tesseract', lambda *args: release.wait() and result('stuck'))
+    executor = processor._get_executor()
+    assert executor._max_workers >= len(TASKS)
+
+    start = time.monotonic()
+    results = processor._run_engines_parallel(TASKS)
+    assert time.monotonic() - start < 2
+    assert [res['engine'] for res in results] == ['easyocr']
+    assert processor._get_executor() is not executor
+    release.set()
+
+
+def test_engine_worker_loads_only_the_engine_it_runs(monkeypatch):
+    loaded = []
+
+    class Reader:
+        def readtext(self, image, detail=1):
+            return [([[0, 0], [5, 0], [5, 5], [0, 5]], 'hello', 0.9)]
+
+    monkeypatch.setattr(ocr_processor, '_worker_processor', None)
+    monkeypatch.setattr(ocr_processor.settings, 'WARM_UP', True)
+    for engine in ocr_processor.ENGINE_MODULES:
+        monkeypatch.setitem(ocr_processor.ENGINE_MODULES, engine, 'json')
+        monkeypatch.setitem(ocr_processor.ENGINE_LOADERS, engine,
+                            lambda engine=engine: loaded.append(engine) or Reader())
+
+    (text, _, _), _ = ocr_processor._extract_in_worker('easyocr', PAGE, ['en', 'ar'])
+    assert text == 'hello'
+    assert loaded == ['easyocr']
+
+
+class PidReader:
+    """Reads every page as the id of the process it runs in and the engines that process loaded."""
+
+    def read(self):
+        return f"{os.getpid()}:{','.join(sorted(ocr_processor._worker_processor._engines))}"
+
+    def readtext(self, image, detail=1):
+        return [([[0, 0], [5, 0], [5, 5], [0, 5]], self.read(), 0.9)]
+
+    def ocr(self, image, cls=False):
+        return [[([[0, 0], [5, 0], [5, 5], [0, 5]], (self.read(), 0.9))]]
+
+
+def test_process_mode_gives_every_engine_a_process_of_its_own(monkeypatch):
+    monkeypatch.setattr(ocr_processor, '_worker_processor', None)
+    for engine in ocr_processor.ENGINE_MODULES:
+        monkeypatch.setitem(ocr_processor.ENGINE_MODULES, engine, 'json')
+        monkeypatch.setitem(ocr_processor.ENGINE_LOADERS, engine, PidReader)
+    processor = ocr_processor.OCRProcessor(execution_mode='process', engines=['easyocr', 'paddleocr'],
+                                           warm_up=False)
+    # Nothing is loaded in the parent, only in the pool processes
+    monkeypatch.setattr(processor, '_load_engine', lambda engine: pytest.fail(f"{engine} loaded in the parent"))
+    try:
+        assert processor._available_engines() == ['easyocr', 'paddleocr']
+        tasks = [('easyocr', (PAGE, ['en', 'ar'])), ('paddleocr', (PAGE,))]
+        texts = [res['text'] for res in processor._run_engines_parallel(tasks)]
+        texts += [res['text'] for res in processor._run_engines_parallel(tasks)]
+    finally:
+        processor.close()
+
+    pids = {text.split(':')[0] for text in texts}
+    assert len(pids) == 2 and str(os.getpid()) not in pids
+    assert sorted({text.split(':')[1] for text in texts}) == ['easyocr', 'paddleocr']
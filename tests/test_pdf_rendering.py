@@ -0,0 +1,61 @@
+import os
+import threading
+
+import pytest
+from PIL import Image
+
+import processors.pdf_processor as pdf_processor
+from processors.pdf_processor import _render_windows, iter_pdf_pages
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    """A fake pdftoppm for a 10 page PDF that records every call."""
+    calls = []
+    rendered = []
+    lock = threading.Lock()
+
+    def convert_from_path(path, dpi, first_page, last_page, **kwargs):
+        assert os.path.exists(path)
+        with lock:
+            calls.append((first_page, last_page, dpi))
+        pages = []
+        for number in range(first_page, last_page + 1):
+            with lock:
+                rendered.append(number)
+            pages.append(Image.new('L', (10, 10), number))
+        return pages
+
+    monkeypatch.setattr(pdf_processor, 'convert_from_path', convert_from_path)
+    monkeypatch.setattr(pdf_processor, 'pdfinfo_from_path', lambda path: {'Pages': 10})
+    return calls, rendered
+
+
+def test_pages_are_rendered_in_windows_in_order(renderer):
+    calls, _ = renderer
+    pages = list(iter_pdf_pages(b'%PDF', dpi=200, window=4, prefetch=2, first_page=3))
+    assert [page.getpixel((0, 0)) for page in pages] == list(range(3, 11))
+    assert calls == [(3, 6, 200), (7, 10, 200)]
+    assert pages[0].info['dpi'] == (200, 200)
+
+
+def test_selected_pages_are_grouped_into_consecutive_runs():
+    assert list(_render_windows('doc.pdf', 2, [1, 2, 3, 5, 6, 7, 8, 9, 12], window=3)) == \
+        [(2, 3), (5, 7), (8, 9), (12, 12)]
+
+
+def test_rendering_stops_when_the_consumer_does(renderer):
+    calls, rendered = renderer
+    pages = iter_pdf_pages(b'%PDF', dpi=200, window=1, prefetch=1)
+    assert next(pages).getpixel((0, 0)) == 1
+    pages.close()
+    # One page consumed, one waiting in the queue and one blocked on it at most
+    assert len(rendered) <= 3
+
+
+def test_render_errors_reach_the_consumer(renderer, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("pdftoppm crashed")
+    monkeypatch.setattr(pdf_processor, 'convert_from_path', fail)
+    with pytest.raises(RuntimeError, match="pdftoppm crashed"):
+        list(iter_pdf_pages(b'%PDF', window=2))
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+import ocr_processor
+import pipeline
+from utils.result_cache import ResultCache
+
+PAGE = np.full((40, 60), 255, np.uint8)
+
+
+@pytest.mark.parametrize('name, value', [
+    ('SCRIPT_MIN_CONFIDENCE', 9.0),
+    ('SCRIPT_DETECTION_BANDS', 5),
+    ('TILE_SIZE', 1024),
+    ('TILE_MEMORY_BUDGET', 1024 ** 2),
+    ('LAYOUT_ENABLED', True),
+])
+def test_pipeline_cache_key_covers_result_settings(monkeypatch, name, value):
+    key = pipeline._cache_key(PAGE)
+    monkeypatch.setattr(pipeline.settings, name, value)
+    assert pipeline._cache_key(PAGE) != key
+
+
+def test_processor_cache_key_covers_result_settings(monkeypatch):
+    processor = ocr_processor.OCRProcessor(engines=['tesseract'], warm_up=False)
+    image = ocr_processor.Image.fromarray(PAGE)
+    keys = {processor._page_cache_key(image, ['en'], {})}
+    for name, value in [('SCRIPT_MIN_CONFIDENCE', 9.0), ('TILE_OVERLAP', 17), ('CASCADE_CONFIDENCE_LEVEL', 'high')]:
+        monkeypatch.setattr(ocr_processor.settings, name, value)
+        keys.add(processor._page_cache_key(image, ['en'], {}))
+    assert len(keys) == 4
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), max_bytes=3000, enabled=True)
+    for index in range(3):
+        cache.put(f"{index:02d}", b'x' * 900)
+        path = cache._path(f"{index:02d}")
+        os.utime(path, (index, index))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get('00') == b'x' * 900
+    cache.put('03', b'x' * 900)
+
+    assert cache.contains('00') and cache.contains('03')
+    assert not cache.contains('01')
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_pipeline_pages_are_cached_once_as_a_whole(monkeypatch, tmp_path):
+    import pytesseract
+    import ocr_engines.engine_pool as engine_pool_module
+    from ocr_engines.engine_pool import EnginePool
+    from utils.result_cache import result_cache
+
+    class Reader:
+        def readtext(self, image):
+            return [([[0, 0], [9, 0], [9, 5], [0, 5]], 'Total', 0.9)]
+
+        def ocr(self, image, cls=False):
+            return [[([[0, 0], [9, 0], [9, 5], [0, 5]], ('Total', 0.8))]]
+
+    monkeypatch.setattr(engine_pool_module, 'engine_pool', EnginePool(factories={
+        'easyocr': lambda languages, **options: Reader(),
+        'paddleocr': lambda languages, **options: Reader(),
+    }))
+    monkeypatch.setattr(pytesseract, 'image_to_data', lambda image, **kwargs: {
+        'text': ['Total'], 'conf': [95], 'left': [0], 'top': [0], 'width': [9], 'height': [5]})
+    monkeypatch.setattr(pipeline.settings, 'LAYOUT_ENABLED', False)
+    monkeypatch.setattr(pipeline.settings, 'LANGUAGE_DETECTION', False)
+    for name, value in [('cache_dir', str(tmp_path)), ('enabled', True), ('_size', None), ('hits', 0)]:
+        monkeypatch.setattr(result_cache, name, value)
+
+    first = pipeline.process_page(PAGE.copy())
+    assert len(list(tmp_path.rglob('*.pkl'))) == 1
+    assert pipeline.process_page(PAGE.copy()) == first
+    assert result_cache.hits == 1
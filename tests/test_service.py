@@ -0,0 +1,151 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import service as service_module
+from service import OCRService
+
+
+def fake_run_job(job_id, data, extension, languages, start_page, page_queue):
+    """Publishes one page per line of the document, like a worker would."""
+    lines = data.decode().splitlines()
+    for number, line in enumerate(lines, start=start_page):
+        page_queue.put((job_id, {'page': number, 'text': line, 'languages': languages}))
+    if 'fail' in lines:
+        raise RuntimeError('engine crashed')
+    return len(lines)
+
+
+async def start(service):
+    # The real pool and page queue live in other processes; threads behave the same here
+    service.loop = asyncio.get_running_loop()
+    service.queue = asyncio.PriorityQueue(maxsize=service.queue_size)
+    service.page_queue = queue.Queue()
+    service.executor = ThreadPoolExecutor(service.workers)
+    service._forwarder = threading.Thread(target=service._forward_pages, daemon=True)
+    service._forwarder.start()
+    service._dispatchers = [asyncio.create_task(service._dispatch()) for _ in range(service.workers)]
+
+
+async def stop(service):
+    for task in service._dispatchers:
+        task.cancel()
+    await asyncio.gather(*service._dispatchers, return_exceptions=True)
+    service.page_queue.put(None)
+    service.executor.shutdown()
+
+
+def test_queue_is_bounded_and_served_by_priority():
+    async def run():
+        service = OCRService(workers=1, queue_size=3)
+        service.queue = asyncio.PriorityQueue(maxsize=service.queue_size)
+        low = service.submit(b'', 'png', ['en'], priority=0)
+        first_high = service.submit(b'', 'png', ['en'], priority=5)
+        second_high = service.submit(b'', 'png', ['en'], priority=5)
+        with pytest.raises(asyncio.QueueFull):
+            service.submit(b'', 'png', ['en'])
+        return low, [service.queue.get_nowait()[2] for _ in range(3)], first_high, second_high
+
+    low, order, first_high, second_high = asyncio.run(run())
+    assert order == [first_high, second_high, low]
+
+
+def test_jobs_finish_once_every_page_is_in(monkeypatch):
+    monkeypatch.setattr(service_module, '_run_job', fake_run_job)
+
+    async def run():
+        service = OCRService(workers=2, queue_size=4)
+        await start(service)
+        done = service.submit(b'one\ntwo\nthree', 'pdf', ['en', 'ar'], start_page=2)
+        failed = service.submit(b'one\nfail', 'pdf', ['en'])
+        while not (done.finished and failed.finished):
+            await asyncio.sleep(0.01)
+        await stop(service)
+        return service, done, failed
+
+    service, done, failed = asyncio.run(run())
+    assert done.status == 'done'
+    assert [page['page'] for page in done.pages] == [2, 3, 4]
+    assert done.data is None
+    assert failed.status == 'failed'
+    assert failed.error == 'RuntimeError: engine crashed'
+    assert service.running == 0
+
+
+def test_pages_are_streamed_as_ndjson(monkeypatch):
+    monkeypatch.setattr(service_module, '_run_job', fake_run_job)
+    monkeypatch.setattr(service_module.settings, 'SERVICE_RETRY_AFTER', 7)
+
+    async def run():
+        app = web.Application()
+        app[service_module.SERVICE_KEY] = OCRService(workers=1, queue_size=1)
+        app.add_routes([web.post('/jobs', service_module.submit_job),
+                        web.get('/jobs/{job_id}', service_module.get_job),
+                        web.get('/health', service_module.health)])
+        await start(app[service_module.SERVICE_KEY])
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post('/jobs', params={'extension': 'pdf', 'stream': '1'}, data=b'a\nb')
+            records = (await response.text()).splitlines()
+
+            rejected = await client.post('/jobs', params={'extension': 'exe'}, data=b'')
+            # With the worker blocked, one job fills the queue and the next is turned away
+            release = threading.Event()
+            monkeypatch.setattr(service_module, '_run_job', lambda *args: release.wait() and 0)
+            await client.post('/jobs', params={'extension': 'png'}, data=b'')
+            await asyncio.sleep(0.05)
+            await client.post('/jobs', params={'extension': 'png'}, data=b'')
+            full = await client.post('/jobs', params={'extension': 'png'}, data=b'')
+            health = await (await client.get('/health')).json()
+            release.set()
+            unknown = await client.get('/jobs/missing')
+            result = (records, rejected.status, full.status, full.headers['Retry-After'], health, unknown.status)
+        await stop(app[service_module.SERVICE_KEY])
+        return result
+
+    records, rejected, full, retry_after, health, unknown = asyncio.run(run())
+    assert [line.startswith('{"page"') for line in records] == [True, True, False]
+    assert '"status": "done"' in records[-1]
+    assert (rejected, full, retry_after, unknown) == (400, 503, '7', 404)
+    assert (health['running'], health['queued']) == (1, 1)
+
+
+def test_a_broken_pool_is_replaced_once(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool(ThreadPoolExecutor):
+        def __init__(self):
+            super().__init__(1)
+            self.shutdowns = 0
+
+        def submit(self, *args, **kwargs):
+            future = Future()
+            future.set_exception(BrokenProcessPool('a worker died'))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shutdowns += 1
+            super().shutdown(wait=False)
+
+    async def run():
+        service = OCRService(workers=3, queue_size=4)
+        await start(service)
+        service.executor.shutdown()
+        broken = service.executor = BrokenPool()
+        replacements = []
+        monkeypatch.setattr(service, '_make_executor', lambda: replacements.append(1) or ThreadPoolExecutor(1))
+        jobs = [service.submit(b'page', 'png', ['en']) for _ in range(3)]
+        while not all(job.finished for job in jobs):
+            await asyncio.sleep(0.01)
+        await stop(service)
+        return jobs, broken, replacements
+
+    jobs, broken, replacements = asyncio.run(run())
+    # Every dispatcher saw the broken pool, but only one replaced it
+    assert all(job.error.startswith('BrokenProcessPool') for job in jobs)
+    assert len(replacements) == 1
+    assert broken.shutdowns == 1
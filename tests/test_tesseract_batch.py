@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import ocr_engines.tesseract_batch as tesseract_batch
+import ocr_processor
+from ocr_engines.tesseract_batch import _parse_tsv, words_from_data
+from utils.result_cache import ResultCache, result_cache
+
+TSV = '\n'.join([
+    'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext',
+    '1\t1\t0\t0\t0\t0\t0\t0\t100\t50\t-1',
+    '5\t1\t1\t1\t1\t1\t5\t6\t30\t10\t96.5\tInvoice',
+    '5\t2\t1\t1\t1\t1\t7\t8\t20\t10\t88\t42',
+    '5\t2\t1\t1\t1\t2\t30\t8\t20\t10\t12.25\t ',
+])
+
+
+def test_parse_tsv_splits_pages_and_keeps_rows_without_text():
+    first, second = _parse_tsv(TSV, 2)
+    assert first['level'] == [1, 5]
+    assert first['text'] == ['', 'Invoice']
+    assert second['conf'] == [88.0, 12.25]
+    assert words_from_data(first) == [{'text': 'Invoice', 'confidence': 96, 'box': (5, 6, 30, 10)}]
+    assert [word['text'] for word in words_from_data(second)] == ['42']
+
+
+def test_contains_does_not_read_or_count(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path), enabled=True)
+    cache.put('key', {'text': 'page'})
+    assert cache.contains('key')
+    assert not cache.contains('other')
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert not ResultCache(cache_dir=str(tmp_path), enabled=False).contains('key')
+
+
+def page_data(text):
+    return {'text': [text], 'conf': [91.0], 'left': [1], 'top': [2], 'width': [30], 'height': [10]}
+
+
+def test_prefetch_batches_grow_from_a_single_page(monkeypatch):
+    batches = []
+    monkeypatch.setattr(ocr_processor.settings, 'TESSERACT_BATCH_PAGES', 4)
+    monkeypatch.setattr(ocr_processor.settings, 'LANGUAGE_DETECTION', False)
+    monkeypatch.setattr(result_cache, 'contains', lambda key: False)
+    monkeypatch.setattr(tesseract_batch, 'iter_data_batches',
+                        lambda images, lang, batch_pages=None, page_timeout=None:
+                        batches.append((lang, len(images), page_timeout)) or [page_data('x') for _ in images])
+    processor = ocr_processor.OCRProcessor(engines=['tesseract'], execution_mode='sequential',
+                                           engine_timeouts={'tesseract': 7})
+    images = [Image.new('L', (20 + page, 20), 255) for page in range(10)]
+
+    pages = processor._prefetch_tesseract(iter(images), ['en', 'ar'], {})
+    assert next(pages) is images[0]
+    # The first page is OCR'd on its own, before the next pages are read
+    assert batches == [('eng+ara', 1, 7)]
+    assert list(pages) == images[1:]
+    assert [size for _, size, _ in batches] == [1, 2, 4, 3]
+    assert all(image.info['tesseract_batch'][0] == 'eng+ara' for image in images)
+
+
+def test_batches_run_alongside_the_other_engines(monkeypatch):
+    easyocr_ran = threading.Event()
+
+    def iter_data_batches(images, lang, batch_pages=None, page_timeout=None):
+        # Only finishes once EasyOCR has run on the first page, i.e. concurrently with it
+        assert easyocr_ran.wait(5)
+        time.sleep(0.2)
+        return [page_data(f"tess{image.width}") for image in images]
+
+    monkeypatch.setattr(ocr_processor.settings, 'TESSERACT_BATCH_PAGES', 2)
+    monkeypatch.setattr(ocr_processor.settings, 'LANGUAGE_DETECTION', False)
+    monkeypatch.setattr(result_cache, 'contains', lambda key: False)
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: None)
+    monkeypatch.setattr(tesseract_batch, 'iter_data_batches', iter_data_batches)
+    processor = ocr_processor.OCRProcessor(engines=['easyocr', 'tesseract'], execution_mode='thread')
+    monkeypatch.setattr(processor, '_load_engine', lambda engine: object() if engine in processor.engines else None)
+    monkeypatch.setattr(processor, '_extract_with_easyocr',
+                        lambda image, languages: easyocr_ran.set() or ("e", 0.5, []))
+    monkeypatch.setattr(processor, '_extract_with_tesseract',
+                        lambda *args: pytest.fail("page was read again by a Tesseract process of its own"))
+
+    images = [Image.new('L', (20 + page, 20), 255) for page in range(3)]
+    results = [processor._process_image(image, ['en']) for image in
+               processor._prefetch_tesseract(iter(images), ['en'], {})]
+    processor.close()
+
+    assert [result['text'] for result in results] == ['tess20', 'tess21', 'tess22']
+    engines = [{res['engine']: res['wall_time'] for res in result['all_engines']} for result in results]
+    # The second batch's 0.2s are split over its two pages
+    assert engines[0]['tesseract'] >= 0.2
+    assert 0.1 <= engines[1]['tesseract'] == engines[2]['tesseract'] < 0.2
+    tesseract_spans = [page_span for result in results for page_span in result['spans']
+                       if page_span.get('engine') == 'tesseract']
+    assert [page_span['batched'] for page_span in tesseract_spans] == [True] * 3
@@ -0,0 +1,52 @@
+from processors.text_layer import _parse_image_list, classify_page, image_coverage, text_coverage
+
+A4_300DPI = {'width': 2480, 'height': 3508, 'dpi': 300}
+
+PDFIMAGES_LIST = """\
+page   num  type   width height color comp bpc  enc interp  object ID x-ppi y-ppi size ratio
+--------------------------------------------------------------------------------------------
+   1     0 image    2480  3508  gray    1   1  ccitt  no         7  0   300   300 52.0K 4.9%
+   1     1 smask    2480  3508  gray    1   8  image  no         7  0   300   300 1.00K 0.1%
+   2     2 image     300   100  rgb     3   8  jpeg   no        12  0   150   150 8.00K 9.1%
+"""
+
+
+def page(words, **extra):
+    return dict(A4_300DPI, page=1, words=words, **extra)
+
+
+def body_words():
+    return [{'text': 'lorem', 'box': (200 + 160 * col, 200 + 60 * row, 150, 40), 'line': row}
+            for row in range(30) for col in range(10)]
+
+
+def bates_stamp():
+    return [{'text': text, 'box': (1900 + 130 * index, 3400, 120, 30), 'line': 0}
+            for index, text in enumerate(['ACME', 'CONFIDENTIAL', 'BATES', 'ACME000123', 'Page', '4'])]
+
+
+def test_born_digital_page_is_trusted():
+    assert classify_page(page(body_words())) == (True, 'text layer')
+
+
+def test_stamp_on_a_scanned_page_is_not_trusted():
+    trusted, reason = classify_page(page(bates_stamp()))
+    assert not trusted and reason == 'sparse text layer'
+    assert text_coverage(page(bates_stamp())) < 0.01
+
+
+def test_invisible_ocr_layer_over_a_scan_is_not_trusted():
+    trusted, reason = classify_page(page(body_words(), image_coverage=1.0))
+    assert (trusted, reason) == (False, 'scanned page')
+
+
+def test_small_figure_does_not_prevent_trust():
+    assert classify_page(page(body_words(), image_coverage=0.2))[0]
+
+
+def test_image_list_gives_displayed_sizes():
+    images = _parse_image_list(PDFIMAGES_LIST)
+    # Soft masks are not separate images
+    assert images == {1: [(2480 / 300, 3508 / 300)], 2: [(2.0, 100 / 150)]}
+    assert image_coverage(A4_300DPI, images[1]) == 1.0
+    assert image_coverage(A4_300DPI, images[2]) < 0.05
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+import processors.tiling as tiling
+from processors.tiling import map_strips, plan_tiles, run_tiled, tile_layout
+
+
+def test_tile_cores_cover_the_page_exactly_once():
+    height, width = 1000, 2500
+    tiles = plan_tiles(height, width, tile_size=1000, overlap=100)
+    assert [tile[:2] for tile, _ in tiles] == [(0, 0), (900, 0), (1500, 0)]
+
+    covered = np.zeros((height, width), np.uint8)
+    for (x, y, w, h), (x1, y1, x2, y2) in tiles:
+        assert x <= x1 and y <= y1 and x2 <= x + w and y2 <= y + h
+        covered[int(y1):int(y2), int(x1):int(x2)] += 1
+    assert (covered == 1).all()
+    assert plan_tiles(500, 400, tile_size=1000, overlap=100) == [((0, 0, 400, 500), (0, 0, 400, 500))]
+
+
+def test_strips_filter_like_the_whole_image():
+    image = np.random.default_rng(0).integers(0, 256, (301, 97), dtype=np.uint8)
+    blur = lambda strip: cv2.GaussianBlur(strip, (9, 9), 0)
+    assert np.array_equal(map_strips(blur, image, margin=8, strip_height=40), blur(image))
+
+
+def test_tile_layout_fits_the_memory_budget(monkeypatch):
+    monkeypatch.setattr(tiling.settings, 'TILE_SIZE', 4096)
+    monkeypatch.setattr(tiling.settings, 'TILE_OVERLAP', 256)
+    tile_size, workers = tile_layout(budget=64 * 1024 ** 2, bytes_per_pixel=64)
+    assert tile_size == 1024 and workers == 1
+    # Never narrower than twice the overlap
+    assert tile_layout(budget=1024, bytes_per_pixel=64)[0] == 512
+
+
+def test_words_cut_by_tile_edges_are_reported_once():
+    # Every "word" is a block of its own gray level; the recognizer reads the blocks of a tile
+    image = np.full((600, 900), 255, np.uint8)
+    words = {10: (40, 40, 120, 30), 20: (430, 200, 140, 30), 30: (580, 470, 100, 30), 40: (290, 285, 80, 30)}
+    for level, (x, y, w, h) in words.items():
+        image[y:y + h, x:x + w] = level
+
+    def recognize(tile):
+        found = []
+        for level in np.unique(tile):
+            if level == 255:
+                continue
+            ys, xs = np.nonzero(tile == level)
+            box = (int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1))
+            cut = box[2:] != words[level][2:]
+            found.append({'text': str(level), 'confidence': 40.0 if cut else 90.0, 'box': box})
+        return found
+
+    result = run_tiled(image, recognize, tile_size=300, overlap=120, workers=2)
+    assert sorted((int(word['text']), word['box']) for word in result) == sorted(words.items())
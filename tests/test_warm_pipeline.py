@@ -0,0 +1,45 @@
+import numpy as np
+
+import ocr_engines.engine_pool as engine_pool_module
+import pipeline
+import processors.pdf_processor as pdf_processor
+from ocr_engines.engine_pool import EnginePool
+from utils.result_cache import result_cache
+
+
+class FakeEasyOCR:
+    def readtext(self, image):
+        return [([[0, 0], [9, 0], [9, 5], [0, 5]], 'Total', 0.9)]
+
+
+class FakePaddle:
+    def ocr(self, image, cls=False):
+        return [[([[0, 0], [9, 0], [9, 5], [0, 5]], ('Total', 0.8))]]
+
+
+def test_first_page_reuses_the_warmed_up_engines(monkeypatch):
+    created = []
+    pool = EnginePool(factories={
+        'easyocr': lambda languages, **options: created.append('easyocr') or FakeEasyOCR(),
+        'paddleocr': lambda languages, **options: created.append('paddleocr') or FakePaddle(),
+    })
+    monkeypatch.setattr(engine_pool_module, 'engine_pool', pool)
+    monkeypatch.setattr(pipeline.settings, 'LAYOUT_ENABLED', False)
+    monkeypatch.setattr(pipeline.settings, 'LANGUAGE_DETECTION', False)
+    monkeypatch.setattr(result_cache, 'get', lambda key: None)
+    monkeypatch.setattr(result_cache, 'put', lambda key, value: None)
+    monkeypatch.setattr(pipeline, 'run_tesseract_ocr', lambda image, lang, cache: [])
+
+    pipeline.warm_up_engines()
+    assert sorted(created) == ['easyocr', 'paddleocr']
+
+    results = pipeline.process_page(np.full((60, 80), 255, np.uint8))
+    assert [(word['text'], sorted(word['engines'])) for word in results] == [('Total', ['easyocr', 'paddleocr'])]
+    assert len(created) == 2
+
+
+def test_page_count_of_an_uploaded_pdf_is_read_from_memory(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_processor, 'pdfinfo_from_bytes', lambda data: {'Pages': len(data)})
+    monkeypatch.setattr(pdf_processor, 'pdfinfo_from_path', lambda path: {'Pages': 1})
+    assert pdf_processor.pdf_page_count(b'%PDF-1') == 6
+    assert pdf_processor.pdf_page_count(str(tmp_path / 'doc.pdf')) == 1
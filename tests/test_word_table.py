@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from utils.word_table import WordTable
+
+WORDS = [
+    {'text': 'Rechnung', 'confidence': 91.5, 'box': (10, 20, 80, 16), 'engine': 'tesseract', 'page': 1, 'line': 0},
+    {'text': 'فاتورة', 'confidence': 40.0, 'box': [[100, 20], [160, 20], [160, 36], [100, 36]],
+     'engine': 'easyocr', 'page': 1, 'line': 0},
+    {'text': '€12,50', 'confidence': 77.0, 'box': (10, 50, 40, 16), 'engines': ['tesseract', 'paddleocr'],
+     'page': 2, 'line': (3, 1)},
+    {'text': 'x', 'confidence': 12.0, 'box': None},
+]
+
+
+def test_from_words_round_trips_to_dicts():
+    table = WordTable.from_words(WORDS)
+    assert len(table) == 4
+    assert table.texts() == ['Rechnung', 'فاتورة', '€12,50', 'x']
+    first, second, third, fourth = table.to_dicts()
+    assert first == {'text': 'Rechnung', 'confidence': 91.5, 'box': (10.0, 20.0, 80.0, 16.0),
+                     'engine': 'tesseract', 'page': 1, 'line': 0}
+    # Corner points become (left, top, width, height)
+    assert second['box'] == (100.0, 20.0, 60.0, 16.0)
+    # Agreeing engines are stored as the ensemble and tuple lines get their own number
+    assert (third['engine'], third['page'], third['line']) == ('ensemble', 2, 1)
+    assert fourth == {'text': 'x', 'confidence': 12.0, 'box': (0.0, 0.0, 0.0, 0.0)}
+    assert table[-1].get('page', 'none') == 'none'
+
+
+def test_selections_and_concat_keep_texts_aligned():
+    table = WordTable.from_words(WORDS)
+    assert table[1:3].texts() == ['فاتورة', '€12,50']
+    assert table[np.array([3, 0])].texts() == ['x', 'Rechnung']
+    assert table.filter(min_confidence=50).texts() == ['Rechnung', '€12,50']
+    assert {engine: words.texts() for engine, words in table.by_engine().items()} == \
+        {'tesseract': ['Rechnung'], 'easyocr': ['فاتورة'], 'ensemble': ['€12,50']}
+
+    joined = WordTable.concat([table[2:], WordTable.from_words([]), table[:2]])
+    assert joined.texts() == ['€12,50', 'x', 'Rechnung', 'فاتورة']
+    assert joined[3]['engine'] == 'easyocr'
+
+
+@pytest.mark.parametrize('mmap_mode', [None, 'r'])
+def test_npz_round_trip(tmp_path, mmap_mode):
+    table = WordTable.from_words(WORDS)
+    path = tmp_path / 'words.npz'
+    table.save_npz(path)
+    loaded = WordTable.load_npz(path, mmap_mode=mmap_mode)
+    assert loaded.to_dicts() == table.to_dicts()
+
+
+def test_arrow_columns_match_the_table():
+    pa = pytest.importorskip('pyarrow')
+    arrow = WordTable.from_words(WORDS).to_arrow()
+    assert isinstance(arrow, pa.Table)
+    assert arrow.column('text').to_pylist() == ['Rechnung', 'فاتورة', '€12,50', 'x']
+    assert arrow.column('engine').to_pylist() == ['tesseract', 'easyocr', 'ensemble', None]
+    assert arrow.column('page').to_pylist() == [1, 1, 2, None]